@@ -0,0 +1,6 @@
+from benchmarks.suite import main
+
+
+__all__ = [
+    "main",
+]
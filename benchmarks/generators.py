@@ -0,0 +1,266 @@
+"""
+Синтетические входные данные для бенчмарков.
+
+Генерируются файл параметров с тысячами объявлений `MPR*`/`MPI*`, модель Verilog-A, которая его
+подключает, схема ngspice, многомегабайтные результаты в формате вывода print (со страницами
+и повторяющимися заголовками) и в формате rawfile, а также заменители openvaf и ngspice
+с настраиваемой задержкой. Заменители — скрипты Python, поэтому бенчмарки выполняются
+на любой машине с Linux без установленных openvaf и ngspice.
+"""
+
+import os
+import sys
+import stat
+
+import numpy as np
+import pandas as pd
+
+from typing import List
+
+
+MODULE_NAME = "bench"
+SCALE_PARAMETER = "gain"  # параметр модели, на который заменитель ngspice умножает векторы rawfile
+PAGE_ROWS = 55            # строк данных на странице вывода print
+
+# объявления (макрос, значение по умолчанию, единицы, нижняя и верхняя границы) по кругу
+DECLARATIONS = (
+    ("MPRco", "1.0", "", "1.0", "inf"),
+    ("MPRoo", "2.53", "", "0.0", "50.0"),
+    ("MPRco", "14.29m", "A", "1.0p", "inf"),
+    ("MPRcz", "22.0a", "A", None, None),
+    ("MPRcc", "0.63", "", "0.0", "1.0"),
+    ("MPRnb", "-1.5e-3", "V", None, None),
+    ("MPIcc", "1", "", "0", "3"),
+    ("MPRoz", "3.14f", "F", None, None),
+)
+
+
+def parameter_names(count: int) -> List[str]:
+    """Имена синтетических параметров (без параметра масштаба)."""
+    return [f"p{i:05d}" for i in range(count)]
+
+
+def declaration_line(macro: str, name: str, default: str, units: str, lower, upper, description: str) -> str:
+    if lower is None:
+        return f'`{macro}( {name:<14},{default:<15},"{units}"{"":<38},"{description}" )\n'
+    return f'`{macro}( {name:<14},{default:<15},"{units}"{"":<12},{lower:<12},{upper:<13},"{description}" )\n'
+
+
+def generate_parameters_file(path: str, count: int) -> List[str]:
+    """
+    Записывает файл параметров в стиле parameters.inc CMC-моделей: count объявлений макросами
+    `MPR*`/`MPI*` с множителями SPICE, комментариями и блоками `ifdef, плюс параметр масштаба gain.
+
+    Returns:
+        list: Имена объявленных параметров (кроме gain).
+    """
+    names = parameter_names(count)
+    lines = ["// Синтетический файл параметров для бенчмарков\n\n",
+             declaration_line("MPRoo", SCALE_PARAMETER, "1.0", "", "0.0", "inf", "Output scale")]
+    for i, name in enumerate(names):
+        if i % 100 == 0:
+            lines.append(f"\n// группа параметров {i // 100}\n")
+        macro, default, units, lower, upper = DECLARATIONS[i % len(DECLARATIONS)]
+        line = declaration_line(macro, name, default, units, lower, upper, f"Synthetic parameter {i}")
+        if i % 500 == 250:
+            line = f"`ifdef SUBSTRATE\n    {line}`endif\n"
+        lines.append(line)
+
+    with open(path, "w") as file:
+        file.writelines(lines)
+    return names
+
+
+def generate_model(directory: str, parameter_count: int) -> str:
+    """
+    Создаёт в directory модель bench.va, подключающую parameters.inc с parameter_count параметрами.
+
+    Returns:
+        str: Путь к .va файлу.
+    """
+    os.makedirs(directory, exist_ok=True)
+    generate_parameters_file(os.path.join(directory, "parameters.inc"), parameter_count)
+    va_file = os.path.join(directory, f"{MODULE_NAME}.va")
+    with open(va_file, "w") as file:
+        file.write(
+            "`define SUBSTRATE\n"
+            f"module {MODULE_NAME} (c, b, e);\n"
+            "    inout c, b, e;\n"
+            "    electrical c, b, e;\n"
+            '    `include "parameters.inc"\n'
+            "    analog begin\n"
+            f"        I(c, e) <+ {SCALE_PARAMETER} * V(b, e);\n"
+            "    end\n"
+            "endmodule\n"
+        )
+    return va_file
+
+
+def generate_netlist(path: str, osdi_file: str, points: int = 121):
+    """Схема с карточкой .model для модели bench, DC-анализом и командой print."""
+    with open(path, "w") as file:
+        file.write(
+            "bench circuit\n"
+            f".model bm {MODULE_NAME}\n"
+            "vc c 0 1.0\n"
+            "vb b 0 0.0\n"
+            "N1 c b 0 bm\n"
+            ".control\n"
+            f"pre_osdi {osdi_file}\n"
+            f"dc vb 0 1.2 {1.2 / max(points - 1, 1):g}\n"
+            "print abs(i(vc)) abs(i(vb)) v(c)\n"
+            ".endc\n"
+            ".end\n"
+        )
+
+
+def generate_frame(rows: int, columns: int = 3, curves: int = 1) -> pd.DataFrame:
+    """
+    Таблица результатов (Index, v-sweep, векторы): curves кривых семейства по rows // curves точек,
+    значения — экспоненциальные токи разного масштаба.
+    """
+    points = max(rows // curves, 2)
+    x = np.tile(np.linspace(0.0, 1.2, points), curves)
+    step = np.repeat(np.arange(1, curves + 1, dtype=np.float64), points)
+    data = {"Index": np.arange(len(x)), "v-sweep": x}
+    for column in range(columns):
+        data[f"abs(i(v{column}))"] = 1e-15 * step * np.exp(x / (0.026 * (column + 1))) * 10.0 ** column
+    return pd.DataFrame(data)
+
+
+def generate_print_output(path: str, rows: int, columns: int = 3, curves: int = 1) -> int:
+    """
+    Записывает результаты в формате вывода команды print ngspice: заголовок схемы и анализа,
+    страницы по PAGE_ROWS строк с повторяющимся заголовком колонок после перевода страницы.
+
+    Returns:
+        int: Размер файла в байтах.
+    """
+    data = generate_frame(rows, columns, curves)
+    header = "".join(f"{name:<16}" for name in data.columns)
+    separator = "-" * max(80, len(header))
+    body = ["\t".join(f"{value:e}" for value in row[1:]) for row in data.itertuples(index=False)]
+
+    with open(path, "w") as file:
+        file.write(f"{'bench circuit':^80}\n{'DC transfer characteristic':^80}\n")
+        for start in range(0, len(body), PAGE_ROWS):
+            if start:
+                file.write("\f\n")
+            file.write(f"{separator}\n{header}\n{separator}\n")
+            file.writelines(f"{index}\t{line}\t\n" for index, line in
+                            enumerate(body[start:start + PAGE_ROWS], start=start))
+        file.write("\n")
+    return os.path.getsize(path)
+
+
+def generate_rawfile(path: str, rows: int, columns: int = 3, curves: int = 1) -> int:
+    """
+    Записывает результаты в бинарный rawfile ngspice.
+
+    Returns:
+        int: Размер файла в байтах.
+    """
+    from plotting.rawfile import write_rawfile
+
+    write_rawfile(generate_frame(rows, columns, curves), path, title="bench circuit", plotname="DC transfer characteristic")
+    return os.path.getsize(path)
+
+
+FAKE_NGSPICE = '''#!{python}
+"""
+Заменитель ngspice для бенчмарков (ngspice -b схема.sp).
+
+Ждёт {latency} с и записывает заранее сгенерированные результаты в файлы команд write (rawfile)
+и print (> файл, >> файл) схемы. Векторы rawfile умножаются на значение параметра {scale_parameter}
+из карточки .model, поэтому подбор параметров сходится к заданной цели.
+"""
+import re
+import sys
+import time
+import array
+import shutil
+
+LATENCY = {latency!r}
+PRINT_TEMPLATE = {print_template!r}
+RAW_TEMPLATE = {raw_template!r}
+SCALE_PATTERN = re.compile(r"^\\+?\\s*{scale_parameter}\\s*=\\s*(\\S+)", re.IGNORECASE | re.MULTILINE)
+
+
+def write_raw(path, scale):
+    if scale == 1.0:
+        shutil.copyfile(RAW_TEMPLATE, path)
+        return
+    with open(RAW_TEMPLATE, "rb") as file:
+        content = file.read()
+    header_end = content.index(b"Binary:\\n") + len(b"Binary:\\n")
+    variables = int(re.search(rb"No. Variables: (\\d+)", content[:header_end]).group(1))
+    values = array.array("d", content[header_end:])
+    for i in range(len(values)):
+        if i % variables:  # шкала (первая переменная каждой точки) не масштабируется
+            values[i] *= scale
+    with open(path, "wb") as file:
+        file.write(content[:header_end])
+        file.write(values.tobytes())
+
+
+def main(argv):
+    if "--version" in argv:
+        print("******\\n** ngspice-42 : benchmark stand-in\\n******")
+        return 0
+    with open(argv[-1]) as file:
+        netlist = file.read()
+    time.sleep(LATENCY)
+
+    match = SCALE_PATTERN.search(netlist)
+    scale = float(match.group(1)) if match else 1.0
+    for line in netlist.splitlines():
+        words = line.split()
+        if len(words) >= 2 and words[0].lower() == "write":
+            write_raw(words[1], scale)
+        elif words and words[0].lower() == "print" and ">" in line:
+            target = line.rsplit(">", 1)[1].strip()
+            with open(PRINT_TEMPLATE, "rb") as source, open(target, "ab" if ">>" in line else "wb") as result:
+                shutil.copyfileobj(source, result)
+    return 0
+
+
+sys.exit(main(sys.argv[1:]))
+'''
+
+FAKE_OPENVAF = '''#!{python}
+"""Заменитель openvaf для бенчмарков: ждёт {latency} с и записывает osdi-файл размером {osdi_size} байт."""
+import os
+import sys
+import time
+
+if "--version" in sys.argv:
+    print("openvaf 23.5.0 (benchmark stand-in)")
+    sys.exit(0)
+time.sleep({latency!r})
+source = sys.argv[-1]
+with open(os.path.splitext(os.path.basename(source))[0] + ".osdi", "wb") as file:
+    file.write(bytes({osdi_size}))
+'''
+
+
+def write_script(path: str, content: str):
+    with open(path, "w") as file:
+        file.write(content)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+def write_fake_ngspice(bin_dir: str, latency: float, print_template: str, raw_template: str) -> str:
+    """Создаёт bin_dir/ngspice; каталог добавляется в PATH процессов бенчмарка."""
+    os.makedirs(bin_dir, exist_ok=True)
+    path = os.path.join(bin_dir, "ngspice")
+    write_script(path, FAKE_NGSPICE.format(python=sys.executable, latency=latency, scale_parameter=SCALE_PARAMETER,
+                                           print_template=os.path.abspath(print_template),
+                                           raw_template=os.path.abspath(raw_template)))
+    return path
+
+
+def write_fake_openvaf(model_dir: str, latency: float, osdi_size: int = 1024 * 1024) -> str:
+    """Создаёт model_dir/openvaf (OSDIManager запускает ./openvaf из каталога модели)."""
+    path = os.path.join(model_dir, "openvaf")
+    write_script(path, FAKE_OPENVAF.format(python=sys.executable, latency=latency, osdi_size=osdi_size))
+    return path
@@ -0,0 +1,548 @@
+"""
+Бенчмарки разбора параметров, записи параметров, загрузки и построения результатов,
+сквозного запуска SimulationRunner, графа этапов (одновременные сборки и схемы), свипа, подбора параметров
+и суррогатной модели.
+
+Все входные данные синтетические (benchmarks/generators.py), openvaf и ngspice заменены
+скриптами с настраиваемой задержкой. Каждый бенчмарк выполняется в отдельном процессе
+с рабочим каталогом вместо каталогов data/ (osdi-модели, эталонные данные, кэши, свипы),
+поэтому пиковый RSS относится к одному бенчмарку, а данные проекта не изменяются.
+Результаты сохраняются в JSON и сравниваются с результатами другого коммита (--compare).
+
+Примеры:
+    python -m benchmarks -o bench/base.json
+    python -m benchmarks --only loader --only plotter --rows 500000
+    python -m benchmarks --only runner --runs 50 --latency 0.02 -o bench/new.json --compare bench/base.json
+    python -m benchmarks --only pipeline --variants 8 --netlists 8 --workers 4
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import resource
+import statistics
+import subprocess
+import multiprocessing
+import tempfile
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from benchmarks import generators
+
+
+# метрики, по которым сравниваются результаты: для времени лучше меньшее значение, для скорости — большее
+LOWER_IS_BETTER = ("_s", "_mb")
+HIGHER_IS_BETTER = ("_per_s",)
+REGRESSION_THRESHOLD = 0.10  # изменение больше 10% отмечается в сравнении
+
+
+def measure(function: Callable[[], object], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    """Время выполнения function (setup перед каждым повтором не замеряется): минимум, медиана, среднее."""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return {"min_s": min(timings), "median_s": statistics.median(timings), "mean_s": statistics.fmean(timings)}
+
+
+def peak_rss() -> Dict[str, float]:
+    """Пиковый RSS процесса бенчмарка и завершившихся дочерних процессов (ngspice, openvaf, воркеры свипа)."""
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss: байты на macOS, КиБ в Linux
+    return {
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit,
+        "children_peak_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit,
+    }
+
+
+class Workspace:
+    """
+    Рабочий каталог бенчмарков: синтетическая модель, схема, шаблоны результатов, заменители
+    openvaf и ngspice и каталоги, подставляемые вместо каталогов data/ проекта.
+    """
+    def __init__(self, root: str, options: dict) -> None:
+        self.root = root
+        self.options = options
+        self.model_dir = os.path.join(root, "model")
+        self.bin_dir = os.path.join(root, "bin")
+        self.va_file = os.path.join(self.model_dir, f"{generators.MODULE_NAME}.va")
+        self.parameters_file = os.path.join(self.model_dir, "parameters.inc")
+        self.spice_file = os.path.join(root, "circuit", "bench.sp")
+        self.print_template = os.path.join(root, "templates", "simulation.txt")
+        self.raw_template = os.path.join(root, "templates", "simulation.raw")
+
+    def path(self, *parts: str) -> str:
+        return os.path.join(self.root, *parts)
+
+    def create(self):
+        options = self.options
+        for directory in ("templates", "circuit", "osdilibs", "reference", "raw", "sweeps", "cache"):
+            os.makedirs(self.path(directory), exist_ok=True)
+        generators.generate_model(self.model_dir, options["parameters"])
+        generators.write_fake_openvaf(self.model_dir, options["compile_latency"])
+        generators.generate_netlist(self.spice_file, self.path("osdilibs", f"{generators.MODULE_NAME}.osdi"),
+                                    points=options["simulation_rows"])
+        # результаты одной симуляции, которые заменитель ngspice записывает при каждом запуске
+        generators.generate_print_output(self.print_template, options["simulation_rows"])
+        generators.generate_rawfile(self.raw_template, options["simulation_rows"])
+        generators.write_fake_ngspice(self.bin_dir, options["latency"], self.print_template, self.raw_template)
+
+    def activate(self):
+        """
+        Подставляет каталоги рабочего каталога вместо каталогов data/ в config и добавляет заменители
+        в PATH. Вызывается в процессе бенчмарка до импорта модулей core и plotting.
+        """
+        import config
+
+        config.OSDILIBS_PATH = self.path("osdilibs") + os.sep
+        config.REFERENCE_MODEL_CODE_PATH = self.path("reference") + os.sep
+        config.SIMULATION_RAW_DATA_PATH = self.path("raw") + os.sep
+        config.OSDI_CACHE_PATH = self.path("cache", "osdi") + os.sep
+        config.RESULT_CACHE_PATH = self.path("cache", "results") + os.sep
+        config.SWEEP_WORKSPACE_PATH = self.path("sweeps") + os.sep
+        config.SURROGATE_CACHE_PATH = self.path("cache", "surrogates") + os.sep
+        config.ORIGINAL_SOURCES_PATH = self.path("reference", "sources") + os.sep
+        os.environ["PATH"] = self.bin_dir + os.pathsep + os.environ.get("PATH", "")
+
+
+def bench_parameter_parser(workspace: Workspace, options: dict) -> dict:
+    """ParameterParser.parse: без кэша (исходники изменились) и с каталогом из кэша."""
+    from utils.parameter_parser import ParameterParser, FileIgnoreParamsLoader
+
+    parser = ParameterParser(workspace.parameters_file, FileIgnoreParamsLoader(None), model_file=workspace.va_file)
+    stamp = [time.time_ns()]
+
+    def touch():
+        # новое mtime исходников сбрасывает кэш лексем и каталог параметров
+        stamp[0] += 1_000_000
+        for path in (workspace.va_file, workspace.parameters_file):
+            os.utime(path, ns=(stamp[0], stamp[0]))
+
+    parameters = parser.parse()
+    return {
+        "parameters": len(parameters),
+        "file_bytes": os.path.getsize(workspace.parameters_file),
+        "cold": measure(parser.parse, options["repeat"], setup=touch),
+        "cached": measure(parser.parse, options["repeat"]),
+    }
+
+
+def bench_file_manager(workspace: Workspace, options: dict) -> dict:
+    """FileManager.apply_changes_to_file: изменение одного, сотни и всех параметров; запись без изменений."""
+    from core.file_manager import FileManager
+
+    manager = FileManager()
+    names = generators.parameter_names(options["parameters"])
+    target = workspace.path("parameters_copy.inc")
+    shutil.copyfile(workspace.parameters_file, target)
+
+    results = {"file_bytes": os.path.getsize(target)}
+    for label, count in (("one", 1), ("hundred", min(100, len(names))), ("all", len(names))):
+        toggle = [0]
+
+        def apply(selected=names[:count]):
+            toggle[0] += 1  # каждое применение меняет значения, поэтому файл перезаписывается
+            manager.apply_changes_to_file({name: f"{1.0 + toggle[0] * 1e-3:g}" for name in selected}, target)
+
+        results[label] = measure(apply, options["repeat"])
+
+    unchanged = {name: "1.0" for name in names[:100]}
+    manager.apply_changes_to_file(unchanged, target)
+    results["unchanged"] = measure(lambda: manager.apply_changes_to_file(unchanged, target), options["repeat"])
+    return results
+
+
+def bench_loader(workspace: Workspace, options: dict) -> dict:
+    """
+    Loader.load_data для многомегабайтного вывода print (страницы, несколько кривых) и rawfile.
+    Замер включает чтение всех значений: rawfile отображается в память и читается при обращении.
+    """
+    from plotting.plot_simulation import Loader
+
+    loader = Loader()
+    results = {}
+    for label, extension, generate in (("print", ".txt", generators.generate_print_output),
+                                       ("raw", ".raw", generators.generate_rawfile)):
+        path = workspace.path(f"loader{extension}")
+        size = generate(path, options["rows"], columns=options["columns"], curves=options["curves"])
+        rows = len(loader.load_data(path))
+        timing = measure(lambda: loader.load_data(path).to_numpy(dtype=float).sum(), options["repeat"])
+        results[label] = {"file_mb": size / 1024 / 1024, "rows": rows, **timing,
+                          "throughput_mb_per_s": size / 1024 / 1024 / timing["median_s"]}
+    return results
+
+
+def bench_plotter(workspace: Workspace, options: dict) -> dict:
+    """Plotter.plot большой таблицы и отрисовка холста (matplotlib, backend Agg)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from plotting.plot_simulation import Plotter
+
+    data = generators.generate_frame(options["rows"], columns=options["columns"], curves=options["curves"])
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    def plot():
+        ax.clear()
+        plotter = Plotter()
+        plotter.plot(data, ax, label="bench", color="tab:blue", linestyle="-")
+        return plotter
+
+    def plot_and_draw():
+        plot()
+        fig.canvas.draw()
+
+    results = {"rows": len(data), "plot": measure(plot, options["repeat"]),
+               "plot_and_draw": measure(plot_and_draw, options["repeat"])}
+    plt.close(fig)
+    return results
+
+
+def bench_runner(workspace: Workspace, options: dict) -> dict:
+    """
+    Сквозная пропускная способность SimulationRunner (сборка модели, эталон, пользовательская
+    симуляция, загрузка результатов): в режиме схемы каждый запуск меняет параметр в карточке .model,
+    в режиме перекомпиляции — записывает его в файл параметров и пересобирает модель.
+    """
+    from core.file_manager import FileManager
+    from core.result_cache import ResultCache
+    from core.simulation_runner import SimulationRunner
+    from core.backends import SubprocessBackend, result_file_extension
+
+    results = {}
+    output_format = options["format"]
+    for mode, runs in ((SimulationRunner.NETLIST_MODE, options["runs"]),
+                       (SimulationRunner.RECOMPILE_MODE, max(options["runs"] // 4, 1))):
+        result_file = workspace.path("raw", f"runner_{mode}{result_file_extension(output_format)}")
+        cache = ResultCache(workspace.path("cache", f"results_{mode}"), 256 * 1024 * 1024)
+        runner = SimulationRunner(workspace.parameters_file, None, result_file, parameter_mode=mode,
+                                  backend=SubprocessBackend(output_format=output_format), result_cache=cache)
+        runner.set_model(workspace.va_file)
+
+        timings = []
+        for run in range(runs):
+            value = f"{1.0 + (run + 1) * 1e-3:g}"  # новое значение: промах кэша результатов
+            started = time.perf_counter()
+            parameters = {generators.SCALE_PARAMETER: value}
+            if mode == SimulationRunner.RECOMPILE_MODE:
+                FileManager().apply_changes_to_file(parameters, workspace.parameters_file)
+            runner.build_model()
+            runner.simulate(workspace.spice_file, parameters)
+            timings.append(time.perf_counter() - started)
+
+        total = sum(timings)
+        results[mode] = {
+            "runs": runs,
+            "total_s": total,
+            "runs_per_s": runs / total,
+            "first_run_s": timings[0],
+            "median_run_s": statistics.median(timings),
+        }
+    results["ngspice_latency_s"] = options["latency"]
+    results["openvaf_latency_s"] = options["compile_latency"]
+    return results
+
+
+def bench_pipeline(workspace: Workspace, options: dict) -> dict:
+    """
+    Граф этапов (core/pipeline): одновременная сборка нескольких вариантов модели и симуляция
+    нескольких схем для одной собранной модели в сравнении с последовательным выполнением.
+    Ограничения PIPELINE_LIMITS задаются --workers (по умолчанию — по числу процессоров).
+    """
+    if options["workers"]:
+        import config
+        config.PIPELINE_LIMITS = {"openvaf": options["workers"], "ngspice": options["workers"]}
+
+    from core.osdi_manager import OSDIManager
+    from core.result_cache import ResultCache
+    from core.simulation_runner import SimulationRunner, compile_models
+    from core.backends import SubprocessBackend, result_file_extension
+
+    variants = []
+    for index in range(options["variants"]):
+        directory = workspace.path("variants", f"v{index}")
+        os.makedirs(directory, exist_ok=True)
+        for name in ("parameters.inc", "openvaf"):
+            shutil.copy2(os.path.join(workspace.model_dir, name), directory)
+        variants.append(os.path.join(directory, f"{generators.MODULE_NAME}{index}.va"))
+        shutil.copy2(workspace.va_file, variants[-1])
+
+    # разные defines — разные ключи osdi-кэша, поэтому оба прохода действительно компилируют
+    started = time.perf_counter()
+    for va_file in variants:
+        manager = OSDIManager(os.path.dirname(va_file), os.path.basename(va_file), defines={"BENCH_PASS": "sequential"})
+        manager.rebuild_osdi()
+        manager.move_osdi_file()
+    compile_sequential = time.perf_counter() - started
+    started = time.perf_counter()
+    compile_models(variants, defines=[{"BENCH_PASS": "pipeline"}] * len(variants))
+    compile_pipeline = time.perf_counter() - started
+
+    netlists = []
+    for index in range(options["netlists"]):
+        netlists.append(workspace.path("circuit", f"bench_{index}.sp"))
+        with open(workspace.spice_file) as source, open(netlists[-1], "w") as target:
+            # комментарий с номером схемы: разные тексты схем — разные ключи кэша результатов
+            target.write(source.read().replace("\n", f"\n* netlist {index}\n", 1))
+    runner = SimulationRunner(workspace.parameters_file, None,
+                              workspace.path("raw", "pipeline" + result_file_extension(options["format"])),
+                              parameter_mode=SimulationRunner.NETLIST_MODE,
+                              backend=SubprocessBackend(output_format=options["format"]),
+                              result_cache=ResultCache(workspace.path("cache", "results_pipeline"), 256 * 1024 * 1024))
+    runner.set_model(workspace.va_file)
+    runner.build_model()
+    runner.simulate_many(netlists)  # эталонные данные создаются один раз до замеров
+
+    started = time.perf_counter()
+    for index, spice_file in enumerate(netlists):
+        runner.simulate(spice_file, {generators.SCALE_PARAMETER: f"{1.0 + (index + 1) * 1e-3:g}"})
+    simulate_sequential = time.perf_counter() - started
+    started = time.perf_counter()
+    runner.simulate_many(netlists, {generators.SCALE_PARAMETER: "1.1"})
+    simulate_pipeline = time.perf_counter() - started
+
+    return {
+        "variants": len(variants),
+        "compile_sequential_s": compile_sequential,
+        "compile_pipeline_s": compile_pipeline,
+        "compile_speedup": compile_sequential / compile_pipeline,
+        "netlists": len(netlists),
+        "simulate_sequential_s": simulate_sequential,
+        "simulate_pipeline_s": simulate_pipeline,
+        "simulate_speedup": simulate_sequential / simulate_pipeline,
+    }
+
+
+def bench_sweep(workspace: Workspace, options: dict) -> dict:
+    """ParameterSweep в режиме схемы: точки свипа на пуле процессов."""
+    from core.sweep import ParameterSweep, build_sweep_points, linear_values
+
+    sweep = ParameterSweep(workspace.spice_file, workspace.va_file, workspace.parameters_file, mode="netlist",
+                           output_format=options["format"], max_workers=options["workers"])
+    points = build_sweep_points({generators.SCALE_PARAMETER: linear_values(0.5, 1.5, options["sweep_points"])})
+
+    started = time.perf_counter()
+    result = sweep.run(points)
+    elapsed = time.perf_counter() - started
+    return {"points": len(points), "workers": sweep.max_workers, "errors": len(result.errors),
+            "total_s": elapsed, "points_per_s": len(points) / elapsed}
+
+
+def bench_fit(workspace: Workspace, options: dict) -> dict:
+    """ParameterFitter: подбор параметра масштаба под цель, полученную с gain = 1.25."""
+    from core.fitting import ParameterFitter
+    from core.sweep import ParameterSweep
+    from plotting.plot_simulation import Loader
+
+    target = Loader().load_data(workspace.raw_template)
+    for column in target.columns[2:]:
+        target[column] = target[column] * 1.25
+
+    sweep = ParameterSweep(workspace.spice_file, workspace.va_file, workspace.parameters_file, mode="netlist",
+                           output_format="raw", max_workers=options["workers"])
+    fitter = ParameterFitter(sweep, target, {generators.SCALE_PARAMETER: 1.0}, bounds={generators.SCALE_PARAMETER: (0.1, 10.0)},
+                             max_iterations=options["fit_iterations"])
+    started = time.perf_counter()
+    result = fitter.fit()
+    elapsed = time.perf_counter() - started
+    return {
+        "total_s": elapsed,
+        "iterations": len(result.iterations),
+        "simulator_calls": result.simulator_calls,
+        "simulations_per_s": result.simulator_calls / elapsed,
+        "fitted_value": result.parameters[generators.SCALE_PARAMETER],
+        "success": result.success,
+    }
+
+
+def bench_surrogate(workspace: Workspace, options: dict) -> dict:
+    """SurrogateBuilder: выборка из sweep_points симуляций, повторная загрузка из кэша и время предсказания."""
+    from core.surrogate import SurrogateBuilder
+    from core.sweep import ParameterSweep
+    from utils.parameter_parser import ParameterParser, FileIgnoreParamsLoader
+
+    parameters = ParameterParser(workspace.parameters_file, FileIgnoreParamsLoader(None), model_file=workspace.va_file).parse()
+    sweep = ParameterSweep(workspace.spice_file, workspace.va_file, workspace.parameters_file, mode="netlist",
+                           output_format=options["format"], max_workers=options["workers"])
+
+    started = time.perf_counter()
+    surrogate = SurrogateBuilder(sweep, parameters, [generators.SCALE_PARAMETER], seed=0).build(options["sweep_points"])
+    build_time = time.perf_counter() - started
+    started = time.perf_counter()
+    SurrogateBuilder(sweep, parameters, [generators.SCALE_PARAMETER], seed=0).build(options["sweep_points"])
+    cached_time = time.perf_counter() - started
+
+    point = {generators.SCALE_PARAMETER: 1.25}
+    predict = measure(lambda: surrogate.predict(point), options["repeat"] * 200)
+    errors = surrogate.validation_error or {}
+    return {
+        "samples": len(surrogate.samples),
+        "build_s": build_time,
+        "cached_build_s": cached_time,
+        "predict": predict,
+        "predictions_per_s": 1.0 / predict["median_s"],
+        "max_validation_error": max(errors.values()) if errors else None,
+    }
+
+
+BENCHMARKS = {
+    "parameter_parser": bench_parameter_parser,
+    "file_manager": bench_file_manager,
+    "loader": bench_loader,
+    "plotter": bench_plotter,
+    "runner": bench_runner,
+    "pipeline": bench_pipeline,
+    "sweep": bench_sweep,
+    "fit": bench_fit,
+    "surrogate": bench_surrogate,
+}
+
+
+def run_benchmark(name: str, root: str, options: dict) -> dict:
+    """Выполняется в отдельном процессе: подключает рабочий каталог и запускает бенчмарк name."""
+    workspace = Workspace(root, options)
+    workspace.activate()
+    started = time.perf_counter()
+    result = BENCHMARKS[name](workspace, options)
+    return {**result, "elapsed_s": time.perf_counter() - started, **peak_rss()}
+
+
+def run_benchmarks(names: List[str], root: str, options: dict) -> Dict[str, dict]:
+    """Создаёт рабочий каталог и выполняет бенчмарки по одному в новом процессе (spawn)."""
+    Workspace(root, options).create()
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for name in names:
+        print(f"{name}...", end=" ", flush=True)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            try:
+                results[name] = executor.submit(run_benchmark, name, root, options).result()
+                print(f"{results[name]['elapsed_s']:.2f} с")
+            except Exception as e:
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+                print("ошибка:", e)
+    return results
+
+
+def git_revision() -> Dict[str, Optional[str]]:
+    project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=project_path, capture_output=True,
+                                text=True, timeout=10).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=project_path,
+                               capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit or None, "dirty": bool(dirty)}
+
+
+def flatten(results: dict, prefix: str = "") -> Dict[str, float]:
+    """Числовые метрики вложенного словаря результатов с ключами вида "loader.print.median_s"."""
+    values = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            values.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[name] = value
+    return values
+
+
+def compare(baseline: dict, current: dict) -> str:
+    """Таблица изменения метрик относительно baseline; ухудшения больше REGRESSION_THRESHOLD отмечаются."""
+    old, new = flatten(baseline["benchmarks"]), flatten(current["benchmarks"])
+    lines = [f"Сравнение с {baseline.get('commit') or '?'} ({baseline.get('created', '')})",
+             f"  {'Метрика':<44} {'Было':>12} {'Стало':>12} {'Изм.':>8}"]
+    changed = sorted(key for key in current["options"] if baseline.get("options", {}).get(key) != current["options"][key])
+    if changed:
+        lines.insert(1, "  Параметры запуска отличаются: " + ", ".join(
+            f"{key} {baseline.get('options', {}).get(key)} -> {current['options'][key]}" for key in changed))
+    for name in sorted(old.keys() & new.keys()):
+        metric = name.rsplit(".", 1)[-1]
+        higher_is_better = metric.endswith(HIGHER_IS_BETTER)
+        if not (higher_is_better or metric.endswith(LOWER_IS_BETTER)) or old[name] == 0:
+            continue
+        change = new[name] / old[name] - 1.0
+        worse = -change if higher_is_better else change
+        mark = "  хуже" if worse > REGRESSION_THRESHOLD else ("  лучше" if worse < -REGRESSION_THRESHOLD else "")
+        lines.append(f"  {name:<44} {old[name]:>12.4g} {new[name]:>12.4g} {change:>+8.1%}{mark}")
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Бенчмарки разбора и записи параметров, загрузки и построения результатов, "
+                    "сквозной симуляции, свипа, подбора параметров и суррогатной модели с заменителями openvaf и ngspice.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--only", action="append", choices=list(BENCHMARKS), metavar="NAME",
+                        help=f"выполнить только указанные бенчмарки ({', '.join(BENCHMARKS)})")
+    parser.add_argument("-o", "--output", metavar="FILE", help="файл JSON для результатов")
+    parser.add_argument("--compare", metavar="FILE", help="сравнить с результатами другого запуска (JSON)")
+    parser.add_argument("--workdir", metavar="DIR", help="рабочий каталог (по умолчанию временный, удаляется)")
+    parser.add_argument("--repeat", type=int, default=5, help="повторов каждого замера (по умолчанию 5)")
+    parser.add_argument("--parameters", type=int, default=5000, help="объявлений в parameters.inc (по умолчанию 5000)")
+    parser.add_argument("--rows", type=int, default=200000, help="строк в результатах для loader и plotter")
+    parser.add_argument("--columns", type=int, default=3, help="векторов в результатах для loader и plotter")
+    parser.add_argument("--curves", type=int, default=10, help="кривых семейства в результатах для loader и plotter")
+    parser.add_argument("--simulation-rows", type=int, default=121, help="строк результата одного запуска ngspice")
+    parser.add_argument("--format", choices=("raw", "print"), default="raw", help="формат результатов ngspice")
+    parser.add_argument("--runs", type=int, default=20, help="запусков SimulationRunner в режиме схемы")
+    parser.add_argument("--latency", type=float, default=0.05, help="задержка заменителя ngspice, с")
+    parser.add_argument("--compile-latency", type=float, default=0.2, help="задержка заменителя openvaf, с")
+    parser.add_argument("--variants", type=int, default=4, help="вариантов модели, собираемых одновременно")
+    parser.add_argument("--netlists", type=int, default=4, help="схем, симулируемых одновременно для одной модели")
+    parser.add_argument("--sweep-points", type=int, default=32, help="точек свипа (и симуляций суррогатной модели)")
+    parser.add_argument("--workers", type=int, default=None, help="процессов для свипа и подбора (и ограничение PIPELINE_LIMITS для pipeline)")
+    parser.add_argument("--fit-iterations", type=int, default=5, help="максимум итераций подбора")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if not sys.platform.startswith("linux"):
+        print("Заменители openvaf и ngspice рассчитаны на Linux.", file=sys.stderr)
+
+    options = {key: getattr(args, key) for key in (
+        "repeat", "parameters", "rows", "columns", "curves", "simulation_rows", "format", "runs",
+        "latency", "compile_latency", "variants", "netlists", "sweep_points", "workers", "fit_iterations")}
+    names = args.only or list(BENCHMARKS)
+
+    root = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="extract_parameters_bench_")
+    try:
+        results = run_benchmarks(names, root, options)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    report = {
+        **git_revision(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "options": options,
+        "benchmarks": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+        print(f"Результаты сохранены в {args.output}")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as file:
+            print(compare(json.load(file), report))
+    return 1 if any("error" in result for result in results.values()) else 0
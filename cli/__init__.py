@@ -0,0 +1,6 @@
+from cli.batch import main
+
+
+__all__ = [
+    "main",
+]
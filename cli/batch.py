@@ -0,0 +1,370 @@
+"""
+Пакетный запуск симуляций без графического интерфейса.
+
+Модули GTK и matplotlib не импортируются; matplotlib (backend Agg) загружается
+только при запросе изображений (--plot).
+
+Примеры:
+    python -m cli --list
+    python -m cli BJT505 -p nff=1.02 -p ik=0.12
+    python -m cli BJT505 --sweep "nff=1:1.2:5; vef=40,44" --workers 8 -o results/nff
+    python -m cli --model path/model.va --spice path/circuit.sp --parameters path/parameters.inc --plot
+    python -m cli BJT505 --spice a.sp --spice b.sp      # несколько схем для одной собранной модели
+    python -m cli BJT505 -p nff=1.02 --profile --trace trace.json   # trace.json открывается в chrome://tracing
+    python -m cli BJT505 --surrogate nff,ik --samples 64   # суррогатная модель и её ошибка проверки
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from utils.tracing import span, tracer
+from config import CONFIG_OPTIONS, DIRECTORY, OUTPUT_DATA_PATH, SIMULATION_BACKEND, NGSPICE_LIBRARY_PATH, \
+    SIMULATION_OUTPUT_FORMAT, SURROGATE_SAMPLES
+
+
+def parse_overrides(items: List[str]) -> Dict[str, str]:
+    """Разбирает переопределения параметров вида NAME=VALUE."""
+    overrides = {}
+    for item in items:
+        name, separator, value = item.partition("=")
+        if not separator or not name.strip() or not value.strip():
+            raise ValueError(f"Неверное переопределение параметра: {item} (ожидается NAME=VALUE)")
+        overrides[name.strip()] = value.strip()
+    return overrides
+
+
+def resolve_paths(args) -> Dict[str, str]:
+    """Пути к модели, схеме и файлу параметров: из конфигурации CONFIG_OPTIONS, уточнённые явными путями."""
+    paths = {}
+    if args.config:
+        config_name = next((name for name in CONFIG_OPTIONS if name.lower() == args.config.lower()), None)
+        if config_name is None:
+            raise ValueError(f"Неизвестная конфигурация {args.config}. Доступны: {', '.join(CONFIG_OPTIONS)}")
+        paths = {key: os.path.abspath(value) for key, value in CONFIG_OPTIONS[config_name].items()}
+
+    for key in ("model", "parameters"):
+        if getattr(args, key):
+            paths[key] = os.path.abspath(getattr(args, key))
+    if args.spice:
+        paths["spice"] = os.path.abspath(args.spice[0])
+    paths.setdefault("parameters", paths.get("model"))
+
+    missing = [key for key in ("model", "spice") if not paths.get(key)]
+    if missing:
+        raise ValueError("Не заданы пути: " + ", ".join(missing) + ". Укажите конфигурацию или --model/--spice.")
+    for key, path in [*paths.items(), *(("spice", path) for path in (args.spice or [])[1:])]:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Файл не найден ({key}): {path}")
+    return paths
+
+
+def check_parameter_names(model_file: str, names) -> List[str]:
+    """Возвращает имена параметров (и псевдонимов aliasparam), которых нет в каталоге параметров модели."""
+    from utils.va_preprocessor import load_parameter_catalog
+
+    catalog = load_parameter_catalog(model_file)
+    return [name for name in names if catalog.get(name) is None]
+
+
+def check_parameter_ranges(model_file: str, values: Dict[str, object]):
+    """Отклоняет значения вне допустимых диапазонов модели до компиляции и симуляции."""
+    from utils.spice_values import find_range_violations
+    from utils.va_preprocessor import load_parameter_catalog
+
+    violations = find_range_violations(load_parameter_catalog(model_file), values)
+    if violations:
+        raise ValueError("недопустимые значения параметров:\n  " + "\n  ".join(violations))
+
+
+def create_backend(args):
+    from core.backends import create_backend as create
+
+    if args.backend == "shared":
+        try:
+            return create("shared", library_path=NGSPICE_LIBRARY_PATH, output_format=args.format)
+        except (FileNotFoundError, OSError) as e:
+            print("libngspice недоступна, используется запуск ngspice -b:", e, file=sys.stderr)
+    return create("subprocess", output_format=args.format)
+
+
+def render_images(output_dir: str, frames, labels, reference=None) -> str:
+    """Сохраняет график результатов в PNG (matplotlib импортируется только здесь)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from plotting.plot_simulation import SimulationManager
+
+    fig, _ = plt.subplots(figsize=(10, 6))
+    manager = SimulationManager()
+    if reference is not None:
+        manager.run(fig, fig.canvas, user_filename="", reference_filename="",
+                    user_data=frames[0], reference_data=reference)
+    else:
+        manager.run_sweep(fig, fig.canvas, frames, labels)
+
+    image_file = os.path.join(output_dir, "plot.png")
+    fig.savefig(image_file)
+    plt.close(fig)
+    return image_file
+
+
+def spice_files(args, paths: Dict[str, str]) -> List[str]:
+    """Схемы запуска: первая --spice (или схема конфигурации) и остальные --spice в порядке указания."""
+    return [paths["spice"]] + [os.path.abspath(path) for path in (args.spice or [])[1:]]
+
+
+def run_single(args, paths: Dict[str, str], overrides: Dict[str, str], output_dir: str) -> dict:
+    """
+    Симуляция с переопределёнными параметрами и эталонная симуляция. Несколько схем (--spice несколько раз)
+    симулируются одновременно для одной собранной модели; файлы результатов получают имя схемы.
+    """
+    from core.file_manager import FileManager
+    from core.simulation_runner import SimulationRunner
+    from core.sweep import prepare_model_workspace
+    from core.backends import result_file_extension
+    from plotting.plot_simulation import Loader
+
+    mode = SimulationRunner.NETLIST_MODE if args.mode == "netlist" else SimulationRunner.RECOMPILE_MODE
+    started = time.perf_counter()
+    backend = create_backend(args)
+    user_result_file = os.path.join(output_dir, "batch_data" + result_file_extension(args.format))
+    runner = SimulationRunner(paths["parameters"], None, user_result_file, parameter_mode=mode, backend=backend)
+    netlists = spice_files(args, paths)
+    workspace = None
+    try:
+        if mode == SimulationRunner.RECOMPILE_MODE and overrides:
+            # как кнопка «Применить изменения», но значения записываются в копию исходников модели:
+            # файлы модели не меняются, эталон строится по исходному каталогу модели
+            workspace = tempfile.mkdtemp(prefix="batch_")
+            va_copy = prepare_model_workspace(paths["model"], workspace)
+            model_dir = os.path.dirname(paths["model"])
+            parameters_copy = os.path.join(workspace, os.path.relpath(paths["parameters"], model_dir))
+            FileManager().apply_changes_to_file(overrides, parameters_copy)
+            runner.set_model(va_copy, reference_model_path=model_dir)
+        else:
+            runner.set_model(paths["model"])
+        results = runner.simulate_many(netlists, overrides or None, build_model=True)
+    finally:
+        backend.close()
+        if workspace:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    files, frames = [], []
+    for spice_file, (user_data, reference_data, reference_file) in zip(netlists, results):
+        if reference_data is None:
+            with span("Загрузка эталонных данных"):
+                reference_data = Loader().load_data(reference_file)
+        suffix = "" if len(netlists) == 1 else "_" + os.path.splitext(os.path.basename(spice_file))[0]
+        with span("Запись CSV"):
+            user_data.to_csv(os.path.join(output_dir, f"simulation{suffix}.csv"), index=False)
+            reference_data.to_csv(os.path.join(output_dir, f"reference{suffix}.csv"), index=False)
+        files += [f"simulation{suffix}.csv", f"reference{suffix}.csv"]
+        frames.append((user_data, reference_data))
+    elapsed = time.perf_counter() - started
+
+    summary = {
+        "parameters": overrides,
+        "osdi_cache": runner.osdi_cache_status,
+        "result_cache": runner.result_cache_status,
+        "reference": runner.reference_status,
+        "time": round(elapsed, 3),
+        "files": files,
+    }
+    if args.plot:
+        user_data, reference_data = frames[0]  # график строится для первой схемы
+        with span("Построение графика"):
+            image_file = render_images(output_dir, [user_data], ["simulation"], reference_data)
+        summary["files"].append(os.path.basename(image_file))
+    return summary
+
+
+def run_sweep(args, paths: Dict[str, str], overrides: Dict[str, str], output_dir: str) -> dict:
+    """Параллельный свип: по CSV на точку и таблица точек sweep_points.csv."""
+    import csv
+    from core.sweep import ParameterSweep, build_sweep_points, parse_sweep_spec, format_value
+
+    values = parse_sweep_spec(args.sweep)
+    check_parameter_ranges(paths["model"], values)
+    points = build_sweep_points(values, grid=not args.joint)
+    points = [{**overrides, **point} for point in points]
+    sweep = ParameterSweep(paths["spice"], paths["model"], parameters_file=paths["parameters"], mode=args.mode,
+                           output_format=args.format, max_workers=args.workers)
+
+    def progress(done, total):
+        print(f"\r{done}/{total}", end="", file=sys.stderr, flush=True)
+
+    started = time.perf_counter()
+    with span("Свип", points=len(points), workers=args.workers or "auto") as current:
+        result = sweep.run(points, progress_callback=progress)
+        current.set(failed=len(result.errors))
+    elapsed = time.perf_counter() - started
+    print(file=sys.stderr)
+
+    names = list(points[0]) if points else []
+    with span("Запись CSV"), open(os.path.join(output_dir, "sweep_points.csv"), "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["point", *names, "file", "error"])
+        for index, point in enumerate(points):
+            frame = result.frames[index]
+            file_name = f"sweep_{index:04d}.csv" if frame is not None else ""
+            if frame is not None:
+                frame.to_csv(os.path.join(output_dir, file_name), index=False)
+            writer.writerow([index, *(format_value(point[name]) for name in names), file_name,
+                             result.errors.get(index, "")])
+
+    summary = {
+        "points": len(points),
+        "failed": len(result.errors),
+        "time": round(elapsed, 3),
+        "files": ["sweep_points.csv"],
+    }
+    if args.plot:
+        labels = [", ".join(f"{name}={format_value(value)}" for name, value in point.items()) for point in points]
+        with span("Построение графика"):
+            image_file = render_images(output_dir, result.frames, labels)
+        summary["files"].append(os.path.basename(image_file))
+    return summary
+
+
+def run_surrogate(args, paths: Dict[str, str], overrides: Dict[str, str], output_dir: str) -> dict:
+    """
+    Суррогатная модель параметров --surrogate: выборка из --samples симуляций (из кэша, если она уже
+    строилась), ошибка проверки по колонкам и время предсказания; кривая в точке значений по умолчанию
+    (или -p для параметров модели) — в surrogate.csv.
+    """
+    from core.sweep import ParameterSweep
+    from core.surrogate import SurrogateBuilder
+    from utils.parameter_parser import ParameterParser, FileIgnoreParamsLoader
+    from utils.spice_values import parse_spice_number
+
+    names = [name.strip() for name in args.surrogate.split(",") if name.strip()]
+    unknown = check_parameter_names(paths["model"], names)
+    if unknown:
+        raise ValueError("параметры не найдены в модели: " + ", ".join(unknown))
+    parameters = ParameterParser(paths["parameters"], FileIgnoreParamsLoader(None), model_file=paths["model"]).parse()
+    sweep = ParameterSweep(paths["spice"], paths["model"], parameters_file=paths["parameters"], mode="netlist",
+                           output_format=args.format, max_workers=args.workers)
+    builder = SurrogateBuilder(sweep, parameters, names, base=overrides)
+
+    def progress(done, total):
+        print(f"\r{done}/{total}", end="", file=sys.stderr, flush=True)
+
+    started = time.perf_counter()
+    with span("Суррогатная модель", parameters=len(names)) as current:
+        surrogate = builder.build(args.samples, progress_callback=progress)
+        current.set(samples=len(surrogate.samples), simulations=builder.simulator_calls)
+    elapsed = time.perf_counter() - started
+    print(file=sys.stderr)
+    print(surrogate.report(), file=sys.stderr)
+
+    described = {parameter["name"]: parameter for parameter in parameters}
+    point = {name: parse_spice_number(overrides.get(name, described[name]["default_value"])) for name in names}
+    repeat = 1000
+    predict_started = time.perf_counter()
+    for _ in range(repeat):
+        frame = surrogate.predict_frame(point)
+    predict_time = (time.perf_counter() - predict_started) / repeat
+    frame.to_csv(os.path.join(output_dir, "surrogate.csv"), index=False)
+
+    return {
+        "parameters": {name: list(surrogate.ranges[name].as_tuple()) for name in names},
+        "samples": len(surrogate.samples),
+        "simulations": builder.simulator_calls,
+        "validation_error": surrogate.validation_error,
+        "predict_time_us": round(predict_time * 1e6, 2),
+        "time": round(elapsed, 3),
+        "files": ["surrogate.csv"],
+    }
+
+
+def report_trace(args, trace):
+    """Сохраняет трассу (--trace) и выводит таблицу этапов (--profile)."""
+    if args.trace:
+        trace.save_chrome_trace(args.trace)
+        print(f"Трасса сохранена в {args.trace}", file=sys.stderr)
+    if args.profile:
+        print(trace.format_summary(), file=sys.stderr)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Пакетный запуск симуляций ngspice без GUI.")
+    parser.add_argument("config", nargs="?", help="Имя конфигурации из CONFIG_OPTIONS (" + ", ".join(CONFIG_OPTIONS) + ")")
+    parser.add_argument("--model", help="Путь к .va файлу модели")
+    parser.add_argument("--spice", action="append",
+                        help="Путь к .sp схеме (можно указать несколько раз: схемы симулируются одновременно)")
+    parser.add_argument("--parameters", help="Путь к файлу параметров (по умолчанию — .va файл модели)")
+    parser.add_argument("-p", "--set", dest="overrides", action="append", default=[], metavar="NAME=VALUE",
+                        help="Переопределение параметра (можно указать несколько раз)")
+    parser.add_argument("--sweep", help='Описание свипа, например "nff=1:1.2:5; ik=log:1e-3:0.1:3; vef=40,44,50"')
+    parser.add_argument("--joint", action="store_true", help="Менять параметры свипа совместно, а не по сетке")
+    parser.add_argument("--mode", choices=("netlist", "recompile"), default="netlist",
+                        help="netlist — параметры в карточке .model (по умолчанию), recompile — запись в копию исходников и пересборка")
+    parser.add_argument("--backend", choices=("subprocess", "shared"), default=SIMULATION_BACKEND)
+    parser.add_argument("--format", choices=("raw", "print"), default=SIMULATION_OUTPUT_FORMAT,
+                        help="Формат файла результатов ngspice")
+    parser.add_argument("--workers", type=int, default=None, help="Число процессов для свипа")
+    parser.add_argument("--surrogate", metavar="NAMES",
+                        help="Построить суррогатную модель параметров (через запятую), например nff,ik")
+    parser.add_argument("--samples", type=int, default=SURROGATE_SAMPLES,
+                        help=f"Симуляций для суррогатной модели (по умолчанию {SURROGATE_SAMPLES}; "
+                             "больше, чем в кэше, — выборка уточняется)")
+    parser.add_argument("-o", "--output", help="Каталог результатов (по умолчанию — каталог с отметкой времени в OUTPUT_DATA_PATH)")
+    parser.add_argument("--plot", action="store_true", help="Сохранить график в plot.png (требуется matplotlib)")
+    parser.add_argument("--trace", metavar="FILE", help="Сохранить трассу этапов в формате Chrome trace_event (JSON)")
+    parser.add_argument("--profile", action="store_true", help="Вывести таблицу длительности этапов")
+    parser.add_argument("--list", action="store_true", help="Показать доступные конфигурации")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, options in CONFIG_OPTIONS.items():
+            print(f"{name}: model={options['model']} spice={options['spice']}")
+        return 0
+
+    try:
+        paths = resolve_paths(args)
+        overrides = parse_overrides(args.overrides)
+        unknown = check_parameter_names(paths["model"], overrides)
+        if unknown:
+            print("Предупреждение: параметры не найдены в модели: " + ", ".join(unknown), file=sys.stderr)
+        check_parameter_ranges(paths["model"], overrides)
+
+        output_dir = args.output or os.path.join(OUTPUT_DATA_PATH, datetime.now().strftime("batch_%Y%m%d_%H%M%S"))
+        for directory in DIRECTORY + [output_dir]:
+            os.makedirs(directory, exist_ok=True)
+
+        trace = tracer.start("python -m cli " + (f"--sweep {args.sweep}" if args.sweep else
+                                                 f"--surrogate {args.surrogate}" if args.surrogate else
+                                                 os.path.basename(paths["model"])))
+        try:
+            if args.sweep:
+                summary = run_sweep(args, paths, overrides, output_dir)
+            elif args.surrogate:
+                summary = run_surrogate(args, paths, overrides, output_dir)
+            else:
+                summary = run_single(args, paths, overrides, output_dir)
+        finally:
+            tracer.finish()
+            report_trace(args, trace)
+    except Exception as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+
+    netlists = spice_files(args, paths)
+    summary.update({"model": paths["model"], "spice": netlists[0] if len(netlists) == 1 else netlists, "mode": args.mode})
+    with open(os.path.join(output_dir, "summary.json"), "w") as file:
+        json.dump(summary, file, indent=2, ensure_ascii=False)
+    print(f"Результаты сохранены в {output_dir}")
+    return 0
@@ -22,11 +22,51 @@ REFERENCE_MODEL_CODE_PATH = os.path.join(PROJECT_PATH, "data/reference/")
 # print(REFERENCE_MODEL_CODE_PATH)
 OUTPUT_DATA_PATH = os.path.join(os.path.expanduser("~"), "Documents", "SimulationResults")
 # print(OUTPUT_DATA_PATH)
-DIRECTORY = [REFERENCE_MODEL_CODE_PATH, SIMULATION_RAW_DATA_PATH, OUTPUT_DATA_PATH, PICS_PATH]
+OSDI_CACHE_PATH = os.path.join(PROJECT_PATH, "data/cache/osdi/")  # кэш скомпилированных osdi-моделей
+# print(OSDI_CACHE_PATH)
+SWEEP_WORKSPACE_PATH = os.path.join(PROJECT_PATH, "data/sweeps/")  # рабочие каталоги точек свипа
+# print(SWEEP_WORKSPACE_PATH)
+RESULT_CACHE_PATH = os.path.join(PROJECT_PATH, "data/cache/results/")  # кэш результатов симуляций
+# print(RESULT_CACHE_PATH)
+SURROGATE_CACHE_PATH = os.path.join(PROJECT_PATH, "data/cache/surrogates/")  # выборки суррогатных моделей
+ORIGINAL_SOURCES_PATH = os.path.join(PROJECT_PATH, "data/reference/sources/")  # исходные версии файлов модели до изменений из GUI
+DIRECTORY = [REFERENCE_MODEL_CODE_PATH, SIMULATION_RAW_DATA_PATH, OUTPUT_DATA_PATH, PICS_PATH, OSDI_CACHE_PATH,
+             SWEEP_WORKSPACE_PATH, RESULT_CACHE_PATH, SURROGATE_CACHE_PATH, ORIGINAL_SOURCES_PATH]
 # print(DIRECTORY)
 
 INITIAL_LOG_SCALE = False  # Логарифмическая шкала выключена при запуске
 INITIAL_GRID = True        # Сетка включена при запуске
+INITIAL_RECOMPILE_FREE = False  # Режим без перекомпиляции (параметры в карточке .model) выключен при запуске
+SCROLL_REDRAW_INTERVAL = 30     # Минимальный интервал между перерисовками при масштабировании колесом (мс)
+INITIAL_AUTO_RUN = False        # Автозапуск симуляции при изменении параметров выключен при запуске
+AUTO_RUN_DELAY = 300            # Пауза после последнего изменения параметра до автозапуска (мс)
+
+OSDI_CACHE_MAX_SIZE = 512 * 1024 * 1024  # Максимальный размер кэша osdi-моделей (байт)
+RESULT_CACHE_ENABLED = True                # Повторные симуляции с теми же моделью, схемой и параметрами берутся из кэша
+RESULT_CACHE_MAX_SIZE = 256 * 1024 * 1024  # Максимальный размер кэша результатов симуляций (байт)
+SURROGATE_CACHE_MAX_SIZE = 64 * 1024 * 1024  # Максимальный размер кэша выборок суррогатных моделей (байт)
+
+SURROGATE_SAMPLES = 48              # Симуляций (точек латинского гиперкуба) для построения суррогатной модели
+SURROGATE_REFINE_SAMPLES = 16       # Симуляций, добавляемых при уточнении суррогатной модели
+SURROGATE_VALIDATION_FRACTION = 0.2  # Доля точек выборки, отложенных для оценки ошибки суррогатной модели
+SURROGATE_VARIANCE = 0.99999        # Доля дисперсии кривых, сохраняемая главными компонентами
+SURROGATE_MAX_COMPONENTS = 16       # Максимум главных компонент на колонку результатов
+SURROGATE_SPAN = 10.0               # Выборка от значения/SPAN до значения*SPAN (в пределах допустимого интервала)
+
+SIMULATION_BACKEND = "subprocess"  # "subprocess" — ngspice -b отдельным процессом, "shared" — libngspice через ctypes
+NGSPICE_LIBRARY_PATH = None        # путь к libngspice для backend "shared" (None — поиск в системе)
+SIMULATION_OUTPUT_FORMAT = "raw"   # "raw" — бинарный rawfile (write), "print" — текстовая таблица (print)
+
+MAX_SIMULATION_JOBS = 2  # Потоков очереди заданий (задания одной модели всё равно выполняются по очереди)
+STAGE_TIMEOUTS = {       # Максимальное время этапа (с); процессы этапа, не завершившегося вовремя, останавливаются
+    "openvaf": 600,
+    "ngspice": 1800,
+}
+PIPELINE_LIMITS = {     # Одновременно работающих процессов каждого этапа в графе запуска (core/pipeline.py)
+    "openvaf": max((os.cpu_count() or 2) // 2, 1),
+    "ngspice": os.cpu_count() or 2,
+}
+PROGRESS_REPORT_INTERVAL = 0.1  # Минимальный интервал между обновлениями прогресса по выводу ngspice (с)
 
 
 CONFIG_OPTIONS = {
@@ -1,10 +1,24 @@
-from .osdi_manager import OSDIManager
-from .file_manager import FileManager
-from .simulation_runner import SimulationRunner
+import importlib
+
+
+# модули загружаются при первом обращении: импорт пакета core не тянет pandas и ngspice-backend
+_EXPORTS = {
+    "OSDIManager": "core.osdi_manager",
+    "OSDICache": "core.osdi_cache",
+    "FileManager": "core.file_manager",
+    "SimulationRunner": "core.simulation_runner",
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = [
     "OSDIManager",
+    "OSDICache",
     "FileManager",
     "SimulationRunner",
-]
\ No newline at end of file
+]
@@ -0,0 +1,401 @@
+import os
+import shutil
+import ctypes
+import ctypes.util
+import threading
+import subprocess
+
+import numpy as np
+import pandas as pd
+
+from typing import Dict, List, Optional, Protocol
+
+from core.jobs import run_process, progress_reporter
+from core.progress import OutputParser, netlist_analyses
+from core.netlist import result_file_extension, write_scratch_netlist, split_control_block, select_model_card, PRINT_REDIRECT_PATTERN
+from plotting.plot_simulation import Loader
+from plotting.rawfile import write_rawfile
+from utils.tracing import span
+
+
+ANALYSIS_COMMANDS = ("dc", "tran", "ac", "op", "noise", "sp", "pz", "disto", "sens", "tf", "run")
+SKIPPED_COMMANDS = ("print", "write", "wrdata", "plot", "quit", "exit", "echo", "shell", "destroy", "cd", "asciiplot")
+SCALE_NAMES = ("v-sweep", "i-sweep", "r-sweep", "temp-sweep", "time", "frequency")
+
+_ngspice_versions: Dict[tuple, str] = {}  # версия ngspice по (путь, mtime, размер)
+
+
+class SimulationBackend(Protocol):
+    name: str  # имя для create_backend: "subprocess" или "shared"
+    output_format: str  # "raw" — бинарный rawfile (write), "print" — текстовая таблица (print)
+    writes_result_file: bool  # False — результаты возвращаются только таблицей, result_file не создаётся
+
+    def run(self, spice_file: str, result_file: str, parameters: Optional[Dict[str, str]] = None,
+            model_types: Optional[List[str]] = None) -> pd.DataFrame:
+        pass
+
+    def close(self):
+        pass
+
+    def version(self) -> str:
+        pass
+
+
+def file_fingerprint(path: Optional[str]) -> tuple:
+    """Отпечаток файла (абсолютный путь, mtime, размер); для отсутствующего файла — (path, None, None)."""
+    try:
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+    except (OSError, TypeError):
+        return path, None, None
+
+
+def write_print_table(data: pd.DataFrame, result_file: str):
+    """Записывает таблицу результатов в формате вывода команды print ngspice (Index, шкала, векторы)."""
+    header = "".join(f"{name:<16}" for name in data.columns)
+    separator = "-" * max(80, len(header))
+    np.savetxt(
+        result_file,
+        data.to_numpy(dtype=float),
+        fmt=["%d"] + ["%e"] * (len(data.columns) - 1),
+        delimiter="\t",
+        header=f"{separator}\n{header}\n{separator}",
+        comments="",
+    )
+
+
+def write_result_file(data: pd.DataFrame, result_file: str, output_format: str):
+    """Записывает таблицу результатов в файл в формате output_format ("raw" или "print")."""
+    if output_format == "raw":
+        write_rawfile(data, result_file, plotname=data.columns[1])
+    else:
+        write_print_table(data, result_file)
+
+
+class SubprocessBackend:
+    """
+    Запуск ngspice отдельным процессом в пакетном режиме (ngspice -b).
+
+    Симуляция выполняется на временной копии схемы: значения параметров записываются в карточку .model,
+    а вывод команды print перенаправляется в result_file (в формате "raw" — заменяется командой write
+    в бинарный rawfile). Исходная схема не изменяется.
+    """
+    name = "subprocess"
+    writes_result_file = True
+
+    def __init__(self, executable: str = "ngspice", output_format: str = "raw") -> None:
+        self.executable = executable
+        self.output_format = output_format
+        self.data_loader = Loader()
+
+    def run(self, spice_file: str, result_file: str, parameters: Optional[Dict[str, str]] = None,
+            model_types: Optional[List[str]] = None) -> pd.DataFrame:
+        with span("Запись схемы", parameters=len(parameters or {})):
+            scratch_file = write_scratch_netlist(spice_file, model_types or [], parameters or {},
+                                                 result_file=result_file, output_format=self.output_format)
+        try:
+            if os.path.exists(result_file):
+                with open(result_file, "w"):
+                    pass
+
+            with open(scratch_file, "r") as file:
+                parser = OutputParser(netlist_analyses(file.readlines()))
+            with span("ngspice", netlist=os.path.basename(spice_file)) as current:
+                process = run_process([self.executable, "-b", scratch_file], stage="ngspice",
+                                      cwd=os.path.dirname(os.path.abspath(spice_file)), output_parser=parser)
+                current.set(returncode=process.returncode)
+
+            if process.returncode != 0:
+                raise RuntimeError(f"Ошибка симуляции:\n{process.stderr.decode('utf-8', errors='replace')}")
+        finally:
+            if os.path.exists(scratch_file):
+                os.remove(scratch_file)
+
+        if not os.path.exists(result_file) or os.path.getsize(result_file) == 0:
+            raise RuntimeError(
+                "Simulation is complete, but the data file is missing or empty. "
+                "Check the selected SP file and the model of the selected transistor."
+            )
+        with span("Загрузка результатов", format=self.output_format, bytes=os.path.getsize(result_file)) as current:
+            data = self.data_loader.load_data(result_file)
+            current.set(rows=len(data), columns=len(data.columns))
+        return data
+
+    def version(self) -> str:
+        """Строка версии ngspice (ngspice --version); кэшируется на время работы процесса."""
+        fingerprint = file_fingerprint(shutil.which(self.executable))
+        if fingerprint not in _ngspice_versions:
+            try:
+                result = subprocess.run([self.executable, "--version"], capture_output=True, timeout=10)
+                lines = result.stdout.decode("utf-8", errors="replace").split("\n")
+                version = next((line.strip("* ").strip() for line in lines if "ngspice" in line.lower()), "")
+            except (OSError, subprocess.SubprocessError):
+                version = ""
+            _ngspice_versions[fingerprint] = version or f"unknown:{fingerprint[1]}:{fingerprint[2]}"
+        return _ngspice_versions[fingerprint]
+
+    def close(self):
+        pass
+
+
+class VectorInfo(ctypes.Structure):
+    _fields_ = [
+        ("v_name", ctypes.c_char_p),
+        ("v_type", ctypes.c_int),
+        ("v_flags", ctypes.c_short),
+        ("v_realdata", ctypes.POINTER(ctypes.c_double)),
+        ("v_compdata", ctypes.POINTER(ctypes.c_double)),  # ngcomplex_t — пара double (re, im)
+        ("v_length", ctypes.c_int),
+    ]
+
+
+SendChar = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_void_p)
+SendStat = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_void_p)
+ControlledExit = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_int, ctypes.c_bool, ctypes.c_bool, ctypes.c_int, ctypes.c_void_p)
+SendData = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_void_p)
+SendInitData = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p)
+BGThreadRunning = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_bool, ctypes.c_int, ctypes.c_void_p)
+
+
+class SharedNgspiceBackend:
+    """
+    Запуск ngspice в текущем процессе через разделяемую библиотеку libngspice (shared API).
+
+    Схема и osdi-библиотеки загружаются один раз. Для повторных запусков новые значения параметров
+    применяются командой altermod, после чего заново выполняются только команды анализа.
+    Векторы результатов читаются через ngGet_Vec_Info напрямую в массивы NumPy, файл результатов
+    не записывается (result_file игнорируется).
+    """
+    name = "shared"
+    writes_result_file = False
+    _lock = threading.Lock()  # библиотека ngspice хранит глобальное состояние — один запуск за раз
+
+    def __init__(self, library_path: Optional[str] = None, output_format: str = "raw") -> None:
+        self.output_format = output_format
+        self.library_path = library_path or ctypes.util.find_library("ngspice")
+        if not self.library_path:
+            raise FileNotFoundError("Библиотека libngspice не найдена.")
+
+        self.library = None
+        self.output: List[str] = []
+        self.points_done = 0
+        self.loaded_state = None     # (схема, mtime схемы, отпечатки osdi-библиотек) загруженной цепи
+        self.model_name = None
+        self.analyses: List[str] = []
+        self.post_commands: List[str] = []
+        self.print_expressions: List[str] = []
+        self.applied_parameters: Dict[str, str] = {}
+        self.reporter = None  # получатель прогресса и предупреждений выполняющегося запуска
+        self._callbacks = None
+
+    def __load_library(self):
+        library = ctypes.CDLL(self.library_path)
+        library.ngSpice_Init.argtypes = [SendChar, SendStat, ControlledExit, SendData, SendInitData,
+                                         BGThreadRunning, ctypes.c_void_p]
+        library.ngSpice_Init.restype = ctypes.c_int
+        library.ngSpice_Command.argtypes = [ctypes.c_char_p]
+        library.ngSpice_Command.restype = ctypes.c_int
+        library.ngSpice_Circ.argtypes = [ctypes.POINTER(ctypes.c_char_p)]
+        library.ngSpice_Circ.restype = ctypes.c_int
+        library.ngGet_Vec_Info.argtypes = [ctypes.c_char_p]
+        library.ngGet_Vec_Info.restype = ctypes.POINTER(VectorInfo)
+        library.ngSpice_CurPlot.argtypes = []
+        library.ngSpice_CurPlot.restype = ctypes.c_char_p
+        library.ngSpice_AllVecs.argtypes = [ctypes.c_char_p]
+        library.ngSpice_AllVecs.restype = ctypes.POINTER(ctypes.c_char_p)
+
+        # ссылки на callbacks храним в объекте, иначе сборщик мусора освободит их раньше библиотеки
+        self._callbacks = (
+            SendChar(self.__on_output),
+            SendStat(self.__on_status),
+            ControlledExit(self.__on_exit),
+            SendData(self.__on_data),
+            SendInitData(lambda data, ident, user: 0),
+            BGThreadRunning(lambda running, ident, user: 0),
+        )
+        library.ngSpice_Init(*self._callbacks, None)
+        self.library = library
+
+    def __on_output(self, text, ident, user):
+        line = text.decode("utf-8", errors="replace")
+        self.output.append(line)
+        if self.reporter is not None:
+            self.reporter.feed(line)
+        return 0
+
+    def __on_status(self, text, ident, user):
+        if self.reporter is not None:
+            self.reporter.feed(text.decode("utf-8", errors="replace"))  # «tran 45.3%»
+        return 0
+
+    def __on_exit(self, status, unload, quit_requested, ident, user):
+        self.loaded_state = None
+        return 0
+
+    def __on_data(self, values, count, ident, user):
+        self.points_done += 1
+        return 0
+
+    def command(self, command: str):
+        """Выполняет команду ngspice и проверяет вывод на ошибки."""
+        self.output.clear()
+        self.library.ngSpice_Command(command.encode("utf-8"))
+        errors = [line for line in self.output if line.startswith("stderr Error")]
+        if errors:
+            raise RuntimeError(f"Ошибка ngspice при выполнении '{command}':\n" + "\n".join(errors))
+
+    def __osdi_fingerprints(self, control_commands: List[str], directory: str):
+        fingerprints = []
+        for command in control_commands:
+            if command.lower().startswith("pre_osdi"):
+                fingerprints.append(file_fingerprint(os.path.join(directory, command.split(None, 1)[1].strip())))
+        return tuple(fingerprints)
+
+    def load(self, spice_file: str, model_types: Optional[List[str]] = None):
+        """Загружает osdi-библиотеки и схему, запоминает команды анализа и выражения print."""
+        with open(spice_file, "r") as file:
+            lines = file.readlines()
+        circuit_lines, control_commands = split_control_block(lines)
+        directory = os.path.dirname(os.path.abspath(spice_file))
+        state = (os.path.abspath(spice_file), os.path.getmtime(spice_file), self.__osdi_fingerprints(control_commands, directory))
+
+        if self.loaded_state and self.loaded_state[2] != state[2]:
+            self.close()  # osdi-библиотеку нельзя перезагрузить в работающем экземпляре ngspice
+        if self.library is None:
+            self.__load_library()
+
+        self.command(f"cd {directory}")
+        self.analyses, self.post_commands, self.print_expressions = [], [], []
+        setup_commands = []
+        for command in control_commands:
+            keyword = command.split(None, 1)[0].lower()
+            if keyword == "pre_osdi":
+                if self.loaded_state is None or self.loaded_state[2] != state[2]:
+                    self.command(command)
+            elif keyword in ANALYSIS_COMMANDS:
+                self.analyses.append(command)
+            elif keyword == "print":
+                expressions = PRINT_REDIRECT_PATTERN.sub("", command).split()[1:]
+                self.print_expressions += [e for e in expressions if not e.lower().startswith(("col", "line"))]
+            elif keyword in SKIPPED_COMMANDS:
+                continue
+            elif self.analyses:
+                self.post_commands.append(command)
+            else:
+                setup_commands.append(command)
+
+        circuit = (ctypes.c_char_p * (len(circuit_lines) + 1))()
+        circuit[:-1] = [line.encode("utf-8") for line in circuit_lines]
+        circuit[-1] = None
+        if self.library.ngSpice_Circ(circuit) != 0:
+            raise RuntimeError(f"Ошибка загрузки схемы {spice_file} в ngspice.")
+
+        for command in setup_commands:
+            self.command(command)
+
+        self.model_name = select_model_card(lines, model_types or [])[2] if model_types else None
+        self.applied_parameters = {}
+        self.loaded_state = state
+
+    def read_vector(self, name: str) -> np.ndarray:
+        """Копирует вектор ngspice в массив NumPy (для комплексных векторов — модуль)."""
+        info = self.library.ngGet_Vec_Info(name.encode("utf-8"))
+        if not info:
+            raise RuntimeError(f"Вектор {name} не найден.")
+        info = info.contents
+        if info.v_realdata:
+            return np.ctypeslib.as_array(info.v_realdata, shape=(info.v_length,)).copy()
+        complex_data = np.ctypeslib.as_array(info.v_compdata, shape=(info.v_length, 2))
+        return np.hypot(complex_data[:, 0], complex_data[:, 1])
+
+    def __current_scale(self) -> str:
+        plot = self.library.ngSpice_CurPlot()
+        names = []
+        vectors = self.library.ngSpice_AllVecs(plot)
+        i = 0
+        while vectors and vectors[i]:
+            names.append(vectors[i].decode("utf-8"))
+            i += 1
+        for scale in SCALE_NAMES:
+            if scale in names:
+                return scale
+        raise RuntimeError("Не удалось определить шкалу (sweep-вектор) результатов симуляции.")
+
+    def run(self, spice_file: str, result_file: str, parameters: Optional[Dict[str, str]] = None,
+            model_types: Optional[List[str]] = None) -> pd.DataFrame:
+        parameters = {name.lower(): str(value).strip() for name, value in (parameters or {}).items() if str(value).strip()}
+
+        with self._lock, span("ngspice (libngspice)", netlist=os.path.basename(spice_file)) as current:
+            state_changed = (
+                self.loaded_state is None
+                or self.loaded_state[0] != os.path.abspath(spice_file)
+                or self.loaded_state[1] != os.path.getmtime(spice_file)
+            )
+            # вернуть параметр к значению из схемы можно только повторной загрузкой цепи
+            restore_needed = any(name not in parameters for name in self.applied_parameters)
+            if state_changed or restore_needed:
+                self.load(spice_file, model_types)
+            current.set(reloaded=state_changed or restore_needed)
+
+            if parameters and not self.model_name:
+                raise ValueError("Для изменения параметров необходимо указать тип модели.")
+            for name, value in parameters.items():
+                if self.applied_parameters.get(name) != value:
+                    self.command(f"altermod {self.model_name} {name} = {value}")
+            self.applied_parameters = dict(parameters)
+
+            self.points_done = 0
+            self.reporter = progress_reporter("ngspice", OutputParser(self.analyses))
+            try:
+                for analysis in self.analyses:
+                    self.command(analysis)
+            finally:
+                self.reporter = None
+            for command in self.post_commands:
+                self.command(command)
+
+            scale = self.__current_scale()
+            columns = {}
+            for i, expression in enumerate(self.print_expressions):
+                self.command(f"let printcol{i} = {expression}")
+                columns[expression] = self.read_vector(f"printcol{i}")
+            scale_values = self.read_vector(scale)
+
+        return pd.DataFrame({"Index": np.arange(len(scale_values)), scale: scale_values, **columns})
+
+    def version(self) -> str:
+        """Идентификатор версии libngspice: отпечаток файла библиотеки."""
+        _, mtime, size = file_fingerprint(self.library_path)
+        return f"libngspice:{os.path.basename(self.library_path)}:{mtime}:{size}"
+
+    def close(self):
+        """Выгружает библиотеку ngspice (следующий запуск загрузит её заново)."""
+        if self.library is None:
+            return
+        try:
+            self.library.ngSpice_Command(b"quit")
+        except OSError:
+            pass
+        if os.name == "posix":
+            try:
+                import _ctypes
+                _ctypes.dlclose(self.library._handle)
+            except (ImportError, AttributeError, OSError):
+                pass
+        self.library = None
+        self.loaded_state = None
+        self.applied_parameters = {}
+
+
+def create_backend(name: str = "subprocess", **kwargs) -> SimulationBackend:
+    """
+    Создаёт backend симуляции по имени.
+
+    Args:
+        name (str): "subprocess" — отдельный процесс ngspice -b, "shared" — libngspice в текущем процессе.
+    """
+    if name == "subprocess":
+        return SubprocessBackend(**kwargs)
+    if name == "shared":
+        return SharedNgspiceBackend(**kwargs)
+    raise ValueError(f"Неизвестный backend симуляции: {name}")
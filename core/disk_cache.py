@@ -0,0 +1,96 @@
+import os
+import shutil
+
+from typing import Optional
+
+
+class DiskCache:
+    """
+    Каталог на диске с файлами-записями, адресуемыми по ключу (хэшу содержимого).
+    Размер каталога ограничен: при превышении лимита удаляются давно не использованные записи (LRU).
+    Время последнего использования хранится в mtime файла записи.
+    """
+    def __init__(self, directory: str, max_size: int, suffix: str = "") -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.suffix = suffix
+
+    def entry_path(self, key: str) -> str:
+        """Возвращает путь к записи кэша для ключа (файл может не существовать)."""
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        Ищет запись по ключу. При попадании обновляет время использования записи.
+
+        Returns:
+            Optional[str]: Путь к записи или None, если записи нет.
+        """
+        path = self.entry_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return path
+
+    def store(self, key: str, source_path: str) -> str:
+        """
+        Сохраняет копию файла source_path в кэш под ключом key и выполняет вытеснение.
+
+        Запись сначала пишется во временный файл и затем атомарно переименовывается,
+        чтобы параллельный читатель никогда не увидел недописанную запись.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            link_or_copy(source_path, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict()
+        return path
+
+    def evict(self):
+        """Удаляет самые старые записи, пока суммарный размер кэша превышает max_size."""
+        if not os.path.isdir(self.directory):
+            return
+
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.directory):
+            if self.suffix and not name.endswith(self.suffix):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        entries.sort()  # самые давно использованные — первыми
+        for _, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError:
+                pass
+
+
+def link_or_copy(source_path: str, destination_path: str):
+    """
+    Создаёт жёсткую ссылку destination_path на source_path, а если это невозможно
+    (другая файловая система, отсутствие прав) — копирует файл.
+    """
+    if os.path.exists(destination_path):
+        os.remove(destination_path)
+    try:
+        os.link(source_path, destination_path)
+    except OSError:
+        shutil.copy2(source_path, destination_path)
@@ -1,36 +1,121 @@
 import os
 import re
+import shutil
+import tempfile
 
-from typing import Dict
+import numpy as np
+
+from typing import Dict, List, Optional, Tuple, Union
+
+from core.reference_data import preserve_original, record_written
+from utils.spice_values import parse_spice_values
+from utils.tracing import span
+
+
+# объявление параметра макросом семейства MPR*/MPI*/IPR*/IPI*: имя (группа 1) и значение по умолчанию (группа 2)
+PARAMETER_PATTERN = re.compile(r"`(?:MPR|MPI|IPR|IPI)\w*\(\s*(\w+)\s*,\s*((?:[^,()\n]|\([^()\n]*\))*?)\s*,")
+# множители, одинаково понимаемые SPICE и Verilog-A; прочие (meg, mil, M) записываются числом без множителя
+PORTABLE_NUMBER_PATTERN = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?[kmunpfa]?")
+
+
+def format_parameter_values(values: List[Union[str, float]]) -> List[str]:
+    """
+    Текст значений для записи в исходник Verilog-A: числа с множителями k, m, u, n, p, f, a сохраняются
+    как введены, остальные значения в нотации SPICE переводятся в число, выражения записываются как есть.
+    """
+    texts = [value.strip() if isinstance(value, str) else f"{value:.12g}" for value in values]
+    numbers = parse_spice_values(texts)
+    return [text if PORTABLE_NUMBER_PATTERN.fullmatch(text) or np.isnan(number) else f"{number:.12g}"
+            for text, number in zip(texts, numbers)]
+
+
+def write_atomically(path: str, content: str):
+    """Записывает файл через временный файл в том же каталоге и переименование: читатели видят либо старое, либо новое содержимое."""
+    descriptor, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                            prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "w", newline="") as file:
+            file.write(content)
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
 
 class FileManager:
-    def apply_changes_to_file(self, current_parameters: Dict[str, str], target_file: str):
+    """
+    Запись значений параметров в файлы модели.
+
+    Args:
+        originals_directory (str): Каталог исходных версий файлов (core/reference_data.preserve_original):
+            перед первой записью файла сохраняется его исходная версия, по которой строятся эталонные
+            данные. None — исходные версии не сохраняются (временные копии модели).
+    """
+    def __init__(self, originals_directory: Optional[str] = None) -> None:
+        self.originals_directory = originals_directory
+
+    @staticmethod
+    def index_parameters(content: str) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Один проход по тексту файла параметров: имя параметра -> позиции значения по умолчанию
+        (имя может встречаться несколько раз, например в ветвях `ifdef).
+        """
+        index: Dict[str, List[Tuple[int, int]]] = {}
+        for match in PARAMETER_PATTERN.finditer(content):
+            index.setdefault(match.group(1), []).append(match.span(2))
+        return index
+
+    def apply_changes_to_file(self, current_parameters: Dict[str, Union[str, float]], target_file: str) -> bool:
+        """
+        Записывает значения параметров в файл параметров модели.
+
+        Заменяются только значения, отличающиеся от записанных в файле (с учётом множителей: 22.0a и 2.2e-17
+        равны), поэтому исходная запись неизменённых значений сохраняется. Если изменений нет, файл
+        не перезаписывается и его mtime не меняется; иначе файл записывается атомарно.
+
+        Returns:
+            bool: True, если файл был перезаписан.
+        """
         if not os.path.exists(target_file):
             raise FileNotFoundError(f"Файл {target_file} не найден.")
 
-        with open(target_file, 'r') as file:
-            lines = file.readlines()
-        
-        parameter_lines = {param_name: None for param_name in current_parameters}  # создаём карту для быстрого поиска строк по параметрам
-        for i, line in enumerate(lines):
-            for param_name in current_parameters:
-                if re.search(rf"`MPR\w+\(\s*{re.escape(param_name)}\s*,", line):
-                    parameter_lines[param_name] = i
-
-        for param_name, line_index in parameter_lines.items():
-            if line_index is not None:
-                line = lines[line_index]
-
-                # регулярное выражение для поиска и замены значения параметра
-                match = re.search(
-                    rf"(\s*`MPR\w+\(\s*{re.escape(param_name)}\s*,\s*)([-\d.eE+]+)",
-                    line
-                )
-                if match:
-                    prefix = match.group(1)  # часть строки до значения
-                    updated_line = f"{prefix}{current_parameters[param_name]}" + line[match.end():]
-                    lines[line_index] = updated_line
-
-        with open(target_file, 'w') as file:
-            file.writelines(lines)
+        with span("Запись параметров", file=os.path.basename(target_file)) as current:
+            return self.__apply_changes(current_parameters, target_file, current)
+
+    def __apply_changes(self, current_parameters, target_file: str, current) -> bool:
+        with open(target_file, "r", newline="") as file:
+            content = file.read()
+        index = self.index_parameters(content)
+
+        names = list(current_parameters)
+        spans, new_values = [], []
+        for name, text in zip(names, format_parameter_values([current_parameters[name] for name in names])):
+            if text:
+                for span in index.get(name, ()):
+                    spans.append(span)
+                    new_values.append(text)
+        current.set(bytes=len(content), parameters=len(spans))
+        if not spans:
+            return False
+
+        old_values = [content[start:end] for start, end in spans]
+        unchanged = (np.array(old_values) == np.array(new_values)) | \
+                    (parse_spice_values(old_values) == parse_spice_values(new_values))
+        replacements = sorted((span, text) for span, text, same in zip(spans, new_values, unchanged) if not same)
+        current.set(changed=len(replacements))
+        if not replacements:
+            return False
+
+        pieces, position = [], 0
+        for (start, end), text in replacements:
+            pieces.append(content[position:start])
+            pieces.append(text)
+            position = end
+        pieces.append(content[position:])
+        if self.originals_directory:
+            preserve_original(target_file, self.originals_directory)
+        write_atomically(target_file, "".join(pieces))
+        if self.originals_directory:
+            record_written(target_file, self.originals_directory)
+        return True
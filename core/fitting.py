@@ -0,0 +1,279 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from core.sweep import ParameterSweep
+from utils.spice_values import parameter_interval, parse_spice_number
+
+
+LOG_FLOOR = 1e-30  # нижняя граница |y| при сравнении в логарифмическом масштабе
+OPEN_BOUND_MARGIN = 1e-9  # отступ от открытой границы в масштабированных переменных (относительно |границы|, не меньше 1)
+
+Bounds = Union[Tuple[Optional[float], Optional[float]], Tuple[Optional[float], Optional[float], bool, bool]]
+
+
+def open_bound_margin(bounds: np.ndarray) -> np.ndarray:
+    """Отступ от открытых границ bounds (бесконечные границы не сдвигаются)."""
+    return OPEN_BOUND_MARGIN * np.maximum(np.abs(np.where(np.isfinite(bounds), bounds, 0.0)), 1.0)
+
+
+class FitResult:
+    """
+    Результат подбора параметров.
+
+    iterations содержит по одной записи на итерацию: номер, стоимость, коэффициент демпфирования,
+    длительность итерации, число запусков симулятора за итерацию и параметры, производную по которым
+    не удалось посчитать (на этой итерации они не менялись).
+    """
+    def __init__(self, parameters: Dict[str, float], cost: float, iterations: List[dict],
+                 simulator_calls: int, success: bool, message: str) -> None:
+        self.parameters = parameters
+        self.cost = cost
+        self.iterations = iterations
+        self.simulator_calls = simulator_calls
+        self.success = success
+        self.message = message
+
+    def report(self) -> str:
+        """Текстовый отчёт: итерации и подобранные значения параметров."""
+        lines = [f"{'Итерация':>8} {'Стоимость':>14} {'Демпфирование':>14} {'Время, с':>10} {'Запусков':>9}"]
+        for record in self.iterations:
+            lines.append(f"{record['iteration']:>8} {record['cost']:>14.6g} {record['lambda']:>14.3g} "
+                         f"{record['time']:>10.2f} {record['simulations']:>9}")
+        frozen = sorted({name for record in self.iterations for name in record.get("frozen", [])})
+        if frozen:
+            lines.append(f"Не удалось вычислить производные (симуляция завершилась с ошибкой): {', '.join(frozen)}")
+        lines.append("")
+        lines += [f"{name} = {value:.6g}" for name, value in self.parameters.items()]
+        lines.append(f"Итоговая стоимость: {self.cost:.6g}; запусков симулятора: {self.simulator_calls}; {self.message}")
+        return "\n".join(lines)
+
+
+class ParameterFitter:
+    """
+    Подбор параметров модели под измеренные (целевые) кривые методом наименьших квадратов
+    с ограничениями (Левенберг — Марквардт с проекцией на границы).
+
+    Якобиан считается конечными разностями: все возмущённые точки одной итерации, а также
+    пробные шаги с разными коэффициентами демпфирования запускаются одним свипом на пуле процессов.
+    Якобиан пересчитывается только после принятого шага. Если возмущённая симуляция не удалась,
+    она повторяется с шагом в другую сторону; параметр, для которого не удались обе, на итерации
+    не меняется и попадает в отчёт. Оптимизация ведётся в масштабированных переменных x = p / |p0|,
+    поэтому параметры разного порядка величины имеют сопоставимый шаг.
+
+    Args:
+        bounds: Границы параметров: (нижняя, верхняя) — закрытые, или (нижняя, верхняя, нижняя
+            включена, верхняя включена); None — граница отсутствует. Точки остаются строго внутри
+            открытых границ.
+        weights: Веса невязки по колонкам: число (вес кривой) или последовательность весов точек
+            целевой сетки; умножаются на нормировку кривых.
+    """
+    def __init__(self, sweep: ParameterSweep, target: pd.DataFrame, initial: Dict[str, float],
+                 bounds: Optional[Dict[str, Bounds]] = None,
+                 columns: Optional[Sequence[str]] = None, log_scale: bool = False,
+                 max_iterations: int = 20, tolerance: float = 1e-6, step: float = 1e-3,
+                 weights: Optional[Dict[str, Union[float, Sequence[float]]]] = None) -> None:
+        if not initial:
+            raise ValueError("Не выбраны параметры для подбора.")
+
+        self.sweep = sweep
+        self.target = target
+        self.names = list(initial)
+        self.log_scale = log_scale
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.step = step
+        self.simulator_calls = 0
+
+        x0 = np.array([float(initial[name]) for name in self.names])
+        self.scale = np.where(x0 != 0, np.abs(x0), 1.0)
+        bounds = {name: tuple(value) if len(value) == 4 else (*value, True, True) for name, value in (bounds or {}).items()}
+        lower, upper, lower_closed, upper_closed = zip(*(bounds.get(name, (None, None, True, True))
+                                                         for name in self.names))
+        lower = np.array([-np.inf if value is None else value for value in lower], dtype=float) / self.scale
+        upper = np.array([np.inf if value is None else value for value in upper], dtype=float) / self.scale
+        # допустимые значения внутри открытых границ отстоят от них на OPEN_BOUND_MARGIN
+        self.lower = np.where(np.isfinite(lower) & ~np.array(lower_closed), lower + open_bound_margin(lower), lower)
+        self.upper = np.where(np.isfinite(upper) & ~np.array(upper_closed), upper - open_bound_margin(upper), upper)
+        if np.any(self.lower > self.upper):
+            raise ValueError("Пустой диапазон допустимых значений параметров.")
+        self.x0 = np.clip(x0 / self.scale, self.lower, self.upper)
+
+        x_name = target.columns[1]
+        self.columns = list(columns) if columns else [name for name in target.columns[2:]]
+        self.target_x = target[x_name].to_numpy(dtype=np.float64)
+        self.target_y = np.concatenate([self.__transform(target[name].to_numpy(dtype=np.float64))
+                                        for name in self.columns])
+        # нормировка: каждая кривая даёт сопоставимый вклад в стоимость
+        self.weights = np.concatenate([
+            np.full(len(self.target_x), 1.0 / max(np.nanmax(np.abs(self.__transform(target[name].to_numpy(dtype=np.float64)))), 1e-300))
+            if not log_scale else np.ones(len(self.target_x))
+            for name in self.columns
+        ])
+        if weights:
+            unknown = set(weights) - set(self.columns)
+            if unknown:
+                raise ValueError(f"Веса заданы для колонок, не участвующих в подборе: {', '.join(sorted(unknown))}")
+            user_weights = [np.broadcast_to(np.asarray(weights.get(name, 1.0), dtype=np.float64), self.target_x.shape)
+                            for name in self.columns]
+            self.weights = self.weights * np.concatenate(user_weights)
+
+    def __transform(self, values: np.ndarray) -> np.ndarray:
+        return np.log10(np.abs(values) + LOG_FLOOR) if self.log_scale else values
+
+    def to_parameters(self, x: np.ndarray) -> Dict[str, float]:
+        return {name: float(value) for name, value in zip(self.names, x * self.scale)}
+
+    def residuals(self, frame: Optional[pd.DataFrame]) -> Optional[np.ndarray]:
+        """Взвешенная разность смоделированных и целевых кривых; None, если запуск не удался."""
+        if frame is None:
+            return None
+        x_name = frame.columns[1]
+        simulated = []
+        for name in self.columns:
+            if name not in frame:
+                raise ValueError(f"В результатах симуляции нет колонки {name}.")
+            values = frame[name].to_numpy(dtype=np.float64)
+            if len(values) != len(self.target_x):
+                x = frame[x_name].to_numpy(dtype=np.float64)
+                if np.any(np.diff(x) < 0):
+                    raise ValueError("Сетки целевых и смоделированных данных не совпадают, а шкала немонотонна.")
+                values = np.interp(self.target_x, x, values)
+            simulated.append(self.__transform(values))
+        residual = (np.concatenate(simulated) - self.target_y) * self.weights
+        return np.nan_to_num(residual, nan=0.0)
+
+    def __evaluate(self, points: List[np.ndarray], executor) -> List[Optional[np.ndarray]]:
+        result = self.sweep.run([self.to_parameters(x) for x in points], executor=executor)
+        self.simulator_calls += len(points)
+        return [self.residuals(frame) for frame in result.frames]
+
+    def __perturbed(self, x: np.ndarray, indices: List[int], steps: np.ndarray) -> List[np.ndarray]:
+        points = []
+        for i in indices:
+            point = x.copy()
+            point[i] += steps[i]
+            points.append(point)
+        return points
+
+    def __jacobian(self, x: np.ndarray, r: np.ndarray, executor) -> Tuple[np.ndarray, List[str]]:
+        """
+        Якобиан в точке x и имена параметров, производную по которым посчитать не удалось
+        (их колонки нулевые).
+        """
+        steps = np.where(x + self.step <= self.upper, self.step, -self.step)  # у верхней границы шаг назад
+        indices = list(range(len(x)))
+        columns = dict(zip(indices, self.__evaluate(self.__perturbed(x, indices, steps), executor)))
+
+        # неудачные возмущённые запуски повторяются с шагом в другую сторону (если он в пределах границ)
+        retry = [i for i in indices if columns[i] is None and self.lower[i] <= x[i] - steps[i] <= self.upper[i]]
+        if retry:
+            steps[retry] = -steps[retry]
+            columns.update(zip(retry, self.__evaluate(self.__perturbed(x, retry, steps), executor)))
+
+        jacobian = np.zeros((len(r), len(x)))
+        failed = []
+        for i in indices:
+            if columns[i] is None:
+                failed.append(self.names[i])
+            else:
+                jacobian[:, i] = (columns[i] - r) / steps[i]
+        return jacobian, failed
+
+    def fit(self, progress_callback: Optional[Callable[[int, float], None]] = None) -> FitResult:
+        """
+        Выполняет подбор.
+
+        Args:
+            progress_callback: Вызывается как progress_callback(номер итерации, стоимость) после каждой итерации.
+        """
+        iterations: List[dict] = []
+        damping = 1e-3
+        with self.sweep.create_executor() as executor:
+            x = self.x0
+            r = self.__evaluate([x], executor)[0]
+            if r is None:
+                raise RuntimeError("Симуляция с начальными значениями параметров завершилась с ошибкой.")
+            cost = 0.5 * float(r @ r)
+            message = "Достигнуто максимальное число итераций."
+            success = False
+            jacobian = None  # якобиан последней принятой точки
+
+            for iteration in range(1, self.max_iterations + 1):
+                started = time.perf_counter()
+                calls_before = self.simulator_calls
+
+                if jacobian is None:
+                    jacobian, frozen = self.__jacobian(x, r, executor)
+                    gradient = jacobian.T @ r
+                    if np.max(np.abs(gradient)) < self.tolerance and not frozen:
+                        message, success = "Градиент меньше заданной точности.", True
+                        break
+                    normal = jacobian.T @ jacobian
+                    diagonal = np.diag(np.maximum(np.diag(normal), 1e-12))
+                # пробные шаги с тремя коэффициентами демпфирования считаются одним свипом
+                dampings = [damping / 10, damping, damping * 10]
+                trials = []
+                for value in dampings:
+                    try:
+                        delta = np.linalg.solve(normal + value * diagonal, -gradient)
+                    except np.linalg.LinAlgError:
+                        delta = -gradient / np.diag(diagonal)
+                    trials.append(np.clip(x + delta, self.lower, self.upper))
+                trial_residuals = self.__evaluate(trials, executor)
+                trial_costs = [0.5 * float(tr @ tr) if tr is not None else np.inf for tr in trial_residuals]
+                best = int(np.argmin(trial_costs))
+
+                improved = trial_costs[best] < cost
+                if improved:
+                    relative_change = (cost - trial_costs[best]) / max(cost, 1e-300)
+                    step_size = np.max(np.abs(trials[best] - x))
+                    x, r, cost = trials[best], trial_residuals[best], trial_costs[best]
+                    jacobian = None
+                    damping = max(dampings[best] / 10, 1e-12)
+                else:
+                    damping = min(dampings[-1] * 10, 1e12)
+
+                iterations.append({
+                    "iteration": iteration,
+                    "cost": cost,
+                    "lambda": damping,
+                    "time": time.perf_counter() - started,
+                    "simulations": self.simulator_calls - calls_before,
+                    "frozen": frozen,
+                })
+                if progress_callback:
+                    progress_callback(iteration, cost)
+
+                if improved and (relative_change < self.tolerance or step_size < self.tolerance):
+                    message, success = "Изменение стоимости меньше заданной точности.", True
+                    break
+                if not improved and damping >= 1e12:
+                    message = "Не удалось уменьшить стоимость."
+                    break
+
+        return FitResult(self.to_parameters(x), cost, iterations, self.simulator_calls, success, message)
+
+
+def fit_parameters(sweep: ParameterSweep, target: pd.DataFrame, parameters: List[Dict[str, Optional[float]]],
+                   names: Sequence[str], **options) -> FitResult:
+    """
+    Подбирает параметры names, начиная со значений по умолчанию из описаний параметров модели
+    (результат ParameterParser.parse), границы и их открытость — из диапазона from объявления.
+    """
+    described = {parameter["name"]: parameter for parameter in parameters}
+    initial, bounds = {}, {}
+    for name in names:
+        if name not in described:
+            raise ValueError(f"Параметр {name} не найден в описании модели.")
+        try:
+            initial[name] = parse_spice_number(described[name]["default_value"])
+        except ValueError:
+            raise ValueError(f"Значение параметра {name} не является числом: {described[name]['default_value']}")
+        interval = parameter_interval(described[name])
+        if interval is not None:
+            bounds[name] = interval
+    return ParameterFitter(sweep, target, initial, bounds=bounds, **options).fit()
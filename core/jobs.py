@@ -0,0 +1,452 @@
+"""
+Очередь заданий симуляции.
+
+Задания (симуляция, свип, подбор) выполняются ограниченным пулом потоков. Задания одной группы
+(одной модели: общие файл параметров, схема, osdi-модель и файл результатов) не выполняются
+одновременно. Интерактивный запуск с replace=True заменяет ещё не начатые задания своей группы
+и отменяет выполняющееся: результат устаревшего запуска уже не нужен.
+
+Дочерние процессы (openvaf, ngspice) запускаются через run_process в собственной группе процессов
+с таймаутом этапа (STAGE_TIMEOUTS); отмена задания завершает группы всех его процессов.
+Вывод процессов читается по мере появления: строки прогресса (core/progress.OutputParser)
+переводятся в прогресс задания внутри диапазона progress_range, предупреждения сразу
+добавляются к заданию.
+"""
+
+import os
+import re
+import time
+import signal
+import itertools
+import threading
+import contextvars
+import subprocess
+
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from config import STAGE_TIMEOUTS, MAX_SIMULATION_JOBS, PROGRESS_REPORT_INTERVAL
+
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED, SUPERSEDED = "queued", "running", "done", "failed", "cancelled", "superseded"
+FINISHED_STATES = (DONE, FAILED, CANCELLED, SUPERSEDED)
+STATE_NAMES = {QUEUED: "в очереди", RUNNING: "выполняется", DONE: "завершено", FAILED: "ошибка",
+               CANCELLED: "отменено", SUPERSEDED: "заменено"}
+HISTORY_SIZE = 20  # завершённых заданий, показываемых в очереди
+WARNINGS_LIMIT = 50  # предупреждений, сохраняемых в задании
+READ_SIZE = 65536
+LINE_END_PATTERN = re.compile(rb"\r\n|\r|\n")  # ngspice обновляет строку прогресса символом \r
+
+
+class JobCancelled(BaseException):
+    """
+    Задание отменено пользователем или заменено более новым.
+    Как asyncio.CancelledError, наследуется от BaseException, чтобы не перехватываться в except Exception.
+    """
+
+
+class StageTimeout(RuntimeError):
+    """Этап (openvaf, ngspice) не завершился за отведённое время; его процессы остановлены."""
+
+
+_current_job: contextvars.ContextVar = contextvars.ContextVar("current_job", default=None)
+_progress_range: contextvars.ContextVar = contextvars.ContextVar("progress_range", default=None)
+_process_observer: contextvars.ContextVar = contextvars.ContextVar("process_observer", default=None)
+
+
+def current_job() -> Optional["Job"]:
+    """Задание, выполняемое в текущем потоке (контексте); None вне очереди заданий."""
+    return _current_job.get()
+
+
+def check_cancelled():
+    """Прерывает текущее задание (JobCancelled), если оно отменено; вне задания ничего не делает."""
+    job = current_job()
+    if job is not None:
+        job.check_cancelled()
+
+
+@contextmanager
+def progress_range(start: Optional[float], end: Optional[float] = None):
+    """
+    Диапазон прогресса задания (start..end), в который отображается доля выполнения процессов,
+    запущенных внутри блока. progress_range(None) отключает прогресс процессов блока
+    (предупреждения по-прежнему передаются заданию).
+    """
+    token = _progress_range.set((start, end) if start is not None else None)
+    try:
+        yield
+    finally:
+        _progress_range.reset(token)
+
+
+@contextmanager
+def observe_processes(observer: Callable[[subprocess.Popen, bool], None]):
+    """
+    Сообщает observer(process, True) о запуске и observer(process, False) о завершении дочерних
+    процессов run_process внутри блока — например, процессу, который создал пул воркеров свипа
+    и при отмене завершает группы уже запущенных ими процессов (core/sweep.SweepExecutor).
+    """
+    token = _process_observer.set(observer)
+    try:
+        yield
+    finally:
+        _process_observer.reset(token)
+
+
+class ProgressReporter:
+    """
+    Передаёт заданию прогресс и предупреждения, найденные в выводе процесса.
+    Вызывается из потоков чтения вывода; прогресс обновляется не чаще PROGRESS_REPORT_INTERVAL.
+    """
+    def __init__(self, job: "Job", stage: str, parser, bounds: Optional[Tuple[float, float]]) -> None:
+        from core.progress import ProgressEstimate
+
+        self.job = job
+        self.stage = stage
+        self.parser = parser
+        self.bounds = bounds
+        self.estimate = ProgressEstimate()
+        self.fraction = 0.0
+        self.reported = 0.0
+        self.lock = threading.Lock()
+
+    def feed(self, line: str):
+        with self.lock:
+            fraction, warning = self.parser.feed(line)
+        if warning:
+            self.job.warn(f"{self.stage}: {warning}")
+        if fraction is None or self.bounds is None or fraction <= self.fraction:
+            return
+        self.fraction = fraction
+        now = time.monotonic()
+        if now - self.reported < PROGRESS_REPORT_INTERVAL and fraction < 1.0:
+            return
+        self.reported = now
+        start, end = self.bounds
+        self.job.report(start + (end - start) * fraction, eta=self.estimate.remaining(fraction))
+
+
+def progress_reporter(stage: str, parser) -> Optional[ProgressReporter]:
+    """Получатель вывода этапа для текущего задания; None вне очереди заданий."""
+    job = current_job()
+    if job is None:
+        return None
+    return ProgressReporter(job, stage, parser, _progress_range.get())
+
+
+def _read_lines(stream, chunks: List[bytes], reporter: Optional[ProgressReporter]):
+    """Читает поток процесса до EOF, сохраняя вывод и передавая полные строки reporter."""
+    pending = b""
+    while True:
+        chunk = os.read(stream.fileno(), READ_SIZE)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if reporter is None:
+            continue
+        *lines, pending = LINE_END_PATTERN.split(pending + chunk)
+        for line in lines:
+            if line:
+                reporter.feed(line.decode("utf-8", errors="replace"))
+    if reporter is not None and pending:
+        reporter.feed(pending.decode("utf-8", errors="replace"))
+
+
+def kill_process_group(process: subprocess.Popen):
+    """Завершает процесс вместе с группой его дочерних процессов."""
+    if process.poll() is not None:
+        return
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass  # процесс уже завершился
+
+
+def run_process(command: Sequence[str], stage: str, cwd: Optional[str] = None,
+                timeout: Optional[float] = None, output_parser=None) -> subprocess.CompletedProcess:
+    """
+    Запускает дочерний процесс в собственной группе процессов и ждёт его завершения.
+
+    stdout и stderr читаются отдельными потоками по мере появления вывода (ngspice обновляет
+    строку прогресса без перевода строки, поэтому строки разделяются и по \\r).
+
+    Args:
+        command: Команда и аргументы.
+        stage: Этап ("openvaf", "ngspice"); по нему берётся таймаут из STAGE_TIMEOUTS.
+        cwd: Рабочий каталог процесса.
+        timeout: Таймаут в секундах вместо STAGE_TIMEOUTS[stage] (None — без ограничения).
+        output_parser: Разбор строк вывода (core/progress.OutputParser); прогресс и предупреждения
+            передаются текущему заданию.
+
+    Returns:
+        subprocess.CompletedProcess: Код возврата, stdout и stderr (bytes).
+
+    Raises:
+        StageTimeout: Процесс не завершился за таймаут; группа процессов остановлена.
+        JobCancelled: Текущее задание отменено во время выполнения процесса.
+    """
+    timeout = STAGE_TIMEOUTS.get(stage) if timeout is None else timeout
+    job = current_job()
+    if job is not None:
+        job.check_cancelled()
+    reporter = progress_reporter(stage, output_parser) if output_parser is not None else None
+
+    if os.name == "posix":
+        isolation = {"start_new_session": True}
+    else:
+        isolation = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    process = subprocess.Popen(list(command), cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **isolation)
+    if job is not None:
+        job.attach_process(process)
+    observer = _process_observer.get()
+    if observer is not None:
+        observer(process, True)
+    stdout, stderr = [], []
+    readers = [threading.Thread(target=_read_lines, args=(stream, chunks, reporter), name=f"{stage}-{name}", daemon=True)
+               for stream, chunks, name in ((process.stdout, stdout, "stdout"), (process.stderr, stderr, "stderr"))]
+    for reader in readers:
+        reader.start()
+    try:
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            kill_process_group(process)
+            process.wait()
+            raise StageTimeout(f"Этап {stage} не завершился за {timeout:g} с и был остановлен.")
+        except BaseException:
+            kill_process_group(process)
+            raise
+        finally:
+            for reader in readers:
+                reader.join()
+            process.stdout.close()
+            process.stderr.close()
+    finally:
+        if job is not None:
+            job.detach_process(process)
+        if observer is not None:
+            observer(process, False)
+
+    if job is not None:
+        job.check_cancelled()  # процесс завершён отменой задания
+    return subprocess.CompletedProcess(list(command), process.returncode, b"".join(stdout), b"".join(stderr))
+
+
+class Job:
+    """Задание очереди: функция, её состояние, прогресс и дочерние процессы."""
+    def __init__(self, job_id: int, name: str, function: Callable[["Job"], object], group: str,
+                 replaceable: bool, notify: Callable[["Job"], None]) -> None:
+        self.id = job_id
+        self.name = name
+        self.function = function
+        self.group = group
+        self.replaceable = replaceable
+        self.state = QUEUED
+        self.progress = 0.0
+        self.eta: Optional[float] = None  # оценка оставшегося времени (с)
+        self.warnings: List[str] = []     # предупреждения openvaf и ngspice, полученные во время выполнения
+        self.result = None
+        self.error: Optional[str] = None
+        self.created = time.monotonic()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.superseded = False
+        self.cancel_event = threading.Event()
+        self.processes = set()
+        self.lock = threading.Lock()
+        self.__notify = notify
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished if self.finished is not None else time.monotonic()) - self.started
+
+    def cancel(self, superseded: bool = False):
+        """Помечает задание отменённым и завершает группы его дочерних процессов."""
+        self.superseded = self.superseded or superseded
+        self.cancel_event.set()
+        with self.lock:
+            processes = list(self.processes)
+        for process in processes:
+            kill_process_group(process)
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled(f"Задание «{self.name}» {'заменено' if self.superseded else 'отменено'}.")
+
+    def attach_process(self, process: subprocess.Popen):
+        with self.lock:
+            self.processes.add(process)
+        if self.cancelled:  # отмена пришла во время запуска процесса
+            kill_process_group(process)
+
+    def detach_process(self, process: subprocess.Popen):
+        with self.lock:
+            self.processes.discard(process)
+
+    def report(self, progress: float, eta: Optional[float] = None):
+        """
+        Обновляет прогресс задания (0..1) и уведомляет подписчиков очереди. Прогресс не уменьшается:
+        одновременно выполняющиеся этапы сообщают долю выполнения независимо. Без оценки eta
+        оставшееся время оценивается по прогрессу и времени с начала задания.
+        """
+        from core.progress import MIN_ETA_FRACTION
+
+        self.progress = progress = max(self.progress, progress)
+        if eta is None and MIN_ETA_FRACTION <= progress < 1.0 and self.started is not None:
+            eta = self.elapsed * (1.0 - progress) / progress
+        self.eta = eta
+        self.__notify(self)
+
+    def warn(self, text: str):
+        """Добавляет предупреждение, полученное во время выполнения, и уведомляет подписчиков очереди."""
+        with self.lock:
+            if len(self.warnings) >= WARNINGS_LIMIT:
+                return
+            self.warnings.append(text)
+        self.__notify(self)
+
+
+class JobScheduler:
+    """
+    Ограниченный пул потоков с видимой очередью заданий.
+
+    Подписчики (add_listener) вызываются из потоков пула при каждом изменении состояния или прогресса
+    задания; GUI перенаправляет их в главный цикл через GLib.idle_add.
+    """
+    def __init__(self, max_workers: int = MAX_SIMULATION_JOBS) -> None:
+        self.max_workers = max(max_workers, 1)
+        self.queue: Deque[Job] = deque()
+        self.running: Dict[int, Job] = {}
+        self.history: Deque[Job] = deque(maxlen=HISTORY_SIZE)
+        self.condition = threading.Condition()
+        self.listeners: List[Callable[[Job], None]] = []
+        self.ids = itertools.count(1)
+        self.closed = False
+        self.workers = [threading.Thread(target=self.__work, name=f"job-worker-{i}", daemon=True)
+                        for i in range(self.max_workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def add_listener(self, listener: Callable[[Job], None]):
+        self.listeners.append(listener)
+
+    def __notify(self, job: Job):
+        for listener in self.listeners:
+            listener(job)
+
+    def submit(self, name: str, function: Callable[[Job], object], group: str = "default",
+               replace: bool = False) -> Job:
+        """
+        Ставит задание в очередь.
+
+        Args:
+            name: Название задания в очереди.
+            function: Выполняемая функция; получает задание (прогресс — job.report, отмена — job.check_cancelled).
+            group: Задания одной группы выполняются по очереди.
+            replace: Заменить ещё не начатые и отменить выполняющиеся заменяемые задания той же группы
+                (интерактивный запуск: результат устаревшего запуска не нужен).
+        """
+        job = Job(next(self.ids), name, function, group, replace, self.__notify)
+        replaced = []
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("Очередь заданий закрыта.")
+            if replace:
+                for queued in [item for item in self.queue if item.group == group and item.replaceable]:
+                    self.queue.remove(queued)
+                    queued.cancel(superseded=True)
+                    self.__finish(queued, SUPERSEDED)
+                    replaced.append(queued)
+                for running in self.running.values():
+                    if running.group == group and running.replaceable:
+                        running.cancel(superseded=True)
+            self.queue.append(job)
+            self.condition.notify_all()
+        for item in replaced + [job]:
+            self.__notify(item)
+        return job
+
+    def cancel(self, job: Job):
+        """Отменяет задание: ожидающее удаляется из очереди, у выполняющегося завершаются процессы."""
+        with self.condition:
+            queued = job in self.queue
+            if queued:
+                self.queue.remove(job)
+                self.__finish(job, CANCELLED)
+        job.cancel()
+        if queued:
+            self.__notify(job)
+
+    def cancel_all(self):
+        for job in self.jobs():
+            if job.state not in FINISHED_STATES:
+                self.cancel(job)
+
+    def jobs(self) -> List[Job]:
+        """Завершённые (последние HISTORY_SIZE), выполняющиеся и ожидающие задания в порядке постановки."""
+        with self.condition:
+            return sorted([*self.history, *self.running.values(), *self.queue], key=lambda job: job.id)
+
+    def shutdown(self):
+        """Отменяет все задания и останавливает потоки пула (при закрытии окна)."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.cancel_all()
+
+    def __finish(self, job: Job, state: str):
+        job.state = state
+        job.finished = time.monotonic()
+        self.history.append(job)
+
+    def __next_job(self) -> Optional[Job]:
+        """Первое ожидающее задание, группа которого сейчас не выполняется."""
+        busy = {job.group for job in self.running.values()}
+        return next((job for job in self.queue if job.group not in busy), None)
+
+    def __work(self):
+        while True:
+            with self.condition:
+                job = self.__next_job()
+                while job is None and not self.closed:
+                    self.condition.wait()
+                    job = self.__next_job()
+                if job is None:
+                    return
+                self.queue.remove(job)
+                self.running[job.id] = job
+                job.state = RUNNING
+                job.started = time.monotonic()
+            self.__notify(job)
+
+            state = DONE
+            token = _current_job.set(job)
+            try:
+                job.check_cancelled()
+                job.result = job.function(job)
+                if job.cancelled:
+                    state = SUPERSEDED if job.superseded else CANCELLED
+            except JobCancelled:
+                state = SUPERSEDED if job.superseded else CANCELLED
+            except Exception as e:
+                state = (SUPERSEDED if job.superseded else CANCELLED) if job.cancelled else FAILED
+                job.error = str(e)
+            finally:
+                _current_job.reset(token)
+
+            with self.condition:
+                del self.running[job.id]
+                self.__finish(job, state)
+                self.condition.notify_all()
+            self.__notify(job)
@@ -0,0 +1,2 @@
+RECOMPILE_MODE = "recompile"  # параметры записываются в исходники модели, модель пересобирается
+NETLIST_MODE = "netlist"      # параметры записываются в карточку .model копии схемы, исходники не меняются
@@ -0,0 +1,243 @@
+import os
+import re
+import tempfile
+
+from typing import Dict, List, Optional, Tuple
+
+
+MODULE_PATTERN = re.compile(r"^\s*module\s+(\w+)", re.MULTILINE)
+MODEL_CARD_PATTERN = re.compile(r"^\s*\.model\s+(\S+)\s+(\w+)", re.IGNORECASE)
+CARD_PARAMETER_PATTERN = re.compile(r"(\w+)\s*=\s*([^\s=()]+)")
+PRINT_REDIRECT_PATTERN = re.compile(r"\s*>>?\s*\S+\s*$")
+INLINE_COMMENT_PATTERN = re.compile(r"(;|(?<=\s)\$).*$")  # ; или $ после пробела — комментарий до конца строки
+INCLUDE_PATTERN = re.compile(r"^\s*\.(include|inc|lib)\s+(\"[^\"]+\"|'[^']+'|\S+)(\s+\S+)?", re.IGNORECASE)
+
+
+def result_file_extension(output_format: str) -> str:
+    """Расширение файла результатов для формата вывода."""
+    return ".raw" if output_format == "raw" else ".txt"
+
+
+def netlist_includes(spice_file: str) -> List[str]:
+    """
+    Файлы, подключаемые схемой командами .include/.inc и .lib <файл> <секция>, рекурсивно
+    (пути относительно подключающего файла). Строка .lib с одним аргументом — заголовок секции
+    библиотеки, а не подключение. Отсутствующие файлы тоже возвращаются.
+    """
+    found, pending = [], [os.path.abspath(spice_file)]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(current, "r", errors="replace") as file:
+                lines = file.readlines()
+        except OSError:
+            continue
+        for line in lines:
+            match = INCLUDE_PATTERN.match(line)
+            if not match or match.group(1).lower() == "lib" and not match.group(3):
+                continue
+            path = os.path.join(os.path.dirname(current), os.path.expanduser(match.group(2).strip("\"'")))
+            path = os.path.abspath(path)
+            if path not in found and path != os.path.abspath(spice_file):
+                found.append(path)
+                pending.append(path)
+    return found
+
+
+def get_va_module_name(va_file: str) -> Optional[str]:
+    """Возвращает имя первого модуля (module ...) в .va файле — оно же тип модели в .model карточке."""
+    with open(va_file, "r", errors="replace") as file:
+        match = MODULE_PATTERN.search(file.read())
+    return match.group(1) if match else None
+
+
+def find_model_cards(lines: List[str]) -> List[Tuple[int, int, str, str]]:
+    """
+    Находит в схеме все карточки .model вместе со строками-продолжениями ('+').
+
+    Returns:
+        List[Tuple[int, int, str, str]]: (индекс первой строки, индекс после последней строки, имя модели, тип модели).
+    """
+    cards = []
+    i = 0
+    while i < len(lines):
+        match = MODEL_CARD_PATTERN.match(lines[i])
+        if not match:
+            i += 1
+            continue
+        end = i + 1
+        while end < len(lines) and lines[end].lstrip().startswith("+"):
+            end += 1
+        cards.append((i, end, match.group(1), match.group(2)))
+        i = end
+    return cards
+
+
+def select_model_card(lines: List[str], model_types: List[str]) -> Tuple[int, int, str, str]:
+    """
+    Выбирает карточку .model, тип которой совпадает с одним из model_types (без учёта регистра).
+    Если совпадений нет, но карточка в схеме единственная, возвращается она.
+    """
+    cards = find_model_cards(lines)
+    wanted = {model_type.lower() for model_type in model_types if model_type}
+    matching = [card for card in cards if card[3].lower() in wanted]
+
+    if matching:
+        return matching[0]
+    if len(cards) == 1:
+        return cards[0]
+    raise ValueError(f"В схеме не найдена карточка .model для модели {', '.join(model_types)}.")
+
+
+def inject_model_parameters(lines: List[str], model_types: List[str], parameters: Dict[str, str]) -> List[str]:
+    """
+    Записывает значения параметров в карточку .model: существующие значения заменяются,
+    отсутствующие параметры добавляются в конец карточки.
+
+    Args:
+        lines (List[str]): Строки схемы.
+        model_types (List[str]): Возможные типы модели (имя модуля Verilog-A, имя .va файла).
+        parameters (Dict[str, str]): Новые значения параметров.
+
+    Returns:
+        List[str]: Новые строки схемы.
+    """
+    start, end, model_name, model_type = select_model_card(lines, model_types)
+
+    # встроенные комментарии отбрасываются в каждой строке карточки до объединения строк
+    card_text = " ".join(INLINE_COMMENT_PATTERN.sub("", line.strip()).lstrip("+") for line in lines[start:end])
+    card_body = card_text.split(None, 3)[3] if len(card_text.split(None, 3)) > 3 else ""
+
+    values: Dict[str, str] = {}
+    for name, value in CARD_PARAMETER_PATTERN.findall(card_body):
+        values[name.lower()] = value
+
+    for name, value in parameters.items():
+        value = str(value).strip()
+        if value:
+            values[name.lower()] = value
+
+    card_lines = [f".model {model_name} {model_type} (\n"]
+    card_lines += [f"+ {name}={value}\n" for name, value in values.items()]
+    card_lines.append("+ )\n")
+
+    return lines[:start] + card_lines + lines[end:]
+
+
+def redirect_print_output(lines: List[str], result_file: str) -> List[str]:
+    """
+    Перенаправляет вывод всех команд print блока .control в файл result_file.
+    Если команда print была без перенаправления, перенаправление добавляется.
+    Первая команда перезаписывает файл, последующие дописывают в него.
+    """
+    updated_lines = []
+    redirect = ">"
+    for line in lines:
+        if line.strip().lower().startswith("print"):
+            command = PRINT_REDIRECT_PATTERN.sub("", line.strip())
+            line = f"{command} {redirect} {result_file}\n"
+            redirect = ">>"
+        updated_lines.append(line)
+    return updated_lines
+
+
+def redirect_output_to_rawfile(lines: List[str], raw_file: str) -> List[str]:
+    """
+    Заменяет каждую команду print блока .control командой write тех же векторов в бинарный rawfile.
+    Команды остаются на своих местах, поэтому каждая записывает векторы своего анализа отдельным
+    набором результатов (plot); после первой команды включается дозапись (appendwrite).
+    """
+    updated_lines = []
+    writes = 0
+    for line in lines:
+        if not line.strip().lower().startswith("print"):
+            updated_lines.append(line)
+            continue
+        command = PRINT_REDIRECT_PATTERN.sub("", line.strip())
+        expressions = [e for e in command.split()[1:] if e.lower() not in ("col", "line")]
+        if writes == 0:
+            updated_lines.append("set filetype=binary\n")
+        updated_lines.append(f"write {raw_file} {' '.join(expressions)}\n")
+        if writes == 0:
+            updated_lines.append("set appendwrite\n")
+        writes += 1
+
+    if writes == 0:
+        raise ValueError("В схеме не найдена команда print для сохранения результатов.")
+    return updated_lines
+
+
+def redirect_osdi_library(lines: List[str], osdi_file: str) -> List[str]:
+    """Заменяет путь в командах pre_osdi, загружающих библиотеку с тем же именем, что и osdi_file."""
+    osdi_name = os.path.basename(osdi_file)
+    updated_lines = []
+    for line in lines:
+        parts = line.split(None, 1)
+        if len(parts) == 2 and parts[0].lower() == "pre_osdi" and os.path.basename(parts[1].strip()) == osdi_name:
+            line = f"pre_osdi {osdi_file}\n"
+        updated_lines.append(line)
+    return updated_lines
+
+
+def split_control_block(lines: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Разделяет схему на описание цепи и команды блока .control.
+
+    Returns:
+        Tuple[List[str], List[str]]: (строки цепи с .end, команды блока .control без пустых строк и комментариев).
+    """
+    circuit_lines = []
+    control_commands = []
+    in_control = False
+    for line in lines:
+        stripped = line.strip()
+        lowered = stripped.lower()
+        if lowered.startswith(".control"):
+            in_control = True
+            continue
+        if lowered.startswith(".endc"):
+            in_control = False
+            continue
+        if in_control:
+            if stripped and not stripped.startswith("*"):
+                control_commands.append(stripped)
+        elif lowered != ".end":
+            circuit_lines.append(line.rstrip("\n"))
+    circuit_lines.append(".end")
+    return circuit_lines, control_commands
+
+
+def write_scratch_netlist(spice_file: str, model_types: List[str], parameters: Dict[str, str],
+                          result_file: Optional[str] = None, output_format: str = "print",
+                          osdi_file: Optional[str] = None, directory: Optional[str] = None) -> str:
+    """
+    Создаёт временную копию схемы с параметрами, записанными в карточку .model.
+
+    Копия создаётся в той же директории, что и исходная схема, чтобы относительные пути
+    (.include, pre_osdi) продолжали работать. Исходный файл не изменяется.
+    Если задан result_file, вывод команд print перенаправляется в него
+    (при output_format="raw" — заменяется командой write в бинарный rawfile).
+    Если задан osdi_file, команда pre_osdi загружает эту библиотеку вместо исходной.
+    В directory можно указать другую директорию для копии (относительные пути тогда должны быть учтены вызывающим кодом).
+
+    Returns:
+        str: Путь к временной схеме. Удаление файла — ответственность вызывающего кода.
+    """
+    with open(spice_file, "r") as file:
+        lines = file.readlines()
+
+    if parameters:
+        lines = inject_model_parameters(lines, model_types, parameters)
+    if result_file and output_format == "raw":
+        lines = redirect_output_to_rawfile(lines, result_file)
+    elif result_file:
+        lines = redirect_print_output(lines, result_file)
+    if osdi_file:
+        lines = redirect_osdi_library(lines, osdi_file)
+
+    directory = directory or os.path.dirname(os.path.abspath(spice_file))
+    base_name = os.path.splitext(os.path.basename(spice_file))[0]
+    fd, scratch_path = tempfile.mkstemp(prefix=f".{base_name}_", suffix=".sp", dir=directory)
+    with os.fdopen(fd, "w") as file:
+        file.writelines(lines)
+    return scratch_path
@@ -0,0 +1,129 @@
+import os
+import re
+import hashlib
+import subprocess
+
+from typing import Callable, Dict, List, Optional
+
+from core.disk_cache import DiskCache, link_or_copy
+
+
+INCLUDE_PATTERN = re.compile(r'^\s*`include\s+"([^"]+)"', re.MULTILINE)
+
+_openvaf_versions: Dict[tuple, str] = {}  # версия компилятора по (путь, mtime, размер)
+
+
+def collect_model_sources(va_file: str) -> List[str]:
+    """
+    Собирает список файлов модели: сам .va и все файлы, подключённые через `include (рекурсивно).
+
+    Подключаемые файлы ищутся относительно подключающего файла и относительно каталога модели.
+    Порядок списка соответствует порядку первого подключения.
+    """
+    model_dir = os.path.dirname(os.path.abspath(va_file))
+    sources: List[str] = []
+    seen = set()
+
+    def visit(path: str):
+        path = os.path.abspath(path)
+        if path in seen:
+            return
+        seen.add(path)
+        sources.append(path)
+
+        with open(path, "rb") as file:
+            content = file.read().decode("utf-8", errors="replace")
+
+        for include_name in INCLUDE_PATTERN.findall(content):
+            for base_dir in (os.path.dirname(path), model_dir):
+                candidate = os.path.join(base_dir, include_name)
+                if os.path.exists(candidate):
+                    visit(candidate)
+                    break
+            # системные заголовки (disciplines.vams и т.п.) встроены в openvaf и могут отсутствовать на диске
+
+    visit(va_file)
+    return sources
+
+
+def get_openvaf_version(command: str, cwd: str) -> str:
+    """
+    Возвращает строку версии openvaf. Результат кэшируется на время работы процесса.
+    Если версию получить не удалось, используется отпечаток исполняемого файла (размер и mtime).
+    """
+    executable = os.path.join(cwd, command) if os.path.dirname(command) else command
+    try:
+        stat = os.stat(executable)
+        fingerprint = (os.path.abspath(executable), stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        fingerprint = (command, None, None)
+
+    if fingerprint not in _openvaf_versions:
+        try:
+            result = subprocess.run([command, "--version"], cwd=cwd, capture_output=True, timeout=10)
+            version = result.stdout.decode("utf-8", errors="replace").strip()
+        except (OSError, subprocess.SubprocessError):
+            version = ""
+        _openvaf_versions[fingerprint] = version or f"unknown:{fingerprint[1]}:{fingerprint[2]}"
+
+    return _openvaf_versions[fingerprint]
+
+
+def read_file(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def compute_source_key(va_file: str, defines: Optional[Dict[str, str]] = None, compiler_version: str = "",
+                       contents: Callable[[str], bytes] = read_file) -> str:
+    """
+    Вычисляет ключ кэша: SHA-256 от содержимого модели и всех подключённых файлов,
+    набора макроопределений и версии компилятора.
+
+    Args:
+        contents: Содержимое файла модели по пути (например, исходная версия файла,
+            core/reference_data.original_content); по умолчанию — текущее содержимое.
+    """
+    model_dir = os.path.dirname(os.path.abspath(va_file))
+    digest = hashlib.sha256()
+    digest.update(f"openvaf:{compiler_version}\n".encode("utf-8"))
+
+    for name, value in sorted((defines or {}).items()):
+        digest.update(f"define:{name}={value}\n".encode("utf-8"))
+
+    for path in collect_model_sources(va_file):
+        digest.update(f"file:{os.path.relpath(path, model_dir)}\n".encode("utf-8"))
+        digest.update(contents(path))
+        digest.update(b"\n")
+
+    return digest.hexdigest()
+
+
+class OSDICache:
+    """
+    Content-addressed кэш скомпилированных osdi-моделей.
+
+    Ключ — хэш полного исходного кода модели (с подключёнными файлами), макроопределений
+    и версии openvaf. При попадании osdi-файл не компилируется, а связывается (или копируется)
+    из кэша в целевую директорию.
+    """
+    def __init__(self, directory: str, max_size: int) -> None:
+        self.storage = DiskCache(directory=directory, max_size=max_size, suffix=".osdi")
+
+    def fetch(self, key: str, destination_path: str) -> bool:
+        """
+        Размещает закэшированный osdi-файл по пути destination_path.
+
+        Returns:
+            bool: True при попадании в кэш, False при промахе.
+        """
+        cached_path = self.storage.lookup(key)
+        if cached_path is None:
+            return False
+        os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+        link_or_copy(cached_path, destination_path)
+        return True
+
+    def store(self, key: str, osdi_path: str):
+        """Сохраняет скомпилированный osdi-файл в кэш."""
+        self.storage.store(key, osdi_path)
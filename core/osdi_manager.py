@@ -1,44 +1,113 @@
 import os
 import platform
-import subprocess
 
-from config import OSDILIBS_PATH
+from typing import Dict, Optional
+
+from core.jobs import run_process
+from core.progress import OutputParser
+from core.osdi_cache import OSDICache, compute_source_key, get_openvaf_version
+from utils.tracing import span
+from config import OSDILIBS_PATH, OSDI_CACHE_PATH, OSDI_CACHE_MAX_SIZE
 
 
 class OSDIManager:
-    def __init__(self, model_path: str, vamodel_name: str) -> None:
+    def __init__(self, model_path: str, vamodel_name: str, defines: Optional[Dict[str, str]] = None,
+                 cache: Optional[OSDICache] = None, osdi_dir: str = OSDILIBS_PATH, keyed_name: bool = False) -> None:
+        """
+        Args:
+            keyed_name: osdi-файл в osdi_dir называется по ключу кэша (<модель>_<ключ>.osdi), чтобы варианты
+                модели с разными defines не заменяли друг друга.
+        """
         self.model_path = model_path
         self.vamodel_name = vamodel_name
+        self.osdi_dir = osdi_dir
+        self.keyed_name = keyed_name
+        self.defines = defines or {}
+        self.cache = cache if cache is not None else OSDICache(OSDI_CACHE_PATH, OSDI_CACHE_MAX_SIZE)
+        self.cache_key = None
+        self.cache_hit = False
 
-    def rebuild_osdi(self):
-        """Пересборка osdi-модели."""
-
-        if not self.vamodel_name:
-            raise FileNotFoundError("Файл .va не выбран для модели.")
-        
+    @staticmethod
+    def get_compiler_command() -> str:
         current_os = platform.system()
         if current_os == "Windows":
-            command = "openvaf.exe"
+            return "openvaf.exe"
         elif current_os == "Linux":
-            command = "./openvaf"
-        else:
-            raise OSError("Unsupported operating system")
-        
-        try:
-            subprocess.run([command, self.vamodel_name], cwd=self.model_path, check=True)
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"Ошибка при пересборке osdi-модели: {e}")
+            return "./openvaf"
+        raise OSError("Unsupported operating system")
+
+    def compute_key(self) -> str:
+        """Вычисляет ключ osdi-кэша по исходникам модели, не размещая osdi-файл (например, для ключей других кэшей)."""
+        if not self.vamodel_name:
+            raise FileNotFoundError("Файл .va не выбран для модели.")
+
+        version = get_openvaf_version(self.get_compiler_command(), cwd=self.model_path)
+        self.cache_key = compute_source_key(os.path.join(self.model_path, self.vamodel_name), self.defines, version)
+        return self.cache_key
+
+    def fetch_cached(self) -> bool:
+        """
+        Вычисляет ключ osdi-кэша по исходникам модели и при попадании размещает osdi-файл из кэша
+        в директории osdi_dir. Ключ нужен и без компиляции (манифест эталонных данных), поэтому
+        этот шаг выполняется отдельно от rebuild_osdi.
+
+        Returns:
+            bool: True при попадании в кэш.
+        """
+        with span("Ключ osdi-кэша") as current:
+            self.cache_hit = self.cache.fetch(self.compute_key(), self.get_osdi_path())
+            current.set(hit=self.cache_hit)
+        return self.cache_hit
+
+    def rebuild_osdi(self) -> bool:
+        """
+        Пересборка osdi-модели.
+
+        Если модель с тем же исходным кодом уже компилировалась, osdi-файл берётся из кэша
+        и сразу размещается в директории osdi_dir (по умолчанию OSDILIBS_PATH), а openvaf не запускается.
+
+        Returns:
+            bool: True при попадании в кэш, False если была выполнена компиляция.
+        """
+        if self.cache_key is None:
+            self.fetch_cached()
+        if self.cache_hit:
+            return True
+
+        command = self.get_compiler_command()
+        define_args = []
+        for name, value in self.defines.items():
+            define_args += ["-D", f"{name}={value}" if value else name]
+
+        with span("openvaf", model=self.vamodel_name):
+            result = run_process([command, *define_args, self.vamodel_name], stage="openvaf", cwd=self.model_path,
+                                 output_parser=OutputParser())
+        if result.returncode != 0:
+            output = (result.stderr or result.stdout).decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"Ошибка при пересборке osdi-модели (код {result.returncode}):\n{output}")
+        return False
+
+    def get_osdi_path(self) -> str:
+        """Путь к osdi-файлу модели в директории osdi_dir (с keyed_name — после вычисления ключа)."""
+        if self.keyed_name:
+            if self.cache_key is None:
+                self.compute_key()
+            return os.path.join(self.osdi_dir, self.vamodel_name.replace(".va", f"_{self.cache_key[:16]}.osdi"))
+        return os.path.join(self.osdi_dir, self.vamodel_name.replace(".va", ".osdi"))
 
     def move_osdi_file(self):
-        """Перемещение osdi-файла в директорию OSDILIBS_PATH."""
+        """Перемещение osdi-файла в директорию osdi_dir (по умолчанию OSDILIBS_PATH) и сохранение его в кэш."""
+        if self.cache_hit:
+            return  # файл уже размещён из кэша
+
         osdi_name = self.vamodel_name.replace(".va", ".osdi")
         source_path = os.path.join(self.model_path, osdi_name)
 
         if not os.path.exists(source_path):
             raise FileNotFoundError(f"Файл {osdi_name} не найден в {self.model_path} после пересборки.")
 
-        os.makedirs(OSDILIBS_PATH, exist_ok=True)
-        dst = os.path.join(OSDILIBS_PATH, osdi_name)
+        os.makedirs(self.osdi_dir, exist_ok=True)
+        dst = self.get_osdi_path()
 
         try:
             if os.path.exists(dst):
@@ -47,3 +116,9 @@ class OSDIManager:
             os.rename(source_path, dst)
         except Exception as e:
             raise RuntimeError(f"Ошибка при перемещении файла {osdi_name}: {e}")
+
+        if self.cache_key:
+            try:
+                self.cache.store(self.cache_key, dst)
+            except OSError as e:
+                print(f"Не удалось сохранить {osdi_name} в кэш: {e}")
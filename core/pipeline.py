@@ -0,0 +1,185 @@
+"""
+Асинхронный граф этапов запуска.
+
+Этапы (ключ osdi-кэша, компиляция, перемещение osdi, проверка эталона, эталонная и пользовательские
+симуляции, построение графика) — asyncio-задачи с явными зависимостями: этап начинается, когда
+готовы результаты этапов, от которых он зависит, поэтому независимые этапы выполняются одновременно.
+Блокирующие функции выполняются в потоках (asyncio.to_thread) с копией контекста: процессы
+принадлежат текущему заданию очереди (core/jobs), а его отмена прерывает этапы.
+
+Число одновременно работающих процессов ограничивается семафорами по ресурсам (PIPELINE_LIMITS:
+openvaf, ngspice); этапы с общим ключом блокировки (например, компиляции вариантов модели,
+которые записывают один и тот же .osdi файл) выполняются по очереди.
+"""
+
+import asyncio
+import inspect
+import contextlib
+
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Sequence
+
+from core.jobs import check_cancelled, progress_range
+from config import PIPELINE_LIMITS
+
+
+class Stage:
+    def __init__(self, name: str, function: Callable, depends: Sequence[str], resource: Optional[str],
+                 lock: Optional[str], weight: float, main_loop: bool) -> None:
+        self.name = name
+        self.function = function
+        self.depends = tuple(depends)
+        self.resource = resource
+        self.lock = lock
+        self.weight = weight
+        self.main_loop = main_loop
+
+
+class Pipeline:
+    """
+    Граф этапов. Функция этапа получает результаты зависимостей позиционными аргументами
+    в порядке depends; результат этапа доступен зависящим от него этапам и в словаре run().
+
+    Args:
+        limits: Максимальное число одновременно выполняемых этапов каждого ресурса (по умолчанию PIPELINE_LIMITS).
+        dispatch: Выполнение этапов main_loop=True в главном цикле GUI: dispatch(function, *args)
+            возвращает concurrent.futures.Future с результатом. Без dispatch такие этапы
+            выполняются в потоке, как остальные.
+    """
+    def __init__(self, limits: Optional[Dict[str, int]] = None,
+                 dispatch: Optional[Callable[..., Future]] = None) -> None:
+        self.limits = dict(PIPELINE_LIMITS if limits is None else limits)
+        self.dispatch = dispatch
+        self.stages: Dict[str, Stage] = {}
+        self.results: Dict[str, object] = {}
+        self.completed = 0.0
+        self.on_progress: Optional[Callable[[float], None]] = None
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.locks: Dict[str, asyncio.Lock] = {}
+
+    def add(self, name: str, function: Callable, depends: Sequence[str] = (), resource: Optional[str] = None,
+            lock: Optional[str] = None, weight: float = 1.0, main_loop: bool = False) -> str:
+        """
+        Добавляет этап.
+
+        Args:
+            name: Имя этапа (уникальное).
+            function: Функция или корутинная функция этапа.
+            depends: Имена этапов, результаты которых нужны этому этапу (должны быть добавлены раньше).
+            resource: Ресурс ("openvaf", "ngspice"), число одновременных этапов которого ограничено.
+            lock: Ключ блокировки: этапы с одним ключом не выполняются одновременно.
+            weight: Доля этапа в общем прогрессе (относительно остальных этапов).
+            main_loop: Выполнять этап в главном цикле GUI (через dispatch).
+        """
+        if name in self.stages:
+            raise ValueError(f"Этап {name} уже добавлен.")
+        unknown = [dependency for dependency in depends if dependency not in self.stages]
+        if unknown:
+            raise ValueError(f"Этап {name} зависит от неизвестных этапов: {', '.join(unknown)}")
+        self.stages[name] = Stage(name, function, depends, resource, lock, weight, main_loop)
+        return name
+
+    @property
+    def total_weight(self) -> float:
+        return sum(stage.weight for stage in self.stages.values()) or 1.0
+
+    async def run(self) -> Dict[str, object]:
+        """
+        Выполняет все этапы. При ошибке этапа остальные ещё не завершённые этапы отменяются
+        и ошибка передаётся вызывающему.
+
+        Returns:
+            dict: Результаты этапов по именам.
+        """
+        self.completed = 0.0
+        self.semaphores = {resource: asyncio.Semaphore(max(limit, 1)) for resource, limit in self.limits.items()}
+        self.locks = {stage.lock: asyncio.Lock() for stage in self.stages.values() if stage.lock}
+        tasks: Dict[str, asyncio.Task] = {}
+        for name, stage in self.stages.items():
+            tasks[name] = asyncio.create_task(self.__run_stage(stage, tasks), name=name)
+
+        try:
+            await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_EXCEPTION)
+        except asyncio.CancelledError:
+            await self.__cancel(tasks.values())
+            raise
+        # ошибка этапа передаётся и зависящим от него этапам: первой считается ошибка раньше добавленного этапа
+        errors = [task.exception() for task in tasks.values() if task.done() and not task.cancelled()]
+        error = next((error for error in errors if error is not None), None)
+        if error is not None:
+            await self.__cancel(tasks.values())
+            raise error
+
+        self.results = {name: task.result() for name, task in tasks.items()}
+        return self.results
+
+    @staticmethod
+    async def __cancel(tasks):
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def __run_stage(self, stage: Stage, tasks: Dict[str, asyncio.Task]):
+        arguments = [await tasks[dependency] for dependency in stage.depends]
+        check_cancelled()
+
+        async with contextlib.AsyncExitStack() as stack:
+            if stage.resource in self.semaphores:
+                await stack.enter_async_context(self.semaphores[stage.resource])
+            if stage.lock:
+                await stack.enter_async_context(self.locks[stage.lock])
+
+            # вывод процессов этапа (core/progress) заполняет его долю прогресса
+            start = self.completed / self.total_weight
+            with progress_range(start, start + stage.weight / self.total_weight):
+                if stage.main_loop and self.dispatch is not None:
+                    result = await asyncio.wrap_future(self.dispatch(stage.function, *arguments))
+                elif inspect.iscoroutinefunction(stage.function):
+                    result = await stage.function(*arguments)
+                else:
+                    result = await asyncio.to_thread(stage.function, *arguments)
+
+        self.completed += stage.weight
+        if self.on_progress is not None:
+            self.on_progress(self.completed / self.total_weight)
+        return result
+
+    def stream(self):
+        """
+        Выполняет граф в новом цикле событий текущего потока и выдаёт прогресс (0..1) после
+        каждого завершённого этапа — для синхронных вызывающих (генератор run_simulation).
+        Результаты этапов после завершения доступны в self.results.
+        """
+        loop = asyncio.new_event_loop()
+        task = None
+        try:
+            queue: asyncio.Queue = asyncio.Queue()
+            self.on_progress = queue.put_nowait
+            task = loop.create_task(self.run())
+            while True:
+                getter = loop.create_task(queue.get())
+                loop.run_until_complete(asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED))
+                if not getter.done():
+                    getter.cancel()
+                    loop.run_until_complete(asyncio.gather(getter, return_exceptions=True))
+                    break
+                yield getter.result()
+            while not queue.empty():
+                yield queue.get_nowait()
+            task.result()
+        finally:
+            self.on_progress = None
+            if task is not None and not task.done():
+                task.cancel()  # генератор закрыт до завершения графа
+                loop.run_until_complete(asyncio.gather(task, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+
+
+def run_pipeline(pipeline: Pipeline) -> Dict[str, object]:
+    """Выполняет граф этапов синхронно и возвращает результаты этапов."""
+    for _ in pipeline.stream():
+        pass
+    return pipeline.results
+
@@ -0,0 +1,166 @@
+"""
+Прогресс симуляции по выводу openvaf и ngspice.
+
+Во время анализа ngspice периодически выводит в stderr строку «Reference value : <значение>»
+(текущее значение шкалы: напряжение источника DC-свипа, время переходного процесса, частота),
+а libngspice передаёт состояние строками вида «tran 45.3%». По командам анализа схемы значение
+шкалы переводится в долю выполнения; для нескольких анализов доля делится между ними поровну
+(начало очередного анализа отмечается строкой «Doing analysis at TEMP = ...»).
+
+Строки с предупреждениями и ошибками (warning:, Error: ...) выделяются, чтобы показать их
+до завершения процесса.
+"""
+
+import re
+import math
+import time
+
+from typing import List, Optional, Sequence, Tuple
+
+from utils.spice_values import parse_spice_number
+from core.netlist import split_control_block
+
+
+REFERENCE_PATTERN = re.compile(r"Reference value\s*:\s*([-+]?[\d.]+(?:[eE][-+]?\d+)?)")
+PERCENT_PATTERN = re.compile(r"^\s*(?:stdout\s+|stderr\s+)?[A-Za-z]+\s*:?\s*(\d+(?:\.\d+)?)\s*%")
+ANALYSIS_START_PATTERN = re.compile(r"^\s*Doing analysis at TEMP", re.IGNORECASE)
+WARNING_PATTERN = re.compile(r"^\s*(?:stdout\s+|stderr\s+)?(warning|error)\b", re.IGNORECASE)
+
+ANALYSIS_KEYWORDS = ("dc", "tran", "ac", "op", "noise", "sp", "pz", "disto", "sens", "tf")
+MIN_ETA_FRACTION = 0.02  # до этой доли выполнения оценка оставшегося времени слишком неточна
+
+
+class SweepAnalysis:
+    """
+    Анализ со шкалой от start до stop: dc (с вложенным вторым источником), tran, ac.
+
+    Для DC-свипа с двумя источниками «Reference value» — значение первого (внутреннего) источника;
+    число пройденных точек второго источника определяется по возвратам значения к началу.
+    """
+    def __init__(self, start: float, stop: float, logarithmic: bool = False, outer_points: int = 1) -> None:
+        self.start = start
+        self.stop = stop
+        self.logarithmic = logarithmic and start > 0 and stop > 0
+        self.outer_points = max(outer_points, 1)
+        self.outer_done = 0
+        self.previous: Optional[float] = None
+
+    def fraction(self, value: float) -> float:
+        if self.previous is not None and self.outer_points > 1:
+            span = abs(self.stop - self.start)
+            if abs(value - self.start) < abs(self.previous - self.start) - 0.5 * span:
+                self.outer_done = min(self.outer_done + 1, self.outer_points - 1)
+        self.previous = value
+
+        if self.stop == self.start:
+            inner = 1.0
+        elif self.logarithmic and value > 0:
+            inner = math.log(value / self.start) / math.log(self.stop / self.start)
+        else:
+            inner = (value - self.start) / (self.stop - self.start)
+        inner = min(max(inner, 0.0), 1.0)
+        return (self.outer_done + inner) / self.outer_points
+
+
+def sweep_points(start: float, stop: float, step: float) -> int:
+    if step == 0:
+        return 1
+    return max(int(round(abs((stop - start) / step))) + 1, 1)
+
+
+def parse_analysis(command: str) -> Optional[SweepAnalysis]:
+    """
+    Шкала анализа по команде (dc, tran, ac; с точкой или без); None для анализов без шкалы
+    (op и др.) и команд, которые не удалось разобрать.
+    """
+    words = command.split()
+    if not words:
+        return None
+    keyword = words[0].lower().lstrip(".")
+    try:
+        if keyword == "dc" and len(words) >= 5:
+            start, stop = parse_spice_number(words[2]), parse_spice_number(words[3])
+            outer_points = 1
+            if len(words) >= 9:
+                outer_points = sweep_points(*(parse_spice_number(word) for word in words[6:9]))
+            return SweepAnalysis(start, stop, outer_points=outer_points)
+        if keyword == "tran" and len(words) >= 3:
+            return SweepAnalysis(0.0, parse_spice_number(words[2]))
+        if keyword == "ac" and len(words) >= 5:
+            return SweepAnalysis(parse_spice_number(words[3]), parse_spice_number(words[4]),
+                                 logarithmic=words[1].lower() in ("dec", "oct"))
+    except ValueError:
+        return None
+    return None
+
+
+def netlist_analyses(lines: Sequence[str]) -> List[str]:
+    """Команды анализа схемы: карточки .dc/.tran/.ac/... и команды блока .control в порядке выполнения."""
+    circuit_lines, control_commands = split_control_block(list(lines))
+    commands = [line.strip() for line in circuit_lines if line.strip().startswith(".")]
+    return [command for command in commands + control_commands
+            if command.split()[0].lower().lstrip(".") in ANALYSIS_KEYWORDS]
+
+
+class OutputParser:
+    """
+    Разбор строк вывода процесса: доля выполнения (0..1) и текст предупреждения.
+
+    Args:
+        analyses: Команды анализа схемы (netlist_analyses); без них учитываются только строки
+            с процентами, а «Reference value» не переводится в долю.
+    """
+    def __init__(self, analyses: Sequence[str] = ()) -> None:
+        self.analyses = [parse_analysis(command) for command in analyses]
+        self.index = -1  # номер выполняющегося анализа
+
+    def feed(self, line: str) -> Tuple[Optional[float], Optional[str]]:
+        if WARNING_PATTERN.match(line):
+            text = line.strip()
+            return None, text[7:] if text.lower().startswith(("stdout ", "stderr ")) else text
+
+        if ANALYSIS_START_PATTERN.match(line):
+            self.index = min(self.index + 1, len(self.analyses) - 1)
+            return self.__overall(0.0), None
+
+        match = REFERENCE_PATTERN.search(line)
+        if match and self.analyses:
+            self.index = max(self.index, 0)
+            analysis = self.analyses[self.index]
+            if analysis is None:
+                return None, None
+            return self.__overall(analysis.fraction(float(match.group(1)))), None
+
+        match = PERCENT_PATTERN.match(line)
+        if match:
+            fraction = min(float(match.group(1)) / 100.0, 1.0)
+            return self.__overall(fraction) if self.analyses else fraction, None
+        return None, None
+
+    def __overall(self, fraction: float) -> Optional[float]:
+        if not self.analyses:
+            return None
+        index = max(self.index, 0)
+        return (index + fraction) / len(self.analyses)
+
+
+class ProgressEstimate:
+    """Оценка оставшегося времени по доле выполнения и времени с начала этапа."""
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+
+    def remaining(self, fraction: float) -> Optional[float]:
+        if fraction < MIN_ETA_FRACTION or fraction >= 1.0:
+            return None
+        elapsed = time.monotonic() - self.started
+        return elapsed * (1.0 - fraction) / fraction
+
+
+def format_remaining(seconds: Optional[float]) -> str:
+    """Оставшееся время для строки состояния: «~12 с», «~3 мин 05 с»; пустая строка без оценки."""
+    if seconds is None:
+        return ""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"~{seconds} с"
+    return f"~{seconds // 60} мин {seconds % 60:02d} с"
@@ -0,0 +1,133 @@
+import os
+import json
+import shutil
+import hashlib
+
+from typing import Dict, Optional, Tuple
+
+from core.netlist import netlist_includes
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 содержимого файла."""
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def original_paths(path: str, directory: str) -> Tuple[str, str]:
+    """Файлы исходной версии path в directory: (содержимое, запись с хэшем последней записи приложением)."""
+    name = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()[:32]
+    return os.path.join(directory, f"{name}.orig"), os.path.join(directory, f"{name}.json")
+
+
+def preserve_original(path: str, directory: str):
+    """
+    Сохраняет исходную версию файла модели перед его изменением приложением (запись значений
+    параметров). Исходная версия сохраняется один раз; если после последней записи приложением
+    файл изменили извне (правка модели), исходной считается его текущая версия.
+    """
+    content_path, record_path = original_paths(path, directory)
+    record = load_json(record_path)
+    if record is not None and record.get("written") == file_digest(path) and os.path.exists(content_path):
+        return
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{content_path}.{os.getpid()}.tmp"
+    shutil.copyfile(path, tmp_path)
+    os.replace(tmp_path, content_path)
+    record_written(path, directory)
+
+
+def record_written(path: str, directory: str):
+    """Запоминает хэш файла после его записи приложением."""
+    _, record_path = original_paths(path, directory)
+    save_json(record_path, {"path": os.path.abspath(path), "written": file_digest(path)})
+
+
+def original_content(path: str, directory: str) -> bytes:
+    """
+    Содержимое исходной версии файла: сохранённое preserve_original, если файл не менялся
+    после последней записи приложением, иначе текущее содержимое файла.
+    """
+    content_path, record_path = original_paths(path, directory)
+    record = load_json(record_path)
+    if record is not None and record.get("written") == file_digest(path) and os.path.exists(content_path):
+        with open(content_path, "rb") as file:
+            return file.read()
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def load_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def save_json(path: str, data: dict):
+    """Атомарно записывает JSON (временный файл и переименование)."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(data, file, indent=2)
+    os.replace(tmp_path, path)
+
+
+def manifest_path(result_file: str) -> str:
+    """Путь к манифесту эталонных данных, хранящемуся рядом с файлом результатов."""
+    return os.path.splitext(result_file)[0] + ".json"
+
+
+def include_digests(spice_file: str) -> Dict[str, str]:
+    """Хэши файлов, подключаемых схемой, по путям относительно её каталога ("missing" — файла нет)."""
+    directory = os.path.dirname(os.path.abspath(spice_file))
+    digests = {}
+    for path in netlist_includes(spice_file):
+        try:
+            digests[os.path.relpath(path, directory)] = file_digest(path)
+        except OSError:
+            digests[os.path.relpath(path, directory)] = "missing"
+    return digests
+
+
+def build_reference_manifest(model_key: Optional[str], spice_file: str, simulator_version: str,
+                             output_format: str) -> Dict[str, object]:
+    """
+    Формирует манифест эталонных данных.
+
+    Args:
+        model_key (str): Хэш исходных версий файлов модели (со значениями параметров по умолчанию,
+            см. original_content) — ключ osdi-кэша эталонной модели; None — исходники не учитываются.
+        spice_file (str): Схема, по которой получены эталонные данные (с подключаемыми файлами .include, .lib).
+        simulator_version (str): Версия симулятора.
+        output_format (str): Формат файла результатов.
+    """
+    return {
+        "model": model_key,
+        "netlist": file_digest(spice_file),
+        "includes": include_digests(spice_file),
+        "simulator": simulator_version,
+        "format": output_format,
+    }
+
+
+def load_manifest(result_file: str) -> Optional[dict]:
+    return load_json(manifest_path(result_file))
+
+
+def save_manifest(result_file: str, manifest: dict):
+    """Атомарно записывает манифест (временный файл и переименование)."""
+    save_json(manifest_path(result_file), manifest)
+
+
+def is_reference_valid(result_file: str, manifest: dict) -> bool:
+    """
+    Проверяет, что эталонные данные существуют и получены для тех же исходников модели,
+    схемы и версии симулятора. Если в manifest хэш модели не задан, он не сравнивается.
+    """
+    if not os.path.exists(result_file) or os.path.getsize(result_file) == 0:
+        return False
+    stored = load_manifest(result_file)
+    if stored is None:
+        return False
+    return all(stored.get(name) == value for name, value in manifest.items() if value is not None)
@@ -0,0 +1,76 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from typing import Dict, Optional
+
+from core.disk_cache import DiskCache
+from core.netlist import netlist_includes
+
+
+def compute_result_key(osdi_key: str, spice_file: str, parameters: Optional[Dict[str, str]] = None,
+                       output_format: str = "", backend: str = "") -> str:
+    """
+    Вычисляет ключ результата симуляции: SHA-256 от ключа osdi-модели (хэш исходников и версии
+    компилятора), текста схемы и подключаемых ею файлов (.include, .lib), способа запуска
+    симулятора (backend) и набора переопределённых параметров.
+
+    Имена параметров приводятся к нижнему регистру (SPICE не различает регистр), пустые значения
+    отбрасываются, поэтому одинаковые наборы, заданные в разном порядке, дают один ключ.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"osdi:{osdi_key}\nformat:{output_format}\nbackend:{backend}\n".encode("utf-8"))
+    with open(spice_file, "rb") as file:
+        digest.update(hashlib.sha256(file.read()).hexdigest().encode("utf-8"))
+    for path in netlist_includes(spice_file):
+        try:
+            with open(path, "rb") as file:
+                content = hashlib.sha256(file.read()).hexdigest()
+        except OSError:
+            content = "missing"
+        digest.update(f"\n{os.path.basename(path)}:{content}".encode("utf-8"))
+
+    normalized = {
+        name.lower(): str(value).strip()
+        for name, value in (parameters or {}).items()
+        if str(value).strip()
+    }
+    digest.update(json.dumps(normalized, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Кэш результатов симуляции на диске: таблица результатов хранится в .npz файле
+    (по массиву на колонку и порядок колонок), записи вытесняются по LRU при превышении max_size.
+    """
+    def __init__(self, directory: str, max_size: int) -> None:
+        self.storage = DiskCache(directory, max_size, suffix=".npz")
+
+    def fetch(self, key: str) -> Optional[pd.DataFrame]:
+        """Возвращает сохранённую таблицу результатов или None при промахе."""
+        path = self.storage.lookup(key)
+        if path is None:
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                names = [str(name) for name in archive["columns"]]
+                data = {name: archive[f"c{i}"] for i, name in enumerate(names)}
+        except (OSError, KeyError, ValueError):
+            return None  # повреждённая запись считается промахом и будет перезаписана
+        return pd.DataFrame(data, copy=False)
+
+    def store(self, key: str, data: pd.DataFrame):
+        """Сохраняет таблицу результатов под ключом key."""
+        os.makedirs(self.storage.directory, exist_ok=True)
+        tmp_path = os.path.join(self.storage.directory, f".{key}.{os.getpid()}.npz")
+        try:
+            arrays = {f"c{i}": data[name].to_numpy() for i, name in enumerate(data.columns)}
+            np.savez(tmp_path, columns=np.array([str(name) for name in data.columns]), **arrays)
+            self.storage.store(key, tmp_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -1,28 +1,66 @@
 import os
-import subprocess
+import shutil
+import tempfile
+
+import pandas as pd
+
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 from utils.parameter_parser import ParameterParser
-from utils.utils import find_case_insensitive_path, remove_reference_line, duplicate_print_line, add_or_update_simulation_data_path_in_file
+from utils.utils import find_case_insensitive_path
+from core.modes import RECOMPILE_MODE, NETLIST_MODE
 from core.osdi_manager import OSDIManager
-from plotting.plot_simulation import SimulationManager
+from core.osdi_cache import compute_source_key, get_openvaf_version
+from core.sweep import prepare_model_workspace
+from core.jobs import progress_range
+from core.pipeline import Pipeline, run_pipeline
+from core.netlist import get_va_module_name, write_scratch_netlist
+from core.backends import SimulationBackend, SubprocessBackend, result_file_extension, write_result_file
+from core.result_cache import ResultCache, compute_result_key
+from core.reference_data import build_reference_manifest, is_reference_valid, original_content, save_manifest
+from utils.tracing import span, tracer
 
-from config import REFERENCE_MODEL_CODE_PATH, SPICE_EXAMPLES_PATH, SIMULATION_RAW_DATA_PATH
+from config import (OSDILIBS_PATH, REFERENCE_MODEL_CODE_PATH, SPICE_EXAMPLES_PATH, SIMULATION_RAW_DATA_PATH,
+                    RESULT_CACHE_ENABLED, RESULT_CACHE_PATH, RESULT_CACHE_MAX_SIZE, ORIGINAL_SOURCES_PATH)
 
 
 class SimulationRunner:
-    def __init__(self, model_path: str, manager, user_result_file):
+    RECOMPILE_MODE = RECOMPILE_MODE
+    NETLIST_MODE = NETLIST_MODE
+
+    def __init__(self, model_path: str, manager, user_result_file, parameter_mode: str = RECOMPILE_MODE,
+                 backend: Optional[SimulationBackend] = None, result_cache: Optional[ResultCache] = None):
         """
         Инициализация симулятора.
 
         Args:
             model_path (str): Путь к папке модели.
-            vamodel_name (str): Имя .va файла.
+            manager: Менеджер построения графиков.
+            user_result_file (str): Путь к файлу с результатами пользовательской симуляции.
+            parameter_mode (str): Способ передачи параметров в модель (RECOMPILE_MODE или NETLIST_MODE).
+            backend (SimulationBackend): Способ запуска ngspice (по умолчанию — отдельный процесс).
+            result_cache (ResultCache): Кэш результатов симуляций (по умолчанию — RESULT_CACHE_PATH,
+                если RESULT_CACHE_ENABLED).
         """
         self.model_path = model_path
         self.vamodel_name = None
         self.manager = manager
         self.osdi_manager = None
         self.user_result_file = user_result_file
+        self.parameter_mode = parameter_mode
+        self.backend = backend if backend is not None else SubprocessBackend()
+        self.osdi_cache_status = None  # "hit" / "miss" / "skipped" (все результаты из кэша) для последней сборки модели
+        if result_cache is None and RESULT_CACHE_ENABLED:
+            result_cache = ResultCache(RESULT_CACHE_PATH, RESULT_CACHE_MAX_SIZE)
+        self.result_cache = result_cache
+        self.result_cache_status = None  # "hit" / "miss" для последней пользовательской симуляции
+        self.reference_status = None     # "valid" / "regenerated" для эталонных данных последнего запуска
+        self.last_trace = None           # трасса этапов последнего запуска (utils.tracing.Trace)
+        self.last_user_data = None       # пользовательские данные последнего запуска (первая схема)
+        self.reference_key = None        # ключ osdi-кэша эталонной модели (исходные версии файлов модели)
+        self.reference_model_path = None  # каталог исходников эталонной модели (по умолчанию — каталог модели)
+        self.reference_workspace = None  # временный каталог сборки эталонной модели
 
     def get_spice_file(self, model_name: str) -> str:
         """
@@ -35,79 +73,420 @@ class SimulationRunner:
         
         return spice_file
 
-    def set_model(self, va_model_path):
-        """Установка текущей модели."""
+    def set_model(self, va_model_path, reference_model_path: Optional[str] = None):
+        """
+        Установка текущей модели.
+
+        Args:
+            reference_model_path: Каталог исходников, по которым строится эталон, если модель — рабочая
+                копия с изменёнными параметрами (по умолчанию — каталог модели).
+        """
         self.vamodel_name = os.path.basename(va_model_path)
         self.model_path = os.path.dirname(va_model_path)
+        self.reference_model_path = reference_model_path or self.model_path
 
-    def run_simulation(self, spice_file: str, canvas, fig):
+    def get_model_types(self):
+        """Возможные типы модели в карточке .model: имя модуля Verilog-A и имя .va файла."""
+        va_file = os.path.join(self.model_path, self.vamodel_name)
+        return [name for name in (get_va_module_name(va_file), self.vamodel_name[:-3]) if name]
+
+    def lookup_result(self, spice_file: str, parameters: Optional[Dict[str, str]]
+                      ) -> Tuple[Optional[str], Optional[pd.DataFrame]]:
         """
-        Запускает симуляцию с отслеживанием прогресса и обработкой ошибок.
+        Ищет результат пользовательской симуляции в кэше результатов. Нужен только ключ osdi-кэша,
+        поэтому поиск выполняется до сборки модели.
+
+        Returns:
+            Tuple[Optional[str], Optional[pd.DataFrame]]: (ключ результата или None, если кэш отключён,
+                сохранённая таблица или None при промахе).
         """
-        try:
-            total_step = 5
-            current_step = 0
+        if self.result_cache is None or not self.osdi_manager.cache_key:
+            return None, None
+        with span("Поиск в кэше результатов", netlist=os.path.basename(spice_file)) as current:
+            key = compute_result_key(self.osdi_manager.cache_key, spice_file, parameters,
+                                     self.backend.output_format, self.backend.name)
+            data = self.result_cache.fetch(key)
+            current.set(result_cache="miss" if data is None else "hit")
+        return key, data
+
+    def run_cached(self, spice_file: str, result_file: str, parameters: Optional[Dict[str, str]],
+                   model_types, lookup: Optional[Tuple[Optional[str], Optional[pd.DataFrame]]] = None) -> pd.DataFrame:
+        """
+        Запускает симуляцию через backend, если результат для той же osdi-модели, схемы (с подключаемыми
+        файлами), backend и набора параметров ещё не сохранён в кэше. При попадании в кэш ngspice
+        не запускается, а сохранённая таблица записывается в result_file (если backend пишет файлы
+        результатов).
+
+        Args:
+            lookup: Результат lookup_result, выполненного заранее (None — поиск выполняется здесь).
+        """
+        key, data = lookup if lookup is not None else self.lookup_result(spice_file, parameters)
+        with span("Пользовательская симуляция", parameters=len(parameters or {})) as current:
+            if key is None:
+                self.result_cache_status = None
+                return self.backend.run(spice_file, result_file, parameters=parameters, model_types=model_types)
+
+            if data is not None:
+                self.result_cache_status = "hit"
+                current.set(result_cache="hit", rows=len(data))
+                if self.backend.writes_result_file:
+                    write_result_file(data, result_file, self.backend.output_format)
+                return data
 
-            self.osdi_manager = OSDIManager(model_path=self.model_path, vamodel_name=self.vamodel_name)
-            yield (current_step := current_step + 1) / total_step  # 20%
+            self.result_cache_status = "miss"
+            current.set(result_cache="miss")
+            data = self.backend.run(spice_file, result_file, parameters=parameters, model_types=model_types)
+            try:
+                self.result_cache.store(key, data)
+            except OSError as e:
+                print(f"Не удалось сохранить результаты симуляции в кэш: {e}")
+            return data
 
-            self.osdi_manager.rebuild_osdi()
-            yield (current_step := current_step + 1) / total_step  # 40%
+    def run_reference(self, spice_file: str, result_file: str, model_types) -> pd.DataFrame:
+        # прогресс задания показывает пользовательскую симуляцию, эталон передаёт только предупреждения
+        with span("Эталонная симуляция"), progress_range(None):
+            data = self.backend.run(spice_file, result_file, model_types=model_types)
+            if not self.backend.writes_result_file:
+                # файл эталона вместе с манифестом переиспользуется следующими запусками
+                write_result_file(data, result_file, self.backend.output_format)
+            return data
 
+    def build_model(self) -> bool:
+        """
+        Собирает osdi-модель (или берёт её из кэша) и размещает её в OSDILIBS_PATH.
+
+        Returns:
+            bool: True при попадании в OSDI-кэш.
+        """
+        self.osdi_manager = OSDIManager(model_path=self.model_path, vamodel_name=self.vamodel_name)
+        self.compile_model()
+        self.move_model()
+        return self.osdi_manager.cache_hit
+
+    def prepare_model(self):
+        """Вычисляет ключ osdi-кэша (при попадании osdi-файл сразу размещается из кэша)."""
+        self.osdi_manager = OSDIManager(model_path=self.model_path, vamodel_name=self.vamodel_name)
+        self.osdi_manager.fetch_cached()
+
+    def compile_model(self) -> bool:
+        with span("Сборка модели", model=self.vamodel_name) as current:
+            cache_hit = self.osdi_manager.rebuild_osdi()
+            self.osdi_cache_status = "hit" if cache_hit else "miss"
+            current.set(osdi_cache=self.osdi_cache_status)
+        return cache_hit
+
+    def move_model(self):
+        with span("Перемещение osdi") as current:
             self.osdi_manager.move_osdi_file()
-            yield (current_step := current_step + 1) / total_step  # 60%
+            osdi_path = self.osdi_manager.get_osdi_path()
+            if os.path.exists(osdi_path):
+                current.set(bytes=os.path.getsize(osdi_path))
+
+    def reference_result_path(self, spice_file: str, index: int = 0) -> str:
+        """Файл эталонных данных: для первой схемы запуска — <модель>_reference_data, для остальных — с именем схемы."""
+        model_name = self.vamodel_name[:-3]
+        extension = result_file_extension(self.backend.output_format)
+        suffix = "" if index == 0 else "_" + os.path.splitext(os.path.basename(spice_file))[0]
+        return os.path.join(REFERENCE_MODEL_CODE_PATH, f"{model_name}{suffix}_reference_data{extension}")
+
+    def user_result_path(self, spice_file: str, index: int = 0) -> str:
+        """Файл пользовательских результатов: для первой схемы — user_result_file, для остальных — с именем схемы."""
+        if index == 0:
+            return self.user_result_file
+        base, extension = os.path.splitext(self.user_result_file)
+        return f"{base}_{os.path.splitext(os.path.basename(spice_file))[0]}{extension}"
+
+    def prepare_reference_model(self):
+        """
+        Вычисляет ключ osdi-кэша эталонной модели: по исходным версиям файлов модели (значения
+        параметров по умолчанию, см. core/reference_data.original_content) в обоих режимах.
+        """
+        with span("Ключ эталонной модели"):
+            version = get_openvaf_version(OSDIManager.get_compiler_command(), cwd=self.reference_model_path)
+            self.reference_key = compute_source_key(os.path.join(self.reference_model_path, self.vamodel_name), {},
+                                                    version, contents=self.original_content)
+
+    @staticmethod
+    def original_content(path: str) -> bytes:
+        return original_content(path, ORIGINAL_SOURCES_PATH)
+
+    def check_reference(self, spice_file: str, reference_result_file: str) -> Tuple[bool, dict]:
+        """
+        Проверяет манифест эталонных данных: ключ эталонной модели, схема, версия симулятора, формат.
+
+        Returns:
+            Tuple[bool, dict]: (нужно ли пересоздать эталон, манифест для сохранения после пересоздания).
+        """
+        with span("Проверка эталонных данных", netlist=os.path.basename(spice_file)) as current:
+            manifest = build_reference_manifest(self.reference_key, spice_file, self.backend.version(),
+                                                self.backend.output_format)
+            reference_needed = not is_reference_valid(reference_result_file, manifest)
+            current.set(reference="regenerated" if reference_needed else "valid")
+        return reference_needed, manifest
+
+    def build_reference_model(self, checks: Sequence[Tuple[bool, dict]]) -> Optional[str]:
+        """
+        Собирает эталонную модель, если хотя бы один эталон нужно пересоздать: исходные версии файлов
+        модели копируются во временный каталог (remove_reference_workspace) и компилируются там.
+        Если исходники не менялись, osdi-файл берётся из кэша (ключ совпадает с ключом модели).
 
-            model_name = self.vamodel_name[:-3]
-            reference_result_file = os.path.join(REFERENCE_MODEL_CODE_PATH, f"{model_name}_reference_data.txt")
+        Returns:
+            Optional[str]: Путь к osdi-файлу эталонной модели или None, если эталоны актуальны.
+        """
+        if not any(needed for needed, _ in checks):
+            return None
+        with span("Сборка эталонной модели", model=self.vamodel_name) as current:
+            self.reference_workspace = tempfile.mkdtemp(prefix="reference_")
+            prepare_model_workspace(os.path.join(self.reference_model_path, self.vamodel_name),
+                                    self.reference_workspace, contents=self.original_content)
+            manager = OSDIManager(model_path=self.reference_workspace, vamodel_name=self.vamodel_name,
+                                  osdi_dir=os.path.join(self.reference_workspace, "osdi"))
+            manager.rebuild_osdi()
+            manager.move_osdi_file()
+            current.set(osdi_cache="hit" if manager.cache_hit else "miss")
+        return manager.get_osdi_path()
 
-            if not os.path.exists(reference_result_file) or os.path.getsize(reference_result_file) == 0:
-                # print("Эталонные данные отсутствуют. Добавляем строку в схему и запускаем симуляцию.")
-                duplicate_print_line(spice_file=spice_file, new_path=reference_result_file)
-                process_reference = subprocess.Popen(["ngspice", "-b", spice_file], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                stdout, stderr = process_reference.communicate()
+    def remove_reference_workspace(self):
+        if self.reference_workspace:
+            shutil.rmtree(self.reference_workspace, ignore_errors=True)
+            self.reference_workspace = None
 
-                if process_reference.returncode != 0:
-                    raise RuntimeError(f"Ошибка при создании эталонных данных:\n{stderr.decode('utf-8')}")
+    def regenerate_reference(self, spice_file: str, reference_result_file: str, model_types,
+                             reference_osdi: Optional[str], check: Tuple[bool, dict]) -> Optional[pd.DataFrame]:
+        """Пересоздаёт эталон по схеме, в которой pre_osdi загружает эталонную модель reference_osdi."""
+        reference_needed, manifest = check
+        if not reference_needed:
+            return None
+        scratch_file = write_scratch_netlist(spice_file, [], {}, osdi_file=reference_osdi)
+        try:
+            data = self.run_reference(scratch_file, reference_result_file, model_types)
+        except RuntimeError as e:
+            raise RuntimeError(f"Ошибка при создании эталонных данных:\n{e}")
+        finally:
+            os.remove(scratch_file)
+        save_manifest(reference_result_file, manifest)
+        return data
 
-                # print(f"Эталонные данные успешно созданы: {reference_result_file}")
-                remove_reference_line(spice_file=spice_file)
+    def build_if_needed(self, lookups: Sequence[Tuple[Optional[str], Optional[pd.DataFrame]]]) -> bool:
+        """
+        Собирает модель, если пользовательский результат хотя бы одной схемы не найден в кэше результатов.
 
-            # self.user_result_file = os.path.join(SIMULATION_RAW_DATA_PATH, "simulation_data.txt")
+        Returns:
+            bool: True, если модель собиралась (её нужно разместить в OSDILIBS_PATH).
+        """
+        if all(data is not None for _, data in lookups):
+            with span("Сборка модели", model=self.vamodel_name) as current:
+                self.osdi_cache_status = "skipped"
+                current.set(osdi_cache=self.osdi_cache_status)
+            return False
+        if not self.osdi_manager.cache_hit:
+            self.osdi_manager.fetch_cached()  # эталонная модель с теми же исходниками могла попасть в кэш
+        self.compile_model()
+        return True
 
-            if os.path.exists(self.user_result_file):
-                with open(self.user_result_file, "w") as file:
-                    pass
+    def add_stages(self, pipeline: Pipeline, spice_files: Sequence[str],
+                   parameters: Optional[Dict[str, str]] = None, build_model: bool = True):
+        """
+        Добавляет этапы запуска схем spice_files:
+        key — ключ osdi-кэша (при попадании osdi-файл сразу размещается из кэша);
+        lookup:i — поиск пользовательского результата в кэше результатов;
+        compile, move — сборка (openvaf) и размещение модели, пропускаются, если все пользовательские
+        результаты найдены в кэше;
+        reference_key, check:i — ключ эталонной модели и проверка манифеста эталонных данных;
+        reference_model — сборка эталонной модели из исходных версий файлов (если эталон нужно пересоздать);
+        reference:i, user:i — эталонная и пользовательская симуляции.
+
+        Эталон не зависит от пользовательской модели: его проверка и сборка идут одновременно со сборкой
+        пользовательской модели (компиляции одной модели выполняются по очереди, вторая берёт osdi-файл
+        из кэша при совпадении исходников). Симуляции всех схем выполняются одновременно
+        (в пределах PIPELINE_LIMITS).
 
-            add_or_update_simulation_data_path_in_file(spice_file, self.user_result_file)
-            # print("Запускаем симуляцию с пользовательскими параметрами.")
+        Args:
+            build_model: False — модель уже собрана и размещена (build_model()), добавляются только
+                этапы поиска в кэше, эталонов и симуляций.
+        """
+        model_types = self.get_model_types()
+        user_parameters = parameters if self.parameter_mode == self.NETLIST_MODE else None
+        indices = range(len(spice_files))
+        compile_lock = f"openvaf:{self.vamodel_name}"
 
-            process_user = subprocess.Popen(["ngspice", "-b", spice_file], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            stdout, stderr = process_user.communicate()
+        key_depends = ()
+        if build_model:
+            key_depends = (pipeline.add("key", self.prepare_model, weight=0.5),)
+        pipeline.add("reference_key", self.prepare_reference_model, weight=0.25)
+        for index, spice_file in enumerate(spice_files):
+            reference_file = self.reference_result_path(spice_file, index)
+            pipeline.add(f"lookup:{index}", lambda *_, spice_file=spice_file:
+                         self.lookup_result(spice_file, user_parameters), depends=key_depends, weight=0.25)
+            pipeline.add(f"check:{index}", lambda *_, spice_file=spice_file, reference_file=reference_file:
+                         self.check_reference(spice_file, reference_file), depends=("reference_key",), weight=0.25)
 
-            if process_user.returncode != 0:
-                raise RuntimeError(f"Ошибка симуляции:\n{stderr.decode('utf-8')}")
+        model_depends = ()
+        if build_model:
+            pipeline.add("compile", lambda *lookups: self.build_if_needed(lookups),
+                         depends=tuple(f"lookup:{index}" for index in indices), resource="openvaf",
+                         lock=compile_lock, weight=2.0)
+            model_depends = (pipeline.add("move", lambda built: self.move_model() if built else None,
+                                          depends=("compile",), weight=0.5),)
+        pipeline.add("reference_model", lambda *checks: self.build_reference_model(checks),
+                     depends=tuple(f"check:{index}" for index in indices), resource="openvaf",
+                     lock=compile_lock, weight=1.0)
 
-            yield (current_step := current_step + 1) / total_step  # 80%
+        for index, spice_file in enumerate(spice_files):
+            reference_file = self.reference_result_path(spice_file, index)
+            user_file = self.user_result_path(spice_file, index)
+            pipeline.add(f"reference:{index}", lambda osdi_file, check, spice_file=spice_file, reference_file=reference_file:
+                         self.regenerate_reference(spice_file, reference_file, model_types, osdi_file, check),
+                         depends=("reference_model", f"check:{index}"), resource="ngspice", weight=1.0)
+            pipeline.add(f"user:{index}", lambda *dependencies, spice_file=spice_file, user_file=user_file:
+                         self.run_cached(spice_file, user_file, user_parameters, model_types, dependencies[-1]),
+                         depends=(*model_depends, f"lookup:{index}"), resource="ngspice", weight=3.0)
+        pipeline.add("reference_done", lambda *_: self.remove_reference_workspace(),
+                     depends=tuple(f"reference:{index}" for index in indices), weight=0.0)
+
+    def collect_results(self, results: Dict[str, object], spice_files: Sequence[str]
+                        ) -> List[Tuple[pd.DataFrame, Optional[pd.DataFrame], str]]:
+        """Результаты этапов симуляции по схемам: (пользовательские данные, эталон или None, файл эталона)."""
+        collected = []
+        for index, spice_file in enumerate(spice_files):
+            collected.append((results[f"user:{index}"], results[f"reference:{index}"],
+                              self.reference_result_path(spice_file, index)))
+        regenerated = any(results[f"check:{index}"][0] for index in range(len(spice_files)))
+        self.last_user_data = collected[0][0] if collected else None
+        self.reference_status = "regenerated" if regenerated else "valid"
+        return collected
+
+    def simulate_many(self, spice_files: Sequence[str], parameters: Optional[Dict[str, str]] = None,
+                      build_model: bool = False) -> List[Tuple[pd.DataFrame, Optional[pd.DataFrame], str]]:
+        """
+        Выполняет эталонные (при необходимости) и пользовательские симуляции нескольких схем;
+        схемы симулируются одновременно.
+
+        Args:
+            build_model: Собрать модель в том же графе этапов (после поиска результатов в кэше);
+                False — модель уже собрана build_model().
+
+        Returns:
+            list: Для каждой схемы — (пользовательские данные, эталонные данные или None, если эталон
+                актуален и не пересчитывался, путь к файлу эталонных данных).
+        """
+        pipeline = Pipeline()
+        self.add_stages(pipeline, spice_files, parameters, build_model)
+        try:
+            return self.collect_results(run_pipeline(pipeline), spice_files)
+        finally:
+            self.remove_reference_workspace()
 
-            if not os.path.exists(self.user_result_file) or os.path.getsize(self.user_result_file) == 0:
-                raise RuntimeError(
-                    "Simulation is complete, but the data file is missing or empty. "
-                    "Check the selected SP file and the model of the selected transistor."
-                )
+    def simulate(self, spice_file: str, parameters: Optional[Dict[str, str]] = None
+                 ) -> Tuple[pd.DataFrame, Optional[pd.DataFrame], str]:
+        """
+        Выполняет эталонную (при необходимости) и пользовательскую симуляции для уже собранной модели.
 
-            # print(f"Пользовательские данные успешно созданы: {user_result_file}")
+        Returns:
+            Tuple[pd.DataFrame, Optional[pd.DataFrame], str]: (пользовательские данные, эталонные данные
+                или None, если эталон актуален и не пересчитывался, путь к файлу эталонных данных).
+        """
+        return self.simulate_many([spice_file], parameters)[0]
 
+    def plot_results(self, canvas, fig, reference_result_file: str, user_data: pd.DataFrame,
+                     reference_data: Optional[pd.DataFrame]):
+        with span("Построение графика", rows=len(user_data)):
             self.manager.run(
                 fig=fig,
                 canvas=canvas,
                 user_filename=self.user_result_file,
                 reference_filename=reference_result_file,
+                user_data=user_data,
+                reference_data=reference_data,
             )
-            yield 1.0  # 100%
-            # print("Графики успешно построены.")
+
+    def plot_preview(self, canvas, fig, reference_result_file: str, user_data: pd.DataFrame,
+                     reference_data: Optional[pd.DataFrame]):
+        """Предпросмотр: перерисовывается только пользовательская кривая, если эталон не пересчитывался."""
+        if reference_data is None:
+            with span("Обновление пользовательской кривой", rows=len(user_data)):
+                if self.manager.update_user(fig, canvas, user_data):
+                    return
+        self.plot_results(canvas, fig, reference_result_file, user_data, reference_data)
+
+    def run_simulation(self, spice_file: str, canvas, fig, parameters: Optional[Dict[str, str]] = None,
+                       dispatch: Optional[Callable[..., Future]] = None, preview: bool = False):
+        """
+        Запускает симуляцию с отслеживанием прогресса и обработкой ошибок.
+
+        Этапы выполняются графом core/pipeline.Pipeline (см. add_stages): поиск результата в кэше идёт
+        до сборки модели, которая пропускается, если результат найден; проверка эталонных данных
+        и сборка эталонной модели из исходных версий файлов — одновременно с ней, эталонная
+        и пользовательская симуляции — одновременно после них. Генератор выдаёт долю выполнения
+        после каждого этапа, при ошибке — строку с её описанием.
+
+        В режиме NETLIST_MODE значения parameters записываются в карточку .model (или применяются
+        командой altermod в shared-backend), поэтому исходники модели не меняются и osdi-модель
+        переиспользуется из кэша без перекомпиляции.
+
+        Args:
+            dispatch: Выполнение построения графика в главном цикле GUI (см. Pipeline); по умолчанию
+                график строится в потоке этапа.
+            preview: Живой предпросмотр (автозапуск при изменении параметров): на построенном графике
+                заменяется только пользовательская кривая, масштаб не сбрасывается.
+        """
+        trace = tracer.start(f"Симуляция {self.vamodel_name}")
+        try:
+            pipeline = Pipeline(dispatch=dispatch)
+            self.add_stages(pipeline, [spice_file], parameters)
+            reference_result_file = self.reference_result_path(spice_file)
+            plot = self.plot_preview if preview else self.plot_results
+            pipeline.add("plot", lambda user_data, reference_data: plot(
+                canvas, fig, reference_result_file, user_data, reference_data),
+                depends=("user:0", "reference:0"), weight=1.0, main_loop=True)
+
+            yield from pipeline.stream()
+            self.collect_results(pipeline.results, [spice_file])
 
         except Exception as e:
             error_message = f"Ошибка симуляции: {str(e)}"
             # print(error_message)
             yield error_message
+        finally:
+            self.remove_reference_workspace()
+            tracer.finish()
+            self.last_trace = trace
+
+
+def compile_models(va_files: Sequence[str], defines: Optional[Sequence[Dict[str, str]]] = None,
+                   osdi_dir: str = OSDILIBS_PATH) -> List[OSDIManager]:
+    """
+    Собирает несколько моделей (или вариантов модели с разными defines) одновременно:
+    число процессов openvaf ограничено PIPELINE_LIMITS["openvaf"]. Каждый вариант собирается
+    в своём временном каталоге (копия исходников, prepare_model_workspace) и размещается в osdi_dir
+    под именем с ключом кэша (<модель>_<ключ>.osdi), поэтому варианты не заменяют друг друга.
+    Одинаковые варианты (тот же .va и defines) собираются по очереди: второй берёт osdi-файл из кэша.
+
+    Returns:
+        list: Менеджеры osdi собранных моделей (cache_hit, get_osdi_path()) в порядке va_files.
+    """
+    defines = list(defines) if defines is not None else [{}] * len(va_files)
+    workspaces = [tempfile.mkdtemp(prefix="compile_") for _ in va_files]
+    try:
+        managers = [OSDIManager(model_path=workspace, vamodel_name=os.path.basename(va_file), defines=variant,
+                                osdi_dir=osdi_dir, keyed_name=True)
+                    for va_file, variant, workspace in zip(va_files, defines, workspaces)]
+
+        def build(va_file: str, manager: OSDIManager):
+            with span("Сборка модели", model=manager.vamodel_name) as current:
+                prepare_model_workspace(va_file, manager.model_path)
+                manager.rebuild_osdi()
+                manager.move_osdi_file()
+                current.set(osdi_cache="hit" if manager.cache_hit else "miss")
 
+        pipeline = Pipeline()
+        for index, (va_file, variant, manager) in enumerate(zip(va_files, defines, managers)):
+            variant_key = os.path.abspath(va_file) + "|" + ";".join(f"{name}={value}"
+                                                                   for name, value in sorted(variant.items()))
+            pipeline.add(f"compile:{index}", lambda va_file=va_file, manager=manager: build(va_file, manager),
+                         resource="openvaf", lock=variant_key)
+        run_pipeline(pipeline)
+    finally:
+        for workspace in workspaces:
+            shutil.rmtree(workspace, ignore_errors=True)
+    return managers
@@ -0,0 +1,448 @@
+"""
+Суррогатная модель: мгновенное предсказание кривых по значениям выбранных параметров.
+
+Точки выборки — латинский гиперкуб в диапазонах параметров (в SURROGATE_SPAN раз от значения
+по умолчанию в пределах допустимого интервала из описания модели, ParameterParser.parse),
+кривые в них считаются свипом на пуле процессов (core/sweep.ParameterSweep).
+Для каждой колонки результатов кривые сжимаются методом главных компонент, а коэффициенты
+компонент интерполируются в пространстве параметров радиальными базисными функциями (r³)
+с линейным полиномом. Предсказание — одна матрица расстояний и два матричных произведения,
+порядка десятков микросекунд.
+
+Точки выборки и кривые хранятся в кэше по ключу (osdi-модель, текст схемы, выбранные параметры
+и их диапазоны, фиксированные значения остальных параметров); модель строится по ним заново
+при загрузке. Уточнение добавляет точки (новые симуляции в наименее заполненных областях
+или результаты уже выполненных симуляций) и перестраивает модель.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.disk_cache import DiskCache
+from core.osdi_manager import OSDIManager
+from core.backends import SubprocessBackend
+from core.result_cache import compute_result_key
+from core.sweep import ParameterSweep
+from utils.spice_values import LOG_RANGE_RATIO, parameter_interval, parse_spice_number, sampling_range
+from config import (SURROGATE_CACHE_PATH, SURROGATE_CACHE_MAX_SIZE, SURROGATE_SAMPLES, SURROGATE_REFINE_SAMPLES,
+                    SURROGATE_VALIDATION_FRACTION, SURROGATE_VARIANCE, SURROGATE_MAX_COMPONENTS, SURROGATE_SPAN)
+
+
+LOG_COLUMN_DECADES = 3.0  # колонка одного знака с размахом больше стольких декад моделируется в log10|y|
+REFINE_CANDIDATES = 20    # кандидатов на одну новую точку при уточнении
+SMOOTHING = 1e-10         # регуляризация матрицы RBF (совпадающие точки выборки)
+OPEN_BOUND_MARGIN = 1e-6  # отступ диапазона выборки от открытой границы параметра (доля диапазона)
+
+
+class ParameterRange:
+    """Диапазон параметра и переход к единичному отрезку (линейный или логарифмический)."""
+    def __init__(self, low: float, high: float, logarithmic: bool) -> None:
+        self.low = low
+        self.high = high
+        self.logarithmic = logarithmic
+
+    def to_unit(self, values: np.ndarray) -> np.ndarray:
+        if self.logarithmic:
+            return np.log(values / self.low) / np.log(self.high / self.low)
+        return (values - self.low) / (self.high - self.low)
+
+    def from_unit(self, unit: np.ndarray) -> np.ndarray:
+        if self.logarithmic:
+            return self.low * (self.high / self.low) ** unit
+        return self.low + (self.high - self.low) * unit
+
+    def as_tuple(self) -> Tuple[float, float, bool]:
+        return self.low, self.high, self.logarithmic
+
+
+def parameter_ranges(parameters: List[dict], names: Sequence[str]) -> Dict[str, ParameterRange]:
+    """
+    Диапазоны выборки параметров names по описаниям параметров модели (результат ParameterParser.parse):
+    окрестность значения по умолчанию (в SURROGATE_SPAN раз в обе стороны), ограниченная допустимым
+    интервалом параметра. Открытые границы в диапазон не входят; положительные параметры с открытой
+    границей 0 (from (0:...)) меняются по логарифмической шкале.
+    """
+    described = {parameter["name"]: parameter for parameter in parameters}
+    ranges = {}
+    for name in names:
+        if name not in described:
+            raise ValueError(f"Параметр {name} не найден в описании модели.")
+        try:
+            default = parse_spice_number(described[name]["default_value"])
+        except ValueError:
+            raise ValueError(f"Значение параметра {name} не является числом: {described[name]['default_value']}")
+        lower, upper, lower_closed, upper_closed = parameter_interval(described[name]) or (-np.inf, np.inf, True, True)
+        low, high, _ = sampling_range(default, span=SURROGATE_SPAN)
+        low, high = max(low, lower), min(high, upper)
+        if high <= low:  # значение по умолчанию вне допустимого интервала
+            low, high, _ = sampling_range(default, lower, upper, span=SURROGATE_SPAN)
+        positive = lower == 0 and not lower_closed
+        if positive and low <= 0:
+            low = high / SURROGATE_SPAN ** 2
+        if not lower_closed and low <= lower:
+            low = lower + OPEN_BOUND_MARGIN * (high - lower)
+        if not upper_closed and high >= upper:
+            high = upper - OPEN_BOUND_MARGIN * (upper - low)
+        ranges[name] = ParameterRange(low, high, low > 0 and (positive or high / low >= LOG_RANGE_RATIO))
+    return ranges
+
+
+def unit_points(ranges: Dict[str, ParameterRange], names: Sequence[str], points: np.ndarray) -> np.ndarray:
+    """Точки (число точек, число параметров) в единичном кубе диапазонов параметров."""
+    return np.column_stack([ranges[name].to_unit(points[:, i]) for i, name in enumerate(names)])
+
+
+def latin_hypercube(count: int, dimensions: int, rng: np.random.Generator) -> np.ndarray:
+    """Латинский гиперкуб в [0, 1)^dimensions: по каждой оси ровно одна точка в каждом из count интервалов."""
+    strata = np.argsort(rng.random((dimensions, count)), axis=1).T
+    return (strata + rng.random((count, dimensions))) / count
+
+
+def spread_points(existing: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    count новых точек в [0, 1)^d вдали от существующих: из кандидатов латинского гиперкуба
+    по очереди выбирается точка с наибольшим расстоянием до ближайшей уже имеющейся.
+    """
+    candidates = latin_hypercube(count * REFINE_CANDIDATES, existing.shape[1], rng)
+    distance = np.full(len(candidates), np.inf)
+    for point in existing:
+        distance = np.minimum(distance, np.linalg.norm(candidates - point, axis=1))
+    chosen = []
+    for _ in range(count):
+        index = int(np.argmax(distance))
+        chosen.append(candidates[index])
+        distance = np.minimum(distance, np.linalg.norm(candidates - candidates[index], axis=1))
+    return np.array(chosen)
+
+
+class SampleSet:
+    """
+    Точки выборки и кривые в них.
+
+    points имеет форму (число точек, число параметров), columns[name] — (число точек, длина кривой);
+    все кривые приведены к шкале x первой удачной симуляции.
+    """
+    def __init__(self, names: Sequence[str], points: np.ndarray, x: np.ndarray, columns: Dict[str, np.ndarray],
+                 index_name: str = "Index", x_name: str = "x") -> None:
+        self.names = list(names)
+        self.points = points
+        self.x = x
+        self.columns = columns
+        self.index_name = index_name
+        self.x_name = x_name
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    @classmethod
+    def from_frames(cls, names: Sequence[str], points: List[Dict[str, float]],
+                    frames: List[Optional[pd.DataFrame]]) -> Optional["SampleSet"]:
+        """Выборка по результатам свипа; неудачные запуски пропускаются. None — удачных запусков нет."""
+        valid = [(point, frame) for point, frame in zip(points, frames) if frame is not None and len(frame.columns) >= 3]
+        if not valid:
+            return None
+        first = valid[0][1]
+        samples = cls(names, np.empty((0, len(names))), first[first.columns[1]].to_numpy(dtype=np.float64),
+                      {name: np.empty((0, len(first))) for name in first.columns[2:]},
+                      index_name=first.columns[0], x_name=first.columns[1])
+        return samples.extend([point for point, _ in valid], [frame for _, frame in valid])
+
+    def extend(self, points: List[Dict[str, float]], frames: List[Optional[pd.DataFrame]]) -> "SampleSet":
+        """
+        Новая выборка с добавленными точками. Кривые другой длины интерполируются на шкалу x выборки
+        (при монотонной шкале); запуски с ошибкой, без нужных колонок или с нечисловыми значениями пропускаются.
+        """
+        rows, curves = [], {name: [] for name in self.columns}
+        for point, frame in zip(points, frames):
+            if frame is None or any(name not in frame for name in self.columns):
+                continue
+            x = frame[frame.columns[1]].to_numpy(dtype=np.float64)
+            if len(x) != len(self.x) and (np.any(np.diff(x) < 0) or np.any(np.diff(self.x) < 0)):
+                continue
+            values = {}
+            for name in self.columns:
+                y = frame[name].to_numpy(dtype=np.float64)
+                values[name] = y if len(y) == len(self.x) else np.interp(self.x, x, y)
+            if not all(np.all(np.isfinite(y)) for y in values.values()):
+                continue
+            rows.append([float(point[name]) for name in self.names])
+            for name in self.columns:
+                curves[name].append(values[name])
+
+        if not rows:
+            return self
+        columns = {name: np.vstack([self.columns[name], np.array(curves[name])]) for name in self.columns}
+        return SampleSet(self.names, np.vstack([self.points, np.array(rows)]), self.x, columns,
+                         index_name=self.index_name, x_name=self.x_name)
+
+    def subset(self, indices: np.ndarray) -> "SampleSet":
+        return SampleSet(self.names, self.points[indices], self.x,
+                         {name: values[indices] for name, values in self.columns.items()},
+                         index_name=self.index_name, x_name=self.x_name)
+
+
+class ColumnModel:
+    """Главные компоненты кривых одной колонки (в log10|y| для колонок одного знака с большим размахом)."""
+    def __init__(self, curves: np.ndarray) -> None:
+        magnitude = np.abs(curves)
+        same_sign = np.all(curves > 0) or np.all(curves < 0)
+        self.logarithmic = bool(same_sign and np.log10(magnitude.max() / magnitude.min()) > LOG_COLUMN_DECADES)
+        self.sign = float(np.sign(curves.flat[0])) if self.logarithmic else 1.0
+        transformed = self.transform(curves)
+        self.span = float(transformed.max() - transformed.min()) or 1.0
+
+        self.mean = transformed.mean(axis=0)
+        _, singular, components = np.linalg.svd(transformed - self.mean, full_matrices=False)
+        energy = np.cumsum(singular ** 2)
+        if len(energy) and energy[-1] > 0:
+            count = int(np.searchsorted(energy / energy[-1], SURROGATE_VARIANCE) + 1)
+        else:
+            count = 0  # все кривые совпадают
+        count = min(count, SURROGATE_MAX_COMPONENTS, len(curves) - 1 if len(curves) > 1 else 0)
+        self.components = components[:count]
+        self.coefficients = (transformed - self.mean) @ self.components.T
+
+    def transform(self, curves: np.ndarray) -> np.ndarray:
+        return np.log10(np.abs(curves)) if self.logarithmic else curves
+
+    def restore(self, coefficients: np.ndarray) -> np.ndarray:
+        transformed = self.mean + coefficients @ self.components
+        return self.sign * 10.0 ** transformed if self.logarithmic else transformed
+
+
+class Surrogate:
+    """
+    Суррогатная модель кривых выборки samples.
+
+    Для каждой колонки результатов — главные компоненты кривых (ColumnModel), коэффициенты всех
+    колонок интерполируются одной системой RBF (r³ с линейным полиномом) по точкам выборки,
+    переведённым в единичный куб по диапазонам параметров.
+
+    validation_error[колонка] — среднеквадратичная ошибка предсказания отложенных SURROGATE_VALIDATION_FRACTION
+    точек моделью, построенной по остальным, отнесённая к размаху колонки (для колонок в log10|y| — к размаху
+    в декадах); None, если точек для проверки недостаточно.
+    """
+    def __init__(self, samples: SampleSet, ranges: Dict[str, ParameterRange],
+                 base: Optional[Dict[str, str]] = None, validate: bool = True, seed: int = 0) -> None:
+        if len(samples) == 0:
+            raise ValueError("Нет удачных симуляций для построения суррогатной модели.")
+        self.samples = samples
+        self.names = samples.names
+        self.ranges = ranges
+        self.base = dict(base or {})
+        self.validation_error: Optional[Dict[str, float]] = None
+
+        self.columns = {name: ColumnModel(curves) for name, curves in samples.columns.items()}
+        self.centers = unit_points(ranges, self.names, samples.points)
+        sizes = [model.components.shape[0] for model in self.columns.values()]
+        self.slices = dict(zip(self.columns, np.split(np.arange(sum(sizes)), np.cumsum(sizes)[:-1])))
+        targets = np.hstack([model.coefficients for model in self.columns.values()])
+        self.weights, self.polynomial = self.__solve(self.centers, targets)
+
+        if validate:
+            self.validation_error = self.__validate(seed)
+
+    @staticmethod
+    def __solve(centers: np.ndarray, targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        count, dimensions = centers.shape
+        kernel = np.linalg.norm(centers[:, None, :] - centers[None, :, :], axis=2) ** 3
+        polynomial = np.hstack([np.ones((count, 1)), centers])
+        system = np.zeros((count + dimensions + 1, count + dimensions + 1))
+        system[:count, :count] = kernel + SMOOTHING * np.eye(count)
+        system[:count, count:] = polynomial
+        system[count:, :count] = polynomial.T
+        right = np.vstack([targets, np.zeros((dimensions + 1, targets.shape[1]))])
+        try:
+            solution = np.linalg.solve(system, right)
+        except np.linalg.LinAlgError:
+            solution = np.linalg.lstsq(system, right, rcond=None)[0]  # точек меньше, чем членов полинома
+        return solution[:count], solution[count:]
+
+    def __validate(self, seed: int) -> Optional[Dict[str, float]]:
+        count = len(self.samples)
+        held_out = int(round(count * SURROGATE_VALIDATION_FRACTION))
+        if held_out < 1 or count - held_out < len(self.names) + 2:
+            return None
+        order = np.random.default_rng(seed).permutation(count)
+        model = Surrogate(self.samples.subset(order[held_out:]), self.ranges, validate=False)
+        predicted = model.predict_points(self.samples.points[order[:held_out]])
+        errors = {}
+        for name, column in self.columns.items():
+            actual = column.transform(self.samples.columns[name][order[:held_out]])
+            residual = column.transform(predicted[name]) - actual
+            errors[name] = float(np.sqrt(np.mean(residual ** 2)) / column.span)
+        return errors
+
+    def predict_points(self, points: np.ndarray) -> Dict[str, np.ndarray]:
+        """Кривые всех колонок для точек points (число точек, число параметров)."""
+        unit = unit_points(self.ranges, self.names, np.atleast_2d(points))
+        kernel = np.linalg.norm(unit[:, None, :] - self.centers[None, :, :], axis=2) ** 3
+        coefficients = kernel @ self.weights + np.hstack([np.ones((len(unit), 1)), unit]) @ self.polynomial
+        return {name: model.restore(coefficients[:, self.slices[name]]) for name, model in self.columns.items()}
+
+    def predict(self, values: Dict[str, float]) -> Dict[str, np.ndarray]:
+        """Кривые всех колонок для одного набора значений параметров."""
+        point = np.array([[float(values[name]) for name in self.names]])
+        return {name: curves[0] for name, curves in self.predict_points(point).items()}
+
+    def predict_frame(self, values: Dict[str, float]) -> pd.DataFrame:
+        """Предсказание в виде таблицы результатов симуляции (индекс, шкала x, колонки) для построения графика."""
+        data = {self.samples.index_name: np.arange(len(self.samples.x)), self.samples.x_name: self.samples.x}
+        data.update(self.predict(values))
+        return pd.DataFrame(data)
+
+    def covers(self, values: Dict[str, float]) -> bool:
+        """Значения заданы для всех параметров модели и лежат в диапазонах выборки."""
+        try:
+            return all(self.ranges[name].low <= float(values[name]) <= self.ranges[name].high for name in self.names)
+        except (KeyError, TypeError, ValueError):
+            return False
+
+    def report(self) -> str:
+        """Текстовый отчёт: параметры, диапазоны, число точек и ошибка проверки по колонкам."""
+        lines = [f"Точек выборки: {len(self.samples)}"]
+        for name in self.names:
+            parameter_range = self.ranges[name]
+            scale = " (лог.)" if parameter_range.logarithmic else ""
+            lines.append(f"{name}: {parameter_range.low:.4g} … {parameter_range.high:.4g}{scale}")
+        if self.validation_error is None:
+            lines.append("Ошибка проверки: недостаточно точек")
+        else:
+            for name, error in self.validation_error.items():
+                lines.append(f"Ошибка проверки {name}: {error:.2%} размаха")
+        return "\n".join(lines)
+
+
+class SurrogateCache:
+    """
+    Кэш выборок суррогатных моделей на диске (.npz: точки, шкала x, кривые по колонкам),
+    записи вытесняются по LRU при превышении max_size.
+    """
+    def __init__(self, directory: str = SURROGATE_CACHE_PATH, max_size: int = SURROGATE_CACHE_MAX_SIZE) -> None:
+        self.storage = DiskCache(directory, max_size, suffix=".npz")
+
+    def fetch(self, key: str) -> Optional[SampleSet]:
+        path = self.storage.lookup(key)
+        if path is None:
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                names = [str(name) for name in archive["names"]]
+                columns = [str(name) for name in archive["columns"]]
+                index_name, x_name = (str(name) for name in archive["axes"])
+                return SampleSet(names, archive["points"], archive["x"],
+                                 {name: archive[f"c{i}"] for i, name in enumerate(columns)},
+                                 index_name=index_name, x_name=x_name)
+        except (OSError, KeyError, ValueError):
+            return None  # повреждённая запись считается промахом и будет перезаписана
+
+    def store(self, key: str, samples: SampleSet):
+        os.makedirs(self.storage.directory, exist_ok=True)
+        tmp_path = os.path.join(self.storage.directory, f".{key}.{os.getpid()}.npz")
+        try:
+            arrays = {f"c{i}": values for i, values in enumerate(samples.columns.values())}
+            np.savez(tmp_path, names=np.array(samples.names), columns=np.array(list(samples.columns)),
+                     axes=np.array([samples.index_name, samples.x_name]), points=samples.points, x=samples.x, **arrays)
+            self.storage.store(key, tmp_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+class SurrogateBuilder:
+    """
+    Построение и уточнение суррогатной модели параметров names по симуляциям свипа sweep.
+
+    Args:
+        sweep: Свип схемы и модели (режим "netlist": все точки используют одну osdi-модель).
+        parameters: Описания параметров модели (ParameterParser.parse) — значения по умолчанию и границы.
+        names: Параметры суррогатной модели.
+        base: Фиксированные значения остальных параметров (передаются в каждую симуляцию).
+        cache: Кэш выборок (по умолчанию — SURROGATE_CACHE_PATH; None с use_cache=False — без кэша).
+    """
+    def __init__(self, sweep: ParameterSweep, parameters: List[dict], names: Sequence[str],
+                 base: Optional[Dict[str, str]] = None, cache: Optional[SurrogateCache] = None,
+                 use_cache: bool = True, seed: Optional[int] = None) -> None:
+        if not names:
+            raise ValueError("Не выбраны параметры суррогатной модели.")
+        self.sweep = sweep
+        self.names = list(names)
+        self.ranges = parameter_ranges(parameters, self.names)
+        self.base = {name: value for name, value in (base or {}).items() if name not in self.ranges}
+        self.cache = (cache or SurrogateCache()) if use_cache else None
+        self.rng = np.random.default_rng(seed)
+        self.samples: Optional[SampleSet] = None
+        self.simulator_calls = 0
+        self.key = None
+
+    def cache_key(self) -> str:
+        """Ключ выборки: osdi-модель, текст схемы, формат результатов, параметры с диапазонами и фиксированные значения."""
+        if self.key is not None:
+            return self.key
+        osdi_manager = OSDIManager(model_path=os.path.dirname(self.sweep.va_file),
+                                   vamodel_name=os.path.basename(self.sweep.va_file))
+        description = {f"surrogate:{name}": "{}:{}:{}".format(*self.ranges[name].as_tuple()) for name in self.names}
+        description.update(self.base)
+        # точки свипа выполняются в воркерах через ngspice -b
+        self.key = compute_result_key(osdi_manager.compute_key(), self.sweep.spice_file, description,
+                                      self.sweep.output_format, SubprocessBackend.name)
+        return self.key
+
+    def build(self, samples: int = SURROGATE_SAMPLES,
+              progress_callback: Optional[Callable[[int, int], None]] = None) -> Surrogate:
+        """
+        Строит модель по выборке из samples точек: точки из кэша используются повторно,
+        недостающие считаются симуляциями.
+        """
+        if self.samples is None and self.cache is not None:
+            self.samples = self.cache.fetch(self.cache_key())
+        missing = samples - (len(self.samples) if self.samples is not None else 0)
+        if missing > 0:
+            return self.refine(missing, progress_callback=progress_callback)
+        return self.surrogate()
+
+    def refine(self, count: int = SURROGATE_REFINE_SAMPLES, points: Sequence[Dict[str, float]] = (),
+               progress_callback: Optional[Callable[[int, int], None]] = None) -> Surrogate:
+        """
+        Уточняет модель новыми симуляциями: в точках points (например, текущие значения параметров)
+        и в count точках в наименее заполненных областях диапазонов (первая выборка — латинский гиперкуб).
+        """
+        if count > 0:
+            if self.samples is None or len(self.samples) == 0:
+                unit = latin_hypercube(count, len(self.names), self.rng)
+            else:
+                unit = spread_points(unit_points(self.ranges, self.names, self.samples.points), count, self.rng)
+            points = list(points) + [{name: float(self.ranges[name].from_unit(value)) for name, value in zip(self.names, row)}
+                                     for row in unit]
+        if not points:
+            return self.surrogate()
+
+        result = self.sweep.run([{**self.base, **point} for point in points], progress_callback=progress_callback)
+        self.simulator_calls += len(points)
+        return self.add_results(points, result.frames)
+
+    def add_results(self, points: Sequence[Dict[str, float]], frames: Sequence[Optional[pd.DataFrame]]) -> Surrogate:
+        """Добавляет в выборку результаты уже выполненных симуляций, сохраняет её в кэш и перестраивает модель."""
+        points = [{name: float(point[name]) for name in self.names} for point in points]
+        if self.samples is None:
+            self.samples = SampleSet.from_frames(self.names, points, list(frames))
+        else:
+            self.samples = self.samples.extend(points, list(frames))
+        if self.samples is None:
+            raise RuntimeError("Симуляции для суррогатной модели завершились с ошибкой.")
+        if self.cache is not None:
+            try:
+                self.cache.store(self.cache_key(), self.samples)
+            except OSError as e:
+                print(f"Не удалось сохранить выборку суррогатной модели в кэш: {e}")
+        return self.surrogate()
+
+    def surrogate(self) -> Surrogate:
+        if self.samples is None:
+            raise RuntimeError("Выборка суррогатной модели пуста.")
+        return Surrogate(self.samples, self.ranges, base=self.base)
+
@@ -0,0 +1,348 @@
+import os
+import signal
+import shutil
+import tempfile
+import itertools
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional, Sequence
+
+from core.backends import SubprocessBackend, result_file_extension
+from core.file_manager import FileManager
+from core.jobs import JobCancelled, check_cancelled, kill_process_group, observe_processes
+from core.netlist import get_va_module_name, write_scratch_netlist
+from core.osdi_cache import collect_model_sources
+from core.osdi_manager import OSDIManager
+from utils.spice_values import parse_spice_number
+from config import SWEEP_WORKSPACE_PATH, SIMULATION_OUTPUT_FORMAT
+
+
+CANCEL_POLL_INTERVAL = 0.2  # интервал проверки отмены свипа (с)
+
+
+def linear_values(start: float, stop: float, points: int) -> List[float]:
+    """Равномерная сетка значений от start до stop включительно."""
+    return np.linspace(start, stop, points).tolist()
+
+
+def log_values(start: float, stop: float, points: int) -> List[float]:
+    """Логарифмическая сетка значений от start до stop включительно (оба значения одного знака, не 0)."""
+    if start == 0 or stop == 0 or (start < 0) != (stop < 0):
+        raise ValueError("Для логарифмической сетки границы должны быть ненулевыми и одного знака.")
+    sign = -1.0 if start < 0 else 1.0
+    return (sign * np.geomspace(abs(start), abs(stop), points)).tolist()
+
+
+def build_sweep_points(values: Dict[str, Sequence[float]], grid: bool = True) -> List[Dict[str, float]]:
+    """
+    Строит список точек свипа.
+
+    Args:
+        values (Dict[str, Sequence[float]]): Значения для каждого параметра.
+        grid (bool): True — декартово произведение значений всех параметров,
+            False — параметры меняются совместно (списки должны быть одной длины).
+    """
+    names = list(values)
+    if grid:
+        combinations = itertools.product(*(values[name] for name in names))
+    else:
+        lengths = {len(values[name]) for name in names}
+        if len(lengths) > 1:
+            raise ValueError("Для совместного свипа списки значений должны быть одной длины.")
+        combinations = zip(*(values[name] for name in names))
+    return [dict(zip(names, combination)) for combination in combinations]
+
+
+def parse_sweep_spec(text: str) -> Dict[str, List[float]]:
+    """
+    Разбирает текстовое описание свипа вида "nff=1:1.2:5; ik=log:1m:0.1:3; vef=40,44,50".
+
+    Форматы значений параметра:
+        a,b,c                   — список значений;
+        start:stop:points       — равномерная сетка;
+        log:start:stop:points   — логарифмическая сетка.
+    Значения записываются в нотации SPICE (1m, 10p, 1meg).
+    """
+    values: Dict[str, List[float]] = {}
+    for item in filter(None, (part.strip() for part in text.split(";"))):
+        name, separator, spec = item.partition("=")
+        if not separator or not name.strip():
+            raise ValueError(f"Неверное описание свипа: {item}")
+        parts = [part.strip() for part in spec.split(":")]
+        if parts[0].lower() == "log" and len(parts) == 4:
+            values[name.strip()] = log_values(parse_spice_number(parts[1]), parse_spice_number(parts[2]), int(parts[3]))
+        elif len(parts) == 3:
+            values[name.strip()] = linear_values(parse_spice_number(parts[0]), parse_spice_number(parts[1]), int(parts[2]))
+        elif len(parts) == 1:
+            values[name.strip()] = [parse_spice_number(value) for value in parts[0].split(",") if value.strip()]
+        else:
+            raise ValueError(f"Неверное описание значений параметра {name.strip()}: {spec}")
+    return values
+
+
+def format_value(value) -> str:
+    return f"{value:.12g}" if isinstance(value, (int, float, np.floating)) else str(value)
+
+
+def prepare_model_workspace(va_file: str, workspace: str, contents: Optional[Callable[[str], bytes]] = None) -> str:
+    """
+    Копирует исходники модели (.va и подключаемые файлы) в workspace с сохранением относительных путей.
+    Компилятор openvaf из каталога модели подключается символической ссылкой.
+
+    Args:
+        contents: Содержимое копии по пути исходного файла (например, исходная версия файла,
+            core/reference_data.original_content); по умолчанию файлы копируются как есть.
+
+    Returns:
+        str: Путь к копии .va файла.
+    """
+    model_dir = os.path.dirname(os.path.abspath(va_file))
+    for source in collect_model_sources(va_file):
+        destination = os.path.join(workspace, os.path.relpath(source, model_dir))
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        if contents is None:
+            shutil.copy2(source, destination)
+        else:
+            with open(destination, "wb") as file:
+                file.write(contents(source))
+
+    compiler = os.path.basename(OSDIManager.get_compiler_command())
+    compiler_path = os.path.join(model_dir, compiler)
+    if os.path.exists(compiler_path):
+        try:
+            os.symlink(compiler_path, os.path.join(workspace, compiler))
+        except OSError:
+            shutil.copy2(compiler_path, os.path.join(workspace, compiler))
+
+    return os.path.join(workspace, os.path.basename(va_file))
+
+
+_process_groups = None  # очередь групп процессов воркера свипа (SweepExecutor.process_groups)
+_cancelled = None       # событие отмены свипа (SweepExecutor.cancelled)
+
+
+def init_sweep_worker(process_groups, cancelled):
+    global _process_groups, _cancelled
+    _process_groups, _cancelled = process_groups, cancelled
+
+
+def report_process_group(process, started: bool):
+    """
+    Передаёт родительскому процессу группу запущенного (started) или завершённого процесса воркера.
+    Процесс, запущенный после отмены свипа, завершается сразу: группа сообщается до проверки отмены,
+    поэтому её завершает либо воркер, либо kill_running.
+    """
+    if _process_groups is not None:
+        _process_groups.put((process.pid, started))  # run_process создаёт процесс в собственной группе
+    if started and _cancelled is not None and _cancelled.is_set():
+        kill_process_group(process)
+
+
+def check_sweep_cancelled():
+    if _cancelled is not None and _cancelled.is_set():
+        raise RuntimeError("Свип отменён.")
+
+
+class SweepExecutor(ProcessPoolExecutor):
+    """
+    Пул процессов свипа. Воркеры сообщают группы запущенных ими процессов openvaf и ngspice,
+    поэтому при отмене свипа kill_running завершает и уже выполняющиеся точки; после отмены
+    воркеры не начинают новые точки и сразу завершают запущенные процессы.
+    """
+    def __init__(self, max_workers: int) -> None:
+        self.process_groups = multiprocessing.SimpleQueue()
+        self.cancelled = multiprocessing.Event()
+        self.running_groups = set()
+        super().__init__(max_workers=max_workers, initializer=init_sweep_worker,
+                         initargs=(self.process_groups, self.cancelled))
+
+    def kill_running(self):
+        self.cancelled.set()
+        while not self.process_groups.empty():
+            group, started = self.process_groups.get()
+            if started:
+                self.running_groups.add(group)
+            else:
+                self.running_groups.discard(group)
+        if os.name != "posix":
+            return
+        for group in self.running_groups:
+            try:
+                os.killpg(group, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass  # процесс уже завершился
+        self.running_groups.clear()
+
+
+def run_sweep_job(job: dict) -> pd.DataFrame:
+    """
+    Выполняет одну точку свипа в отдельном рабочем каталоге (функция выполняется в процессе-воркере).
+
+    В режиме "netlist" параметры записываются в карточку .model копии схемы и используется
+    общая osdi-модель. В режиме "recompile" исходники модели копируются в рабочий каталог,
+    параметры записываются в копию файла параметров и модель собирается в рабочем каталоге.
+    """
+    check_sweep_cancelled()
+    workspace = tempfile.mkdtemp(prefix="job_", dir=job["workspace_root"])
+    job_netlist = None
+    try:
+        with observe_processes(report_process_group):
+            backend = SubprocessBackend(output_format=job["output_format"])
+            result_file = os.path.join(workspace, "result" + result_file_extension(job["output_format"]))
+            spice_file = job["spice_file"]
+            parameters = {name: format_value(value) for name, value in job["parameters"].items()}
+
+            if job["mode"] == "recompile":
+                va_copy = prepare_model_workspace(job["va_file"], workspace)
+                model_dir = os.path.dirname(os.path.abspath(job["va_file"]))
+                parameters_copy = os.path.join(workspace, os.path.relpath(job["parameters_file"], model_dir))
+                FileManager().apply_changes_to_file(parameters, parameters_copy)
+
+                osdi_manager = OSDIManager(model_path=workspace, vamodel_name=os.path.basename(va_copy),
+                                           osdi_dir=os.path.join(workspace, "osdi"))
+                osdi_manager.rebuild_osdi()
+                osdi_manager.move_osdi_file()
+
+                job_netlist = write_scratch_netlist(spice_file, [], {}, osdi_file=osdi_manager.get_osdi_path())
+                data = backend.run(job_netlist, result_file)
+            else:
+                data = backend.run(spice_file, result_file, parameters=parameters, model_types=job["model_types"])
+
+            return data.copy(deep=True)  # отвязываем данные от файла результатов перед удалением рабочего каталога
+    finally:
+        if job_netlist and os.path.exists(job_netlist):
+            os.remove(job_netlist)
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+class SweepResult:
+    """
+    Результаты свипа: точки, таблицы отдельных запусков и сложенные массивы по колонкам.
+
+    columns[name] имеет форму (число точек свипа, длина самой длинной кривой);
+    недостающие значения (неудачные запуски, кривые разной длины) заполнены NaN.
+    """
+    def __init__(self, points: List[Dict[str, float]], frames: List[Optional[pd.DataFrame]], errors: Dict[int, str]) -> None:
+        self.points = points
+        self.frames = frames
+        self.errors = errors
+        self.columns = self.__stack(frames)
+
+    @staticmethod
+    def __stack(frames: List[Optional[pd.DataFrame]]) -> Dict[str, np.ndarray]:
+        valid = [frame for frame in frames if frame is not None]
+        if not valid:
+            return {}
+        length = max(len(frame) for frame in valid)
+        columns = {}
+        for name in valid[0].columns[1:]:
+            stacked = np.full((len(frames), length), np.nan)
+            for i, frame in enumerate(frames):
+                if frame is not None and name in frame:
+                    values = frame[name].to_numpy(dtype=np.float64)
+                    stacked[i, :len(values)] = values
+            columns[name] = stacked
+        return columns
+
+
+class ParameterSweep:
+    """
+    Параллельный свип параметров модели на пуле процессов.
+
+    Каждая точка свипа выполняется в собственном рабочем каталоге со своей копией схемы,
+    своим файлом результатов и (в режиме "recompile") своей копией модели, поэтому точки
+    не мешают друг другу и исходные файлы не изменяются.
+    """
+    def __init__(self, spice_file: str, va_file: str, parameters_file: Optional[str] = None, mode: str = "netlist",
+                 output_format: str = SIMULATION_OUTPUT_FORMAT, max_workers: Optional[int] = None) -> None:
+        self.spice_file = os.path.abspath(spice_file)
+        self.va_file = os.path.abspath(va_file)
+        self.parameters_file = os.path.abspath(parameters_file) if parameters_file else None
+        self.mode = mode
+        self.output_format = output_format
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+        if mode == "recompile" and not self.parameters_file:
+            raise ValueError("Для свипа с перекомпиляцией необходимо указать файл параметров.")
+
+    def make_jobs(self, points: List[Dict[str, float]]) -> List[dict]:
+        os.makedirs(SWEEP_WORKSPACE_PATH, exist_ok=True)
+        model_types = [name for name in (get_va_module_name(self.va_file),
+                                          os.path.splitext(os.path.basename(self.va_file))[0]) if name]
+        return [{
+            "spice_file": self.spice_file,
+            "va_file": self.va_file,
+            "parameters_file": self.parameters_file,
+            "model_types": model_types,
+            "mode": self.mode,
+            "output_format": self.output_format,
+            "workspace_root": SWEEP_WORKSPACE_PATH,
+            "parameters": point,
+        } for point in points]
+
+    def create_executor(self, jobs_count: Optional[int] = None) -> SweepExecutor:
+        """Создаёт пул процессов для выполнения точек свипа."""
+        workers = self.max_workers if jobs_count is None else min(self.max_workers, max(jobs_count, 1))
+        return SweepExecutor(max_workers=workers)
+
+    def run(self, points: List[Dict[str, float]],
+            progress_callback: Optional[Callable[[int, int], None]] = None,
+            executor: Optional[SweepExecutor] = None) -> SweepResult:
+        """
+        Выполняет свип по списку точек.
+
+        Args:
+            points: Значения параметров для каждого запуска (см. build_sweep_points).
+            progress_callback: Вызывается как progress_callback(выполнено, всего) после каждого запуска.
+            executor: Уже созданный пул процессов (например, для серии свипов); по умолчанию создаётся новый.
+
+        В задании очереди (core/jobs.py) отмена проверяется во время свипа: ещё не начатые точки
+        отменяются, процессы openvaf и ngspice выполняющихся точек завершаются и выбрасывается JobCancelled.
+        """
+        if self.mode == "netlist":
+            # все точки используют одну osdi-модель, собранную из неизменённых исходников
+            osdi_manager = OSDIManager(model_path=os.path.dirname(self.va_file), vamodel_name=os.path.basename(self.va_file))
+            osdi_manager.rebuild_osdi()
+            osdi_manager.move_osdi_file()
+
+        jobs = self.make_jobs(points)
+        frames: List[Optional[pd.DataFrame]] = [None] * len(jobs)
+        errors: Dict[int, str] = {}
+
+        own_executor = executor is None
+        if own_executor:
+            executor = self.create_executor(len(jobs))
+        futures: Dict = {}
+        cancelled = False
+        try:
+            futures = {executor.submit(run_sweep_job, job): index for index, job in enumerate(jobs)}
+            pending, done = set(futures), 0
+            while pending:
+                # ожидание с таймаутом: отмена задания очереди проверяется, пока точки выполняются
+                finished, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                check_cancelled()
+                for future in finished:
+                    index = futures[future]
+                    try:
+                        frames[index] = future.result()
+                    except Exception as e:
+                        errors[index] = str(e)
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done, len(jobs))
+        except JobCancelled:
+            cancelled = True
+            for future in futures:
+                future.cancel()  # ещё не начатые точки
+            if isinstance(executor, SweepExecutor):
+                executor.kill_running()  # выполняющиеся точки завершаются с ошибкой процесса
+            raise
+        finally:
+            if own_executor:
+                executor.shutdown(wait=not cancelled, cancel_futures=cancelled)
+
+        return SweepResult(points, frames, errors)
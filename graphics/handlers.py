@@ -1,54 +1,171 @@
 import threading
+import math
 import os
 import gi
 
 from datetime import datetime
-import matplotlib.pyplot as plt
+from matplotlib.patches import Rectangle
 gi.require_version("Gtk", "3.0")
 from gi.repository import Gtk, GLib, Gdk
 
 from ios_switch import IosStyleSwitch
 
 from core.file_manager import FileManager
-from core.simulation_runner import SimulationRunner
-from plotting.plot_simulation import SimulationManager
+from core.jobs import JobScheduler, FINISHED_STATES
+from graphics.main_loop import call_in_main_loop
+from core.progress import format_remaining
+from core.modes import NETLIST_MODE, RECOMPILE_MODE
+from core.netlist import result_file_extension
 from utils.parameter_parser import ParameterParser, FileIgnoreParamsLoader
-from config import MODEL_CODE_PATH, SPICE_EXAMPLES_PATH, IGNORE_PARAMS_FILE, OUTPUT_DATA_PATH, SIMULATION_RAW_DATA_PATH, CONFIG_OPTIONS, PICS_PATH
+from utils.spice_values import find_range_violations, parse_spice_number
+from utils.va_preprocessor import load_parameter_catalog
+from config import MODEL_CODE_PATH, SPICE_EXAMPLES_PATH, IGNORE_PARAMS_FILE, OUTPUT_DATA_PATH, SIMULATION_RAW_DATA_PATH, CONFIG_OPTIONS, PICS_PATH, INITIAL_RECOMPILE_FREE, SIMULATION_BACKEND, NGSPICE_LIBRARY_PATH, SIMULATION_OUTPUT_FORMAT, SCROLL_REDRAW_INTERVAL, MAX_SIMULATION_JOBS, INITIAL_AUTO_RUN, AUTO_RUN_DELAY, SURROGATE_SAMPLES, SURROGATE_REFINE_SAMPLES, ORIGINAL_SOURCES_PATH
 from utils import shorten_file_path
+from utils.startup_profile import profiler
+from utils.tracing import tracer
+
+
+MAX_SHOWN_VIOLATIONS = 20  # число нарушений диапазонов, выводимых в окне ошибки
+
+
+def zoom_limits(limits, center: float, factor: float, scale: str):
+    """
+    Границы оси после масштабирования в factor раз относительно точки center. Логарифмическая ось
+    масштабируется в пространстве log10, чтобы точка под курсором оставалась на месте.
+    """
+    if scale == "log" and center > 0 and min(limits) > 0:
+        low, high, center = math.log10(limits[0]), math.log10(limits[1]), math.log10(center)
+        return [10 ** (center - (center - low) * factor), 10 ** (center + (high - center) * factor)]
+    return [center - (center - limits[0]) * factor, center + (limits[1] - center) * factor]
 
 
 class SimulatorHandlers:
-    def __init__(self, params_box, file_button, fig, ax, canvas_plot, progress_bar, parent_window):
+    def __init__(self, parameter_table, file_button, fig, ax, canvas_plot, progress_bar, parent_window):
         self.parent_window = parent_window  # ссылка на главное приложение
 
-        self.params_box = params_box
+        self.parameter_table = parameter_table
         self.file_button = file_button
         self.fig = fig
         self.ax = ax
         self.canvas_plot = canvas_plot
         self.progress_bar = progress_bar
 
-        self.simulation_manager = SimulationManager()  # Создаём менеджер симуляции
-        self.user_result_file = os.path.join(SIMULATION_RAW_DATA_PATH, "simulation_data.txt")
+        self._simulation_manager = None  # создаётся при первом обращении (модули построения графиков тянут pandas)
+        self.user_result_file = os.path.join(SIMULATION_RAW_DATA_PATH,
+                                             "simulation_data" + result_file_extension(SIMULATION_OUTPUT_FORMAT))
 
         self.parsing_file = ("No File Selected")
+        self.model_file = None
+        self.parameter_parser = None
         self.spice_file = None
         self.simulation_runner = None
-        self.file_manager = FileManager()
-
-        self.parameter_entries = []  # Список для хранения виджетов параметров
+        self.file_manager = FileManager(ORIGINAL_SOURCES_PATH)
+        self._backend = None  # создаётся при первом запуске симуляции
+        self.scheduler = JobScheduler(MAX_SIMULATION_JOBS)  # очередь симуляций и свипов
+        self.scheduler.add_listener(self.__on_job_update)
+        self.progress_job = None  # задание, прогресс которого показывает индикатор (последний запуск)
+
+        self.parameter_mode = NETLIST_MODE if INITIAL_RECOMPILE_FREE else RECOMPILE_MODE
+        self.auto_run = INITIAL_AUTO_RUN
+        self.auto_run_source = None  # таймер отложенного автозапуска (GLib source id)
+        self.surrogate = None           # суррогатная модель (core/surrogate) для мгновенных кривых
+        self.surrogate_builder = None
+        self.surrogate_source = None    # (модель, схема), для которых построена суррогатная модель
+        parameter_table.on_change = self.on_parameters_changed
 
         self.start_point = None
         self.selection_rect = None
+        self.background = None        # фон осей для блиттинга прямоугольника выделения
+        self.redraw_pending = False   # перерисовка после прокрутки уже запланирована
         self.original_xlim = None
         self.original_ylim = None
 
-    def set_configuration(self, model_name):
+    def attach_plot(self, fig, ax, canvas_plot):
+        """Подключает график, созданный после показа окна."""
+        self.fig = fig
+        self.ax = ax
+        self.canvas_plot = canvas_plot
+
+    @property
+    def simulation_manager(self):
+        """Менеджер построения графиков (модуль plotting.plot_simulation загружается при первом обращении)."""
+        if self._simulation_manager is None:
+            from plotting.plot_simulation import SimulationManager
+            self._simulation_manager = SimulationManager()
+        return self._simulation_manager
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = self.__create_backend()
+        return self._backend
+
+    def __create_simulation_runner(self, parsing_file):
+        from core.simulation_runner import SimulationRunner
+        return SimulationRunner(parsing_file, self.simulation_manager, self.user_result_file,
+                                parameter_mode=self.parameter_mode, backend=self.backend)
+
+    def __set_model(self, model_file):
+        """
+        Устанавливает модель запуска. У каждой модели свой файл пользовательских результатов:
+        запуски разных моделей выполняются одновременно (см. __job_group).
+        """
+        self.simulation_runner.set_model(model_file)
+        model_name = os.path.splitext(os.path.basename(model_file))[0]
+        self.simulation_runner.user_result_file = os.path.join(
+            SIMULATION_RAW_DATA_PATH, f"simulation_data_{model_name}" + result_file_extension(SIMULATION_OUTPUT_FORMAT))
+
+    def __create_backend(self):
+        """Создаёт backend симуляции из конфигурации; при недоступности libngspice используется ngspice -b."""
+        from core.backends import create_backend
+
+        if SIMULATION_BACKEND == "shared":
+            try:
+                return create_backend("shared", library_path=NGSPICE_LIBRARY_PATH,
+                                      output_format=SIMULATION_OUTPUT_FORMAT)
+            except (FileNotFoundError, OSError) as e:
+                print("libngspice недоступна, используется запуск ngspice -b:", e)
+        return create_backend("subprocess", output_format=SIMULATION_OUTPUT_FORMAT)
+
+    def load_configuration_async(self, model_name):
+        """
+        Загружает конфигурацию в фоне: разбор файла параметров и импорт модулей симуляции
+        выполняются в отдельном потоке, а виджеты заполняются в главном цикле GTK.
+        """
+        config = CONFIG_OPTIONS.get(model_name)
+        if not config:
+            self.set_configuration(model_name)
+            return
+
+        def worker():
+            try:
+                with profiler.span("Разбор параметров первой модели"):
+                    ignore_params_loader = FileIgnoreParamsLoader(ignore_file=IGNORE_PARAMS_FILE)
+                    parser = ParameterParser(file_path=os.path.abspath(config["parameters"]),
+                                             ignore_params_loader=ignore_params_loader,
+                                             model_file=os.path.abspath(config["model"]))
+                    parameters = parser.parse()
+                with profiler.span("Импорт модулей симуляции"):
+                    import core.simulation_runner  # noqa: F401 — прогрев импорта вне главного потока
+            except Exception:
+                parameters = None  # ошибка будет показана при разборе в главном потоке
+            GLib.idle_add(self.__finish_configuration, model_name, parameters)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def __finish_configuration(self, model_name, parameters):
+        self.set_configuration(model_name, parameters)
+        profiler.mark("Первая конфигурация загружена")
+        profiler.report()
+        return False
+
+    def set_configuration(self, model_name, parameters=None):
         """
         Обновляет конфигурацию симуляции по выбранной модели.
         По выбранному имени из CONFIG_OPTIONS устанавливаются абсолютные пути к файлам,
         затем производится обновление параметров и инициализация SimulationRunner с передачей
         simulation_manager и пути для сохранения результатов.
+        Уже разобранные параметры (parameters) используются без повторного чтения файла.
         """
         config = CONFIG_OPTIONS.get(model_name)
         if not config:
@@ -56,62 +173,41 @@ class SimulatorHandlers:
             return
 
         self.parsing_file = os.path.abspath(config["parameters"])
-        model_file = os.path.abspath(config["model"])
+        model_file = self.model_file = os.path.abspath(config["model"])
         self.spice_file = os.path.abspath(config["spice"])
 
         if self.file_button:
             short_path = shorten_file_path(self.parsing_file, max_length=40)
             self.file_button.set_label(("File: ") + short_path)
 
-        self.update_parameters(self.parsing_file)
+        self.update_parameters(self.parsing_file, parameters)
 
-        self.simulation_runner = SimulationRunner(self.parsing_file, self.simulation_manager, self.user_result_file)
-        self.simulation_runner.set_model(model_file)
+        self.simulation_runner = self.__create_simulation_runner(self.parsing_file)
+        self.__set_model(model_file)
 
         print(("Выбрана конфигурация:"), model_name)
         print(("Путь к файлу параметров:"), self.parsing_file)
         print(("Путь к модели:"), model_file)
         print(("Путь к spice-схеме:"), self.spice_file)
 
-    def update_parameters(self, parsing_file):
-        """Обновляет параметры на основе выбранного файла с использованием обновлённого парсера."""
+    def update_parameters(self, parsing_file, parameters=None):
+        """
+        Обновляет параметры на основе выбранного файла. Описания берутся из каталога параметров модели,
+        который пересобирается только при изменении её исходников.
+        """
         try:
             ignore_params_loader = FileIgnoreParamsLoader(ignore_file=IGNORE_PARAMS_FILE)
-            parser = ParameterParser(file_path=parsing_file, ignore_params_loader=ignore_params_loader)
-            parameters = parser.parse()
-
-            for widget in self.params_box.get_children():
-                self.params_box.remove(widget)
-            self.parameter_entries = []
-
-            for param in parameters:
-                self.__add_parameter_row(self.params_box, param["name"], str(param["default_value"]))
+            self.parameter_parser = ParameterParser(file_path=parsing_file, ignore_params_loader=ignore_params_loader,
+                                                    model_file=self.model_file)
+            if parameters is None:
+                parameters = self.parameter_parser.parse()
 
-            self.params_box.show_all()
-            self.simulation_runner = SimulationRunner(parsing_file, self.simulation_manager, self.user_result_file)
+            self.parameter_table.load(parameters)
+            self.simulation_runner = self.__create_simulation_runner(parsing_file)
         except Exception as e:
             self.__show_message_dialog(("Ошибка"), ("Ошибка при загрузке параметров."), Gtk.MessageType.ERROR)
             return
 
-    def __add_parameter_row(self, params_box, param_name, default_value):
-        """Добавляет строку параметра в params_box и сохраняет её в списке параметров."""
-        row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
-        label = Gtk.Label(label=param_name)
-        entry = Gtk.Entry()
-        entry.set_text(default_value)
-        entry.set_size_request(100, -1)
-        # switch = IosStyleSwitch(size=(50, 25))
-        # switch.set_valign(Gtk.Align.CENTER)
-        row.pack_start(label, False, False, 5)
-        row.pack_start(entry, True, True, 5)
-        # row.pack_start(switch, False, False, 5)
-        params_box.pack_start(row, False, False, 5)
-        self.parameter_entries.append({
-            "name": param_name,
-            "entry": entry,
-            # "switch": switch
-        })
-
     def choose_parsing_file(self, widget):
         """Выбор файла параметров через диалог."""
         initial_dir = MODEL_CODE_PATH
@@ -142,8 +238,8 @@ class SimulatorHandlers:
         dialog.add_buttons(Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL,
                            Gtk.STOCK_OPEN, Gtk.ResponseType.OK)
         if dialog.run() == Gtk.ResponseType.OK:
-            model_file = dialog.get_filename()
-            self.simulation_runner.set_model(model_file)
+            model_file = self.model_file = dialog.get_filename()
+            self.__set_model(model_file)
             print(_("Модель выбрана:"), os.path.basename(model_file))
             dialog.destroy()
             self.__show_message_dialog(("Уведомление"),
@@ -180,51 +276,367 @@ class SimulatorHandlers:
             return
 
     def apply_changes(self, widget):
-        """Применяет изменения к файлу параметров."""
+        """
+        Применяет изменения к файлу параметров. Записываются только изменённые значения,
+        остальные сохраняют исходную запись (множители, макросы); без изменений файл не перезаписывается.
+        """
         if not self.simulation_runner:
             self.__show_message_dialog(_("Ошибка"), ("Модель не выбрана."), Gtk.MessageType.ERROR)
             return
-        current_parameters = {}
-        for param in self.parameter_entries:
-            current_parameters[param["name"]] = param["entry"].get_text()
+        modified_parameters = self.get_modified_parameters()
+        if not self.__check_parameter_values(modified_parameters):
+            return
         try:
-            self.file_manager.apply_changes_to_file(current_parameters, self.parsing_file)
-            self.__show_message_dialog(("Уведомление"),
-                                       ("Изменения успешно применены в ") + self.parsing_file + ".",
-                                       Gtk.MessageType.INFO)
+            with tracer.trace("Применение изменений " + os.path.basename(self.parsing_file)):
+                written = self.file_manager.apply_changes_to_file(modified_parameters, self.parsing_file)
+            self.parameter_table.commit()
+            if written:
+                self.surrogate = self.surrogate_builder = None  # выборка построена для прежних значений файла параметров
+            message = ("Изменения успешно применены в ") + self.parsing_file + "." if written else \
+                ("Значения в ") + self.parsing_file + (" не изменились, файл не перезаписан.")
+            self.__show_message_dialog(("Уведомление"), message, Gtk.MessageType.INFO)
         except Exception as e:
             self.__show_message_dialog(("Ошибка"), ("Не удалось применить изменения."), Gtk.MessageType.ERROR)
             return
 
-    def start_simulation(self, button):
-        """Запускает симуляцию с обновлением прогресса и обработкой ошибок."""
+    def start_simulation(self, button, preview=False):
+        """
+        Запускает симуляцию с обновлением прогресса и обработкой ошибок.
+
+        preview — автозапуск после изменения параметров: ошибки не открывают окон (они попадают
+        в предупреждения задания), недопустимые значения пропускаются, а на графике заменяется
+        только пользовательская кривая.
+        """
+        if self.fig is None:
+            return  # окно ещё создаёт график
         if not self.simulation_runner:
-            self.__show_message_dialog(_("Ошибка"), ("Сначала выберите файл параметров."), Gtk.MessageType.ERROR)
+            if not preview:
+                self.__show_message_dialog(_("Ошибка"), ("Сначала выберите файл параметров."), Gtk.MessageType.ERROR)
             return
         if not self.spice_file:
-            self.__show_message_dialog(_("Ошибка"), ("Сначала выберите SPICE-файл."), Gtk.MessageType.ERROR)
+            if not preview:
+                self.__show_message_dialog(_("Ошибка"), ("Сначала выберите SPICE-файл."), Gtk.MessageType.ERROR)
             return
 
-        def simulate():
+        parameters = None
+        if self.simulation_runner.parameter_mode == NETLIST_MODE:
+            parameters = self.get_modified_parameters()
+            if not self.__check_parameter_values(parameters, show_errors=not preview):
+                return
+
+        runner, spice_file = self.simulation_runner, self.spice_file
+
+        def simulate(job):
             try:
-                for progress in self.simulation_runner.run_simulation(
-                        spice_file=self.spice_file,
+                for progress in runner.run_simulation(
+                        spice_file=spice_file,
                         canvas=self.canvas_plot,
-                        fig=self.fig):
+                        fig=self.fig,
+                        parameters=parameters,
+                        dispatch=call_in_main_loop,  # график строится в главном цикле GTK
+                        preview=preview):
+                    job.check_cancelled()
                     if isinstance(progress, str):
-                        GLib.idle_add(self.__show_error_dialog, progress)
+                        if preview:
+                            job.warn(progress)
+                        else:
+                            GLib.idle_add(self.__show_error_dialog, progress)
                         return
-                    GLib.idle_add(self.__update_progress_bar, progress)
+                    job.report(progress)
             except RuntimeError as warning:
-                GLib.idle_add(self.__show_message_dialog, ("Предупреждение"), str(warning), Gtk.MessageType.WARNING)
+                if preview:
+                    job.warn(str(warning))
+                else:
+                    GLib.idle_add(self.__show_message_dialog, ("Предупреждение"), str(warning), Gtk.MessageType.WARNING)
             except Exception as e:
                 message = ("Ошибка симуляции: %s") % str(e)
                 # GLib.idle_add(self.__show_message_dialog, _("Ошибка"), message, Gtk.MessageType.ERROR)
 
-        threading.Thread(target=simulate, daemon=True).start()
+        # новый запуск заменяет ожидающий и отменяет выполняющийся запуск той же модели
+        name = ("Предпросмотр ") if preview else ("Симуляция ")
+        self.progress_job = self.scheduler.submit(name + runner.vamodel_name, simulate,
+                                                  group=self.__job_group(), replace=True)
+
+    def on_parameters_changed(self):
+        """
+        Изменение значения в таблице параметров (ячейка или ползунок): при включённом автозапуске
+        симуляция откладывается на AUTO_RUN_DELAY мс после последнего изменения, так что при
+        движении ползунка запускается только последнее значение. Выполняющийся запуск отменяется
+        новым (replace в очереди заданий). Если построена суррогатная модель, её кривая показывается
+        сразу, до симуляции.
+        """
+        self.__preview_surrogate()
+        if not self.auto_run or self.parameter_mode != NETLIST_MODE:
+            return
+        if self.auto_run_source is not None:
+            GLib.source_remove(self.auto_run_source)
+        self.auto_run_source = GLib.timeout_add(AUTO_RUN_DELAY, self.__auto_run)
+
+    def __auto_run(self):
+        self.auto_run_source = None
+        self.start_simulation(None, preview=True)
+        return False
+
+    def toggle_auto_run(self, widget, state):
+        """
+        Переключение автозапуска. Предпросмотр использует режим без перекомпиляции (значения
+        в карточке .model, osdi-модель из кэша), поэтому он включается вместе с автозапуском.
+        """
+        self.auto_run = state
+        if not state and self.auto_run_source is not None:
+            GLib.source_remove(self.auto_run_source)
+            self.auto_run_source = None
+        recompile_free_switch = getattr(self.parent_window, "recompile_free_switch", None)
+        if state and self.parameter_mode != NETLIST_MODE and recompile_free_switch is not None:
+            recompile_free_switch.set_active(True)
+        return True
+
+    def __job_group(self):
+        """
+        Группа заданий очереди: запуски с общим файлом результатов (одной модели; эталон и osdi-файл
+        в OSDILIBS_PATH тоже называются по имени модели) выполняются по очереди.
+        """
+        return self.simulation_runner.user_result_file
+
+    def start_sweep(self, button):
+        """Запрашивает описание свипа и выполняет его параллельно на пуле процессов."""
+        if self.fig is None:
+            return
+        if not self.simulation_runner or not self.simulation_runner.vamodel_name:
+            self.__show_message_dialog(_("Ошибка"), ("Модель не выбрана."), Gtk.MessageType.ERROR)
+            return
+        if not self.spice_file:
+            self.__show_message_dialog(_("Ошибка"), ("Сначала выберите SPICE-файл."), Gtk.MessageType.ERROR)
+            return
+
+        dialog = Gtk.Dialog(title=("Свип параметров"), transient_for=self.parent_window, flags=Gtk.DialogFlags.MODAL)
+        dialog.add_buttons(Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL, Gtk.STOCK_OK, Gtk.ResponseType.OK)
+        hint = Gtk.Label(label=("Формат: nff=1:1.2:5; ik=log:1e-3:0.1:3; vef=40,44,50\n"
+                                "Для нескольких параметров строится декартова сетка."), xalign=0)
+        spec_entry = Gtk.Entry()
+        spec_entry.set_activates_default(True)
+        dialog.set_default_response(Gtk.ResponseType.OK)
+        content = dialog.get_content_area()
+        content.set_spacing(5)
+        content.pack_start(hint, False, False, 5)
+        content.pack_start(spec_entry, False, False, 5)
+        dialog.show_all()
+        response = dialog.run()
+        spec = spec_entry.get_text()
+        dialog.destroy()
+        if response != Gtk.ResponseType.OK or not spec.strip():
+            return
+
+        from core.sweep import ParameterSweep, build_sweep_points, parse_sweep_spec
+
+        try:
+            values = parse_sweep_spec(spec)
+            points = build_sweep_points(values)
+            sweep = ParameterSweep(
+                spice_file=self.spice_file,
+                va_file=os.path.join(self.simulation_runner.model_path, self.simulation_runner.vamodel_name),
+                parameters_file=self.parsing_file,
+                mode=self.parameter_mode,
+                output_format=SIMULATION_OUTPUT_FORMAT,
+            )
+        except Exception as e:
+            self.__show_message_dialog(("Ошибка"), ("Неверное описание свипа: ") + str(e), Gtk.MessageType.ERROR)
+            return
+        if not self.__check_parameter_values(values):
+            return
+
+        def sweep_worker(job):
+            def report(done, total):
+                job.report(done / total)
+
+            try:
+                result = sweep.run(points, progress_callback=report)
+                labels = [", ".join(f"{name}={value:.4g}" for name, value in point.items()) for point in points]
+                GLib.idle_add(self.simulation_manager.run_sweep, self.fig, self.canvas_plot, result.frames, labels)
+                if result.errors:
+                    message = "\n".join(f"{labels[index]}: {error}" for index, error in result.errors.items())
+                    GLib.idle_add(self.__show_message_dialog, ("Предупреждение"), message, Gtk.MessageType.WARNING)
+            except Exception as e:
+                GLib.idle_add(self.__show_error_dialog, ("Ошибка свипа: %s") % str(e))
+
+        self.progress_job = self.scheduler.submit(("Свип: ") + spec.strip(), sweep_worker, group=self.__job_group())
+
+    def build_surrogate(self, button):
+        """
+        Запрашивает параметры и число симуляций и строит суррогатную модель: выборка считается
+        свипом (или берётся из кэша), после чего изменение этих параметров сразу показывает
+        предсказанную кривую. Остальные изменённые значения фиксируются в каждой симуляции выборки.
+        """
+        if self.fig is None:
+            return
+        if not self.simulation_runner or not self.simulation_runner.vamodel_name or not self.parameter_parser:
+            self.__show_message_dialog(_("Ошибка"), ("Модель не выбрана."), Gtk.MessageType.ERROR)
+            return
+        if not self.spice_file:
+            self.__show_message_dialog(_("Ошибка"), ("Сначала выберите SPICE-файл."), Gtk.MessageType.ERROR)
+            return
+
+        dialog = Gtk.Dialog(title=("Суррогатная модель"), transient_for=self.parent_window, flags=Gtk.DialogFlags.MODAL)
+        dialog.add_buttons(Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL, Gtk.STOCK_OK, Gtk.ResponseType.OK)
+        hint = Gtk.Label(label=("Параметры через запятую, например: nff, ik, vef\n"
+                                "Значения выбираются в границах параметров модели."), xalign=0)
+        names_entry = Gtk.Entry()
+        names_entry.set_activates_default(True)
+        if self.surrogate is not None:
+            names_entry.set_text(", ".join(self.surrogate.names))
+        samples_button = Gtk.SpinButton.new_with_range(4, 10000, 1)
+        samples_button.set_value(SURROGATE_SAMPLES)
+        samples_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
+        samples_box.pack_start(Gtk.Label(label=("Симуляций:")), False, False, 0)
+        samples_box.pack_start(samples_button, False, False, 0)
+        dialog.set_default_response(Gtk.ResponseType.OK)
+        content = dialog.get_content_area()
+        content.set_spacing(5)
+        content.pack_start(hint, False, False, 5)
+        content.pack_start(names_entry, False, False, 5)
+        content.pack_start(samples_box, False, False, 5)
+        dialog.show_all()
+        response = dialog.run()
+        names = [name.strip() for name in names_entry.get_text().split(",") if name.strip()]
+        samples = samples_button.get_value_as_int()
+        dialog.destroy()
+        if response != Gtk.ResponseType.OK or not names:
+            return
+
+        from core.surrogate import SurrogateBuilder
+        from core.sweep import ParameterSweep
+
+        va_file = os.path.join(self.simulation_runner.model_path, self.simulation_runner.vamodel_name)
+        source = (va_file, self.spice_file)
+        base = {name: value for name, value in self.get_modified_parameters().items() if name not in names}
+        if not self.__check_parameter_values(base):
+            return
+        try:
+            sweep = ParameterSweep(spice_file=self.spice_file, va_file=va_file, parameters_file=self.parsing_file,
+                                   mode=NETLIST_MODE, output_format=SIMULATION_OUTPUT_FORMAT)
+            builder = SurrogateBuilder(sweep, self.parameter_parser.parse(), names, base=base)
+        except Exception as e:
+            self.__show_message_dialog(("Ошибка"), ("Неверные параметры суррогатной модели: ") + str(e), Gtk.MessageType.ERROR)
+            return
+
+        def surrogate_worker(job):
+            try:
+                surrogate = builder.build(samples, progress_callback=lambda done, total: job.report(done / total))
+                GLib.idle_add(self.__set_surrogate, builder, surrogate, source)
+            except Exception as e:
+                GLib.idle_add(self.__show_error_dialog, ("Ошибка суррогатной модели: %s") % str(e))
+
+        self.progress_job = self.scheduler.submit(("Суррогат: ") + ", ".join(names), surrogate_worker,
+                                                  group=self.__job_group())
+
+    def refine_surrogate(self, button):
+        """
+        Уточняет суррогатную модель SURROGATE_REFINE_SAMPLES симуляциями в наименее заполненных
+        областях диапазонов и симуляцией в текущих значениях параметров (если они в диапазонах).
+        """
+        if self.surrogate_builder is None:
+            self.__show_message_dialog(("Суррогатная модель"), ("Суррогатная модель ещё не построена."),
+                                       Gtk.MessageType.INFO)
+            return
+        builder, source = self.surrogate_builder, self.surrogate_source
+        point = self.__surrogate_point(self.surrogate)
+        points = [point] if point is not None else []
+
+        def refine_worker(job):
+            try:
+                surrogate = builder.refine(SURROGATE_REFINE_SAMPLES, points=points,
+                                           progress_callback=lambda done, total: job.report(done / total))
+                GLib.idle_add(self.__set_surrogate, builder, surrogate, source)
+            except Exception as e:
+                GLib.idle_add(self.__show_error_dialog, ("Ошибка суррогатной модели: %s") % str(e))
+
+        self.progress_job = self.scheduler.submit(("Уточнение суррогата: ") + ", ".join(builder.names),
+                                                  refine_worker, group=self.__job_group())
+
+    def __set_surrogate(self, builder, surrogate, source):
+        self.surrogate_builder, self.surrogate, self.surrogate_source = builder, surrogate, source
+        self.__show_message_dialog(("Суррогатная модель"), surrogate.report(), Gtk.MessageType.INFO)
+        self.__preview_surrogate()
+
+    def __surrogate_point(self, surrogate):
+        """
+        Значения параметров суррогатной модели из таблицы; None, если остальные изменённые значения
+        отличаются от значений выборки или значения вне диапазонов выборки.
+        """
+        modified = self.get_modified_parameters()
+        if {name: value for name, value in modified.items() if name not in surrogate.ranges} != surrogate.base:
+            return None
+        values = self.parameter_table.get_values()
+        try:
+            point = {name: parse_spice_number(values[name]) for name in surrogate.names}
+        except (KeyError, ValueError):
+            return None
+        return point if surrogate.covers(point) else None
+
+    def __preview_surrogate(self):
+        """Пользовательская кривая по суррогатной модели — сразу после изменения значения, без симуляции."""
+        surrogate = self.surrogate
+        if surrogate is None or self.fig is None or not self.simulation_runner or not self.simulation_runner.vamodel_name:
+            return
+        va_file = os.path.join(self.simulation_runner.model_path, self.simulation_runner.vamodel_name)
+        if self.surrogate_source != (va_file, self.spice_file):
+            return
+        point = self.__surrogate_point(surrogate)
+        if point is not None:
+            self.simulation_manager.update_user(self.fig, self.canvas_plot, surrogate.predict_frame(point))
+
+    def __check_parameter_values(self, values, show_errors=True):
+        """
+        Проверяет значения по допустимым диапазонам параметров модели до компиляции и симуляции.
+        При нарушениях показывает их список (если show_errors) и возвращает False.
+        """
+        try:
+            catalog = load_parameter_catalog(self.model_file or self.parsing_file)
+        except (OSError, ValueError):
+            return True  # каталог недоступен — значения проверит компилятор
+        violations = find_range_violations(catalog, values)
+        if not violations:
+            return True
+        if not show_errors:
+            return False
+        shown = violations[:MAX_SHOWN_VIOLATIONS]
+        if len(violations) > len(shown):
+            shown.append(f"... и ещё {len(violations) - len(shown)}")
+        self.__show_message_dialog(("Ошибка"), ("Недопустимые значения параметров:\n") + "\n".join(shown),
+                                   Gtk.MessageType.ERROR)
+        return False
+
+    def get_modified_parameters(self):
+        """Возвращает параметры, значения которых в GUI отличаются от значений из файла параметров."""
+        return self.parameter_table.get_modified()
+
+    def toggle_recompile_free(self, widget, state):
+        """
+        Переключение режима без перекомпиляции: значения параметров передаются в карточку .model
+        временной копии схемы, а файлы модели не изменяются.
+        """
+        self.parameter_mode = NETLIST_MODE if state else RECOMPILE_MODE
+        if self.simulation_runner:
+            self.simulation_runner.parameter_mode = self.parameter_mode
+        auto_run_switch = getattr(self.parent_window, "auto_run_switch", None)
+        if not state and self.auto_run and auto_run_switch is not None:
+            auto_run_switch.set_active(False)  # автозапуск работает только без перекомпиляции
+        return True
 
     def on_save_csv(self, widget):
-        if not os.path.exists(self.user_result_file) or os.path.getsize(self.user_result_file) == 0:
+        user_data = self.simulation_runner.last_user_data if self.simulation_runner else None
+        if user_data is not None:
+            # shared-backend не записывает файл результатов — сохраняется таблица последнего запуска
+            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            output_file = os.path.join(OUTPUT_DATA_PATH, f"simulation_results_{timestamp}.csv")
+            try:
+                user_data.to_csv(output_file, index=False)
+                print(f"Saved simulation results to {output_file}")
+            except OSError as e:
+                print(_("Ошибка сохранения CSV:"), e)
+            return
+        user_result_file = self.simulation_runner.user_result_file if self.simulation_runner else self.user_result_file
+        if not os.path.exists(user_result_file) or os.path.getsize(user_result_file) == 0:
             dialog = Gtk.MessageDialog(transient_for=self.parent_window,
                                        flags=0,
                                        message_type=Gtk.MessageType.INFO,
@@ -235,9 +647,14 @@ class SimulatorHandlers:
             dialog.destroy()
             return
         try:
-            ignore_params_loader = FileIgnoreParamsLoader(ignore_file=IGNORE_PARAMS_FILE)
-            parser = ParameterParser(file_path=self.parsing_file, ignore_params_loader=ignore_params_loader)
-            parser.save_simulation_results(input_file=self.user_result_file, directory=OUTPUT_DATA_PATH)
+            if user_result_file.endswith(".raw"):
+                timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+                output_file = os.path.join(OUTPUT_DATA_PATH, f"simulation_results_{timestamp}.csv")
+                data = self.simulation_manager.data_loader.load_data(user_result_file)
+                data.to_csv(output_file, index=False)
+                print(f"Saved simulation results to {output_file}")
+                return
+            self.parameter_parser.save_simulation_results(input_file=user_result_file, directory=OUTPUT_DATA_PATH)
         except Exception as e:
             print(_("Ошибка сохранения CSV:"), e)
 
@@ -261,23 +678,30 @@ class SimulatorHandlers:
         dialog.run()
         dialog.destroy()
 
-    def __update_progress_bar(self, progress):
+    def __on_job_update(self, job):
+        """Подписчик очереди (вызывается из её потоков): индикатор показывает прогресс последнего запуска."""
+        if job is self.progress_job:
+            remaining = format_remaining(job.eta) if job.state not in FINISHED_STATES else ""
+            GLib.idle_add(self.__update_progress_bar, job.progress, remaining)
+
+    def __update_progress_bar(self, progress, remaining=""):
         if hasattr(self.parent_window, 'progress_bar'):
-            self.progress_bar.set_fraction(progress)
+            self.progress_bar.set_fraction(progress, remaining)
 
     def toggle_log_scale(self, widget, state):
         """Переключение логарифмической шкалы без сброса масштаба."""
+        if self.ax is None:
+            return  # график ещё не создан; состояние переключателя применится при его создании
         current_xlim, current_ylim = self.ax.get_xlim(), self.ax.get_ylim()
         
         self.ax.set_yscale("log" if state else "linear")
 
-        if not self.ax.get_lines():
+        if not self.simulation_manager.data_plotter.traces:
             print("Warning: No data on graph, switching scale but no effect on plot.")
             self.canvas_plot.draw_idle()
             return
 
-        for line in self.ax.get_lines():
-            line.set_ydata(line.get_ydata())
+        self.__update_level_of_detail()
 
         self.ax.set_xlim(current_xlim)
         self.ax.set_ylim(current_ylim)
@@ -285,6 +709,8 @@ class SimulatorHandlers:
         self.canvas_plot.draw_idle()
 
     def toggle_grid(self, switch, state):
+        if self.ax is None:
+            return True
         if state:
             self.ax.grid(True, which="both", linestyle="--", linewidth=0.5)
         else:
@@ -294,6 +720,8 @@ class SimulatorHandlers:
     
     def save_plot(self, widget):
         """Сохранение графика в папку и вывод уведомления."""
+        if self.fig is None:
+            return
         os.makedirs(PICS_PATH, exist_ok=True)
         current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
         file_path = os.path.join(PICS_PATH, f'plot_{current_time}.png')
@@ -310,67 +738,121 @@ class SimulatorHandlers:
         dialog.run()
         dialog.destroy()
 
+    def show_trace(self, widget):
+        """
+        Показывает этапы последнего запуска (симуляции или записи изменений) и сохраняет трассу
+        в формате Chrome trace_event.
+        """
+        trace = tracer.last
+        if trace is None:
+            self.__show_message_dialog(("Трассировка"), ("Симуляция ещё не запускалась."), Gtk.MessageType.INFO)
+            return
+
+        dialog = Gtk.Dialog(title=("Трассировка"), transient_for=self.parent_window, flags=Gtk.DialogFlags.MODAL)
+        dialog.add_buttons(("Сохранить JSON"), Gtk.ResponseType.APPLY, Gtk.STOCK_CLOSE, Gtk.ResponseType.CLOSE)
+        dialog.set_default_size(760, 360)
+
+        text_view = Gtk.TextView(editable=False, monospace=True)
+        text_view.get_buffer().set_text(trace.format_summary())
+        scroller = Gtk.ScrolledWindow()
+        scroller.add(text_view)
+        dialog.get_content_area().pack_start(scroller, True, True, 0)
+        dialog.show_all()
+
+        response = dialog.run()
+        dialog.destroy()
+        if response == Gtk.ResponseType.APPLY:
+            os.makedirs(OUTPUT_DATA_PATH, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            file_path = os.path.join(OUTPUT_DATA_PATH, f"trace_{timestamp}.json")
+            trace.save_chrome_trace(file_path)
+            self.__show_message_dialog(("Трассировка"), f"Трасса сохранена в:\n{file_path}\n"
+                                       "Откройте её в chrome://tracing или ui.perfetto.dev.", Gtk.MessageType.INFO)
+
+    def __event_to_data(self, ax, event):
+        """Переводит координаты события GTK (логические пиксели, начало сверху) в координаты данных осей."""
+        ratio = getattr(self.canvas_plot, "device_pixel_ratio", 1) or 1
+        height = self.canvas_plot.get_allocation().height
+        return ax.transData.inverted().transform((event.x * ratio, (height - event.y) * ratio))
+
+    def __schedule_redraw(self):
+        """
+        Перерисовка при масштабировании колесом: события прокрутки только меняют пределы осей,
+        а перерисовка выполняется не чаще одного раза за SCROLL_REDRAW_INTERVAL мс через draw_idle.
+        """
+        if self.redraw_pending:
+            return
+        self.redraw_pending = True
+
+        def redraw():
+            self.redraw_pending = False
+            self.__update_level_of_detail()
+            self.canvas_plot.draw_idle()
+            return False
+
+        GLib.timeout_add(SCROLL_REDRAW_INTERVAL, redraw)
+
+    def __update_level_of_detail(self):
+        """Подставляет в кривые уровень прореживания для текущего масштаба."""
+        if self.fig and self.fig.axes:
+            self.simulation_manager.data_plotter.update_level_of_detail(self.fig.axes[0])
+
     def on_press(self, widget, event):
         """Начало выделения области на графике."""
+        if not self.fig or not self.fig.axes:
+            return
         if self.original_xlim is None or self.original_ylim is None:
             self.original_xlim, self.original_ylim = self.ax.get_xlim(), self.ax.get_ylim()
 
         if event.button == Gdk.BUTTON_PRIMARY:
-            allocation = self.canvas_plot.get_allocation()
             ax = self.fig.axes[0]
-            x_lim, y_lim = ax.get_xlim(), ax.get_ylim()
-            self.start_point = (
-                x_lim[0] + (event.x / allocation.width) * (x_lim[1] - x_lim[0]),
-                y_lim[0] + ((allocation.height - event.y) / allocation.height) * (y_lim[1] - y_lim[0])
-            )
+            if self.redraw_pending:
+                self.canvas_plot.draw()  # фон для блиттинга должен соответствовать текущим пределам осей
+            self.start_point = tuple(self.__event_to_data(ax, event))
+
+            # прямоугольник анимированный: он не попадает в обычную отрисовку и рисуется поверх
+            # сохранённого фона, поэтому движение мыши не перерисовывает кривые
+            self.background = self.canvas_plot.copy_from_bbox(ax.bbox)
+            self.selection_rect = Rectangle(self.start_point, 0, 0, edgecolor="red", facecolor="none",
+                                            linewidth=1.5, animated=True)
+            ax.add_patch(self.selection_rect)
+
+    def __remove_selection(self):
+        if self.selection_rect:
+            self.selection_rect.remove()
+            self.selection_rect = None
+        self.background = None
 
     def on_release(self, widget, event):
         """При отпускании мыши область приближается."""
         if not self.start_point:
             return
 
-        allocation = self.canvas_plot.get_allocation()
         ax = self.fig.axes[0]
-        x_lim, y_lim = ax.get_xlim(), ax.get_ylim()
-        x1, y1 = (
-            x_lim[0] + (event.x / allocation.width) * (x_lim[1] - x_lim[0]),
-            y_lim[0] + ((allocation.height - event.y) / allocation.height) * (y_lim[1] - y_lim[0])
-        )
-
+        x1, y1 = self.__event_to_data(ax, event)
         x0, y0 = self.start_point
+        self.__remove_selection()
+        self.start_point = None
+
         if x0 != x1 and y0 != y1:
             ax.set_xlim(min(x0, x1), max(x0, x1))
             ax.set_ylim(min(y0, y1), max(y0, y1))
-            self.canvas_plot.draw()
-        
-        self.start_point = None
+            self.__update_level_of_detail()
+        self.canvas_plot.draw_idle()  # прямоугольник был нарисован только блиттингом — убираем его с экрана
 
     def on_motion(self, widget, event):
-        """Обновление прямоугольника выделения."""
-        if not self.start_point:
+        """Обновление прямоугольника выделения (блиттинг поверх сохранённого фона)."""
+        if not self.start_point or self.selection_rect is None or self.background is None:
             return
 
-        allocation = self.canvas_plot.get_allocation()
         ax = self.fig.axes[0]
-        x_lim, y_lim = ax.get_xlim(), ax.get_ylim()
-        
-        if self.selection_rect:
-            self.selection_rect.remove()
-            self.selection_rect = None
-        
-        x1, y1 = (
-            x_lim[0] + (event.x / allocation.width) * (x_lim[1] - x_lim[0]),
-            y_lim[0] + ((allocation.height - event.y) / allocation.height) * (y_lim[1] - y_lim[0])
-        )
-
-        self.selection_rect = plt.Rectangle(
-            (self.start_point[0], self.start_point[1]),
-            x1 - self.start_point[0], y1 - self.start_point[1],
-            edgecolor="red", facecolor="none", linewidth=1.5
-        )
+        x1, y1 = self.__event_to_data(ax, event)
+        x0, y0 = self.start_point
+        self.selection_rect.set_bounds(x0, y0, x1 - x0, y1 - y0)
 
-        ax.add_patch(self.selection_rect)
-        self.canvas_plot.draw()
+        self.canvas_plot.restore_region(self.background)
+        ax.draw_artist(self.selection_rect)
+        self.canvas_plot.blit(ax.bbox)
 
     def on_scroll(self, widget, event):
         """Handle mouse scroll events to zoom in or out on the plot."""
@@ -381,22 +863,17 @@ class SimulatorHandlers:
         x_lim, y_lim = ax.get_xlim(), ax.get_ylim()
 
         if self.selection_rect:
-            self.selection_rect.remove()
-            self.selection_rect = None
+            self.__remove_selection()
+            self.start_point = None
 
         ZOOM_IN_FACTOR, ZOOM_OUT_FACTOR = 0.8, 1.25
         zoom_factor = ZOOM_IN_FACTOR if event.direction == Gdk.ScrollDirection.UP else ZOOM_OUT_FACTOR
 
-        allocation = self.canvas_plot.get_allocation()
-        x_center = x_lim[0] + (event.x / allocation.width) * (x_lim[1] - x_lim[0])
-        y_center = y_lim[0] + ((allocation.height - event.y) / allocation.height) * (y_lim[1] - y_lim[0])
-
-        x_range = (x_lim[1] - x_lim[0]) * zoom_factor
-        y_range = (y_lim[1] - y_lim[0]) * zoom_factor
+        x_center, y_center = self.__event_to_data(ax, event)
 
-        ax.set_xlim([x_center - x_range / 2, x_center + x_range / 2])
-        ax.set_ylim([y_center - y_range / 2, y_center + y_range / 2])
-        self.canvas_plot.draw()
+        ax.set_xlim(zoom_limits(x_lim, x_center, zoom_factor, ax.get_xscale()))
+        ax.set_ylim(zoom_limits(y_lim, y_center, zoom_factor, ax.get_yscale()))
+        self.__schedule_redraw()
 
     def reset_zoom(self, widget):
         """Сбрасывает масштаб графика до исходного состояния и удаляет выделение."""
@@ -404,14 +881,15 @@ class SimulatorHandlers:
             return
 
         ax = self.fig.axes[0]
-        ax.set_xlim(self.original_xlim)
-        ax.set_ylim(self.original_ylim)
+        if self.original_xlim is not None and self.original_ylim is not None:
+            ax.set_xlim(self.original_xlim)
+            ax.set_ylim(self.original_ylim)
 
-        if self.selection_rect:
-            self.selection_rect.remove()
-            self.selection_rect = None
+        self.__remove_selection()
+        self.start_point = None
 
-        self.canvas_plot.draw_idle()    
+        self.__update_level_of_detail()
+        self.canvas_plot.draw_idle()
 
     # def toggle_parameter(self, switch, state):
     #     """Обработчик переключения параметра."""
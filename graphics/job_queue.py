@@ -0,0 +1,116 @@
+import gi
+
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk, GLib
+
+from core.jobs import STATE_NAMES, FINISHED_STATES, RUNNING
+from core.progress import format_remaining
+
+
+# колонки модели Gtk.ListStore
+JOB_ID, NAME, STATE, TIME, WARNINGS = range(5)
+
+REFRESH_INTERVAL = 500  # обновление времени выполняющихся заданий (мс)
+
+
+class JobQueueView:
+    """
+    Очередь заданий симуляции (core/jobs.JobScheduler): ожидающие, выполняющиеся и последние
+    завершённые задания с состоянием и временем выполнения. Кнопки отменяют выбранное задание
+    или все задания; у выполняющегося задания завершаются процессы openvaf и ngspice.
+    Предупреждения openvaf и ngspice появляются в состоянии задания во время выполнения
+    (текст — во всплывающей подсказке строки), поэтому долгий запуск можно отменить, не дожидаясь конца.
+    """
+    def __init__(self, scheduler) -> None:
+        self.scheduler = scheduler
+        self.refresh_id = None
+        self.update_pending = False
+
+        self.store = Gtk.ListStore(int, str, str, str, str)
+        self.tree_view = Gtk.TreeView(model=self.store)
+        self.tree_view.set_headers_visible(True)
+        self.tree_view.set_tooltip_column(WARNINGS)
+        for title, index, expand in ((("Задание"), NAME, True), (("Состояние"), STATE, False), (("Время"), TIME, False)):
+            column = Gtk.TreeViewColumn(title, Gtk.CellRendererText(), text=index)
+            column.set_expand(expand)
+            self.tree_view.append_column(column)
+
+        scroller = Gtk.ScrolledWindow()
+        scroller.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        scroller.set_size_request(-1, 110)
+        scroller.add(self.tree_view)
+
+        cancel_button = Gtk.Button(label=("Отменить"))
+        cancel_button.get_style_context().add_class("ios-button")
+        cancel_button.connect("clicked", self.on_cancel_selected)
+        cancel_all_button = Gtk.Button(label=("Отменить все"))
+        cancel_all_button.get_style_context().add_class("ios-button")
+        cancel_all_button.connect("clicked", self.on_cancel_all)
+
+        button_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5, homogeneous=True)
+        button_box.pack_start(cancel_button, True, True, 0)
+        button_box.pack_start(cancel_all_button, True, True, 0)
+
+        self.box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        self.box.get_style_context().add_class("rounded-block")
+        self.box.pack_start(scroller, False, False, 0)
+        self.box.pack_start(button_box, False, False, 0)
+
+        # подписчики очереди вызываются из её потоков: обновление переносится в главный цикл
+        scheduler.add_listener(lambda job: self.schedule_update())
+
+    def get_widget(self):
+        return self.box
+
+    def schedule_update(self):
+        if not self.update_pending:
+            self.update_pending = True
+            GLib.idle_add(self.update)
+
+    def update(self):
+        """Перестраивает список заданий; пока есть выполняющиеся задания, время обновляется по таймеру."""
+        self.update_pending = False
+        jobs = self.scheduler.jobs()
+        selected = self.__selected_job_id()
+
+        self.store.clear()
+        for job in reversed(jobs):  # новые задания сверху
+            state = STATE_NAMES[job.state]
+            if job.state == RUNNING and job.progress:
+                state += f" {job.progress:.0%}"
+                if job.eta is not None:
+                    state += f", {format_remaining(job.eta)}"
+            elif job.error:
+                state += f": {job.error.splitlines()[0]}"
+            if job.warnings:
+                state += f" ⚠ {len(job.warnings)}"
+            warnings = GLib.markup_escape_text("\n".join(job.warnings)) if job.warnings else None
+            tree_iter = self.store.append([job.id, job.name, state, f"{job.elapsed:.1f} с" if job.started else "",
+                                           warnings])
+            if job.id == selected:
+                self.tree_view.get_selection().select_iter(tree_iter)
+
+        active = any(job.state not in FINISHED_STATES for job in jobs)
+        if active and self.refresh_id is None:
+            self.refresh_id = GLib.timeout_add(REFRESH_INTERVAL, self.__refresh)
+        return False
+
+    def __refresh(self):
+        self.update()
+        if any(job.state not in FINISHED_STATES for job in self.scheduler.jobs()):
+            return True
+        self.refresh_id = None
+        return False
+
+    def __selected_job_id(self):
+        model, tree_iter = self.tree_view.get_selection().get_selected()
+        return model[tree_iter][JOB_ID] if tree_iter is not None else None
+
+    def on_cancel_selected(self, button):
+        job_id = self.__selected_job_id()
+        job = next((job for job in self.scheduler.jobs() if job.id == job_id), None)
+        if job is not None and job.state not in FINISHED_STATES:
+            self.scheduler.cancel(job)
+
+    def on_cancel_all(self, button):
+        self.scheduler.cancel_all()
@@ -0,0 +1,27 @@
+import contextvars
+
+from concurrent.futures import Future
+
+from gi.repository import GLib
+
+
+def call_in_main_loop(function, *args) -> Future:
+    """
+    Выполняет function(*args) в главном цикле GTK (GLib.idle_add) и возвращает Future с результатом.
+    Используется графом этапов (core/pipeline.Pipeline, dispatch) для работы с виджетами и графиком
+    из заданий очереди, которые выполняются в других потоках. Функция выполняется в копии контекста
+    вызывающего (трасса задания, utils/tracing).
+    """
+    future = Future()
+    context = contextvars.copy_context()
+
+    def callback():
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(context.run(function, *args))
+            except BaseException as e:
+                future.set_exception(e)
+        return False
+
+    GLib.idle_add(callback)
+    return future
@@ -11,6 +11,7 @@ class ModelSelectorHandler:
     """
     Создаёт комбобокс для выбора конфигурации модели.
     При изменении выбранной модели вызывается set_configuration у SimulatorHandlers.
+    Первая конфигурация загружается в фоне после показа окна (load_initial_configuration).
     """
     def __init__(self, app, handlers):
         self.app = app
@@ -20,7 +21,11 @@ class ModelSelectorHandler:
             self.combo.append_text(model_name)
         self.combo.set_active(0)
         self.combo.connect("changed", self.on_model_changed)
-        self.handlers.set_configuration(self.combo.get_active_text())
+
+    def load_initial_configuration(self):
+        """Загружает выбранную при запуске конфигурацию (разбор параметров выполняется в фоне)."""
+        self.handlers.load_configuration_async(self.combo.get_active_text())
+        return False
 
     def on_model_changed(self, widget):
         model_name = widget.get_active_text()
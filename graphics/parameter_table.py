@@ -0,0 +1,215 @@
+import math
+import gi
+
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk, Pango
+
+from typing import Callable, Dict, List, Optional
+
+from utils.spice_values import parse_spice_number, sampling_range
+
+
+# колонки модели Gtk.ListStore
+NAME, VALUE, DEFAULT, UNITS, MIN_VALUE, MAX_VALUE, DESCRIPTION, MODIFIED = range(8)
+
+MODIFIED_COLOR = "#fff1b8"  # фон изменённого значения
+SLIDER_STEPS = 200           # число шагов ползунка между границами параметра
+SLIDER_SPAN = 10.0           # без заданной границы ползунок охватывает значение/SLIDER_SPAN..значение*SLIDER_SPAN
+
+
+def format_bound(value) -> str:
+    return "" if value is None else str(value)
+
+
+def parse_bound(text: str) -> Optional[float]:
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+class ParameterTable:
+    """
+    Таблица параметров модели на Gtk.ListStore/Gtk.TreeView.
+
+    Строки не являются отдельными виджетами: TreeView отрисовывает только видимые строки,
+    поэтому стоимость загрузки модели не зависит от числа её параметров. Значение редактируется
+    в ячейке или ползунком выбранного параметра (в пределах его границ), изменённые значения
+    подсвечиваются, строка поиска фильтрует параметры по имени и описанию по мере ввода.
+    После каждого изменения значения вызывается on_change (автозапуск симуляции).
+    """
+    def __init__(self) -> None:
+        self.on_change: Optional[Callable[[], None]] = None
+        self.store = Gtk.ListStore(str, str, str, str, str, str, str, bool)
+        self.filter = self.store.filter_new()
+        self.filter.set_visible_func(self.__is_visible)
+        self.search_text = ""
+
+        self.search_entry = Gtk.SearchEntry(placeholder_text=("Поиск по имени или описанию"))
+        self.search_entry.connect("search-changed", self.on_search_changed)
+
+        self.tree_view = Gtk.TreeView(model=self.filter)
+        self.tree_view.set_enable_search(False)  # поиск выполняется строкой search_entry
+        self.tree_view.set_tooltip_column(DESCRIPTION)
+        self.__add_columns()
+        self.tree_view.set_fixed_height_mode(True)
+
+        scroller = Gtk.ScrolledWindow()
+        scroller.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
+        scroller.add(self.tree_view)
+
+        self.slider_path = None   # путь строки store, значение которой задаёт ползунок
+        self.slider_bounds = None  # (нижняя граница, верхняя граница, логарифмическая шкала)
+        self.updating_slider = False
+        self.slider_label = Gtk.Label(xalign=0)
+        self.slider = Gtk.Scale.new_with_range(Gtk.Orientation.HORIZONTAL, 0.0, 1.0, 1.0 / SLIDER_STEPS)
+        self.slider.set_draw_value(False)
+        self.slider.set_sensitive(False)
+        self.slider.connect("value-changed", self.on_slider_changed)
+        self.tree_view.get_selection().connect("changed", self.on_selection_changed)
+
+        slider_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
+        slider_box.pack_start(self.slider_label, False, False, 0)
+        slider_box.pack_start(self.slider, True, True, 0)
+
+        self.box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        self.box.pack_start(self.search_entry, False, False, 0)
+        self.box.pack_start(scroller, True, True, 0)
+        self.box.pack_start(slider_box, False, False, 0)
+
+    def __add_columns(self):
+        def add_column(title, index, width, renderer=None, expand=False):
+            renderer = renderer or Gtk.CellRendererText()
+            column = Gtk.TreeViewColumn(title, renderer, text=index)
+            column.set_sizing(Gtk.TreeViewColumnSizing.FIXED)  # обязательно для fixed_height_mode
+            column.set_fixed_width(width)
+            column.set_resizable(True)
+            column.set_expand(expand)
+            self.tree_view.append_column(column)
+            return column
+
+        add_column(("Параметр"), NAME, 110)
+
+        value_renderer = Gtk.CellRendererText(editable=True, cell_background=MODIFIED_COLOR)
+        value_renderer.connect("edited", self.on_value_edited)
+        value_column = add_column(("Значение"), VALUE, 100, renderer=value_renderer)
+        value_column.set_cell_data_func(value_renderer, self.__render_value)
+
+        add_column(("Ед."), UNITS, 45)
+        add_column(("Мин."), MIN_VALUE, 70)
+        add_column(("Макс."), MAX_VALUE, 70)
+        description_renderer = Gtk.CellRendererText(ellipsize=Pango.EllipsizeMode.END)
+        add_column(("Описание"), DESCRIPTION, 200, renderer=description_renderer, expand=True)
+
+    @staticmethod
+    def __render_value(column, renderer, model, tree_iter, data=None):
+        modified = model[tree_iter][MODIFIED]
+        renderer.set_property("cell-background-set", modified)
+        renderer.set_property("weight", Pango.Weight.BOLD if modified else Pango.Weight.NORMAL)
+
+    def __is_visible(self, model, tree_iter, data=None) -> bool:
+        if not self.search_text:
+            return True
+        row = model[tree_iter]
+        return self.search_text in row[NAME].lower() or self.search_text in row[DESCRIPTION].lower()
+
+    def get_widget(self):
+        return self.box
+
+    def load(self, parameters: List[Dict[str, Optional[float]]]):
+        """Заполняет таблицу описаниями параметров (результат ParameterParser.parse)."""
+        self.tree_view.set_model(None)  # без модели TreeView не обрабатывает сигналы о каждой строке
+        self.__reset_slider()
+        self.store.clear()
+        for param in parameters:
+            default = param.get("default_text") or str(param["default_value"])
+            self.store.append([
+                param["name"],
+                default,
+                default,
+                param.get("units") or "",
+                format_bound(param.get("min_value")),
+                format_bound(param.get("max_value")),
+                param.get("description") or "",
+                False,
+            ])
+        self.filter.refilter()
+        self.tree_view.set_model(self.filter)
+
+    def on_search_changed(self, entry):
+        self.search_text = entry.get_text().strip().lower()
+        self.filter.refilter()
+
+    def on_value_edited(self, renderer, path, new_text):
+        child_iter = self.filter.convert_iter_to_child_iter(self.filter.get_iter(path))
+        # пустое значение возвращает параметр к исходному значению
+        self.__set_value(child_iter, new_text.strip() or self.store[child_iter][DEFAULT])
+        if self.store.get_path(child_iter) == self.slider_path:
+            self.__update_slider()
+
+    def __set_value(self, child_iter, text: str):
+        row = self.store[child_iter]
+        if row[VALUE] == text:
+            return
+        row[VALUE] = text
+        row[MODIFIED] = row[VALUE] != row[DEFAULT]
+        if self.on_change is not None:
+            self.on_change()
+
+    def on_selection_changed(self, selection):
+        model, tree_iter = selection.get_selected()
+        if tree_iter is None:
+            self.__reset_slider()
+            return
+        self.slider_path = self.store.get_path(self.filter.convert_iter_to_child_iter(tree_iter))
+        self.__update_slider()
+
+    def __reset_slider(self):
+        self.slider_path = None
+        self.slider_bounds = None
+        self.slider_label.set_text("")
+        self.slider.set_sensitive(False)
+
+    def __update_slider(self):
+        """Настраивает ползунок по значению и границам выбранного параметра; нечисловые значения (макросы) ползунком не меняются."""
+        row = self.store[self.store.get_iter(self.slider_path)]
+        self.slider_label.set_text(row[NAME])
+        try:
+            value = parse_spice_number(row[VALUE])
+        except ValueError:
+            self.slider_bounds = None
+            self.slider.set_sensitive(False)
+            return
+        self.slider_bounds = low, high, logarithmic = sampling_range(
+            value, parse_bound(row[MIN_VALUE]), parse_bound(row[MAX_VALUE]), span=SLIDER_SPAN)
+        value = min(max(value, low), high)
+        position = math.log(value / low) / math.log(high / low) if logarithmic else (value - low) / (high - low)
+        self.updating_slider = True
+        try:
+            self.slider.set_value(position)
+        finally:
+            self.updating_slider = False
+        self.slider.set_sensitive(True)
+
+    def on_slider_changed(self, slider):
+        if self.updating_slider or self.slider_bounds is None:
+            return
+        low, high, logarithmic = self.slider_bounds
+        position = slider.get_value()
+        value = low * (high / low) ** position if logarithmic else low + (high - low) * position
+        self.__set_value(self.store.get_iter(self.slider_path), f"{value:.6g}")
+
+    def commit(self):
+        """Текущие значения становятся исходными (после записи в файл параметров)."""
+        for row in self.store:
+            if row[MODIFIED]:
+                row[DEFAULT] = row[VALUE]
+                row[MODIFIED] = False
+
+    def get_values(self) -> Dict[str, str]:
+        """Текущие значения всех параметров."""
+        return {row[NAME]: row[VALUE] for row in self.store}
+
+    def get_modified(self) -> Dict[str, str]:
+        """Параметры, значения которых отличаются от значений из файла параметров."""
+        return {row[NAME]: row[VALUE] for row in self.store if row[MODIFIED]}
@@ -5,18 +5,19 @@ import gi
 
 gi.require_version("Gtk", "3.0")  # Требуемая версия GTK
 from gi.repository import Gtk, Gdk, GLib
-from config import DIRECTORY, INITIAL_LOG_SCALE, INITIAL_GRID
+from config import DIRECTORY, INITIAL_LOG_SCALE, INITIAL_GRID, INITIAL_RECOMPILE_FREE, INITIAL_AUTO_RUN
 from graphics.handlers import SimulatorHandlers
+from graphics.job_queue import JobQueueView
 from graphics.model_selector import ModelSelectorHandler
+from graphics.parameter_table import ParameterTable
 from ios_switch import IosStyleSwitch
-
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_gtk3agg import FigureCanvasGTK3Agg as FigureCanvas
+from utils.startup_profile import profiler
 
 class ProgressBar(Gtk.DrawingArea):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.progress_fraction = 0.0  # Прогресс от 0 до 1
+        self.remaining_text = ""      # Оценка оставшегося времени («~12 с»)
         self.dot_phase = 0.0          # Фаза анимации для индикатора (не сбрасывается, используется непрерывно)
         self.animating = False        # Флаг анимации
         self.animation_id = None      # ID таймера анимации
@@ -26,8 +27,9 @@ class ProgressBar(Gtk.DrawingArea):
         self._cached_width = None
         self._cached_height = None
 
-    def set_fraction(self, fraction):
+    def set_fraction(self, fraction, remaining_text=""):
         self.progress_fraction = fraction
+        self.remaining_text = remaining_text
         self.queue_draw()
 
     def start_animation(self):
@@ -100,6 +102,8 @@ class ProgressBar(Gtk.DrawingArea):
         cr.select_font_face("Code", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
         cr.set_font_size(16)
         progress_text = f"{int(self.progress_fraction * 100)}%"
+        if self.remaining_text:
+            progress_text += f"  {self.remaining_text}"
         text_extents = cr.text_extents(progress_text)
         text_x = (width - text_extents.width) / 2
         text_y = (height - text_extents.height) / 2 - text_extents.y_bearing
@@ -143,45 +147,68 @@ class NGSPICESimulatorApp(Gtk.Window):
         self.file_button = Gtk.Button(label=_("File:/..."))  # кнопка для отображения пути файла
         self.file_button.get_style_context().add_class("ios-button")
         
-        self.params_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        self.parameter_table = ParameterTable()
 
-        self.fig, self.ax = plt.subplots()
-        self.canvas_plot = FigureCanvas(self.fig)
-        self.fig.set_layout_engine("tight")
-        self.canvas_plot.set_size_request(-1, -1)
+        # график (matplotlib и его GTK-backend) создаётся после показа окна, см. create_plot_canvas
+        self.fig, self.ax, self.canvas_plot = None, None, None
+        self.canvas_container = None
 
         self.log_scale_switch = IosStyleSwitch(active=INITIAL_LOG_SCALE)
         self.grid_switch = IosStyleSwitch(active=INITIAL_GRID)
+        self.recompile_free_switch = IosStyleSwitch(active=INITIAL_RECOMPILE_FREE)
+        self.auto_run_switch = IosStyleSwitch(active=INITIAL_AUTO_RUN)
 
         self.progress_bar = ProgressBar()
         self.handlers = SimulatorHandlers(
-                            self.params_box,
+                            self.parameter_table,
                             self.file_button,
                             self.fig,
                             self.ax,
                             self.canvas_plot,
                             self.progress_bar,
-                            parent_window=self)  # инициализация обработчиков
+                            parent_window=self)  # инициализация обработчиков (график подключается в create_plot_canvas)
 
         self.model_selector = ModelSelectorHandler(self, self.handlers)
+        self.job_queue = JobQueueView(self.handlers.scheduler)
+        self.connect("destroy", lambda window: self.handlers.scheduler.shutdown())  # завершает openvaf и ngspice
 
         self.__setup_directories()  # создание необходимых директорий, если они не существуют
         
         self.create_interface()  # создание интерфейса
         self.apply_styles()  # стили кнопки для строки файла
 
-        self.handlers.toggle_log_scale(self.log_scale_switch, INITIAL_LOG_SCALE)
-        self.handlers.toggle_grid(self.grid_switch, INITIAL_GRID)
-
         visual = self.get_screen().get_rgba_visual()
         if visual and self.get_screen().is_composited():
             self.set_visual(visual)
 
-        self.canvas_plot.add_events(Gdk.EventMask.SCROLL_MASK | Gdk.EventMask.BUTTON_PRESS_MASK | Gdk.EventMask.BUTTON_RELEASE_MASK | Gdk.EventMask.POINTER_MOTION_MASK)
-        self.canvas_plot.connect("scroll-event", self.handlers.on_scroll)
-        self.canvas_plot.connect("button-press-event", self.handlers.on_press)
-        self.canvas_plot.connect("button-release-event", self.handlers.on_release)
-        self.canvas_plot.connect("motion-notify-event", self.handlers.on_motion)
+    def create_plot_canvas(self):
+        """
+        Создаёт график и холст matplotlib в уже показанном окне.
+        Вызывается из главного цикла после show_all, чтобы импорт matplotlib не задерживал появление окна.
+        """
+        with profiler.span("Импорт matplotlib и создание графика"):
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_gtk3agg import FigureCanvasGTK3Agg as FigureCanvas
+
+            self.fig = Figure()
+            self.ax = self.fig.add_subplot()
+            self.canvas_plot = FigureCanvas(self.fig)
+            self.fig.set_layout_engine("tight")
+            self.canvas_plot.set_size_request(-1, -1)
+
+            self.canvas_container.add(self.canvas_plot)
+            self.canvas_plot.show()
+            self.handlers.attach_plot(self.fig, self.ax, self.canvas_plot)
+
+            self.handlers.toggle_log_scale(self.log_scale_switch, self.log_scale_switch.active)
+            self.handlers.toggle_grid(self.grid_switch, self.grid_switch.active)
+
+            self.canvas_plot.add_events(Gdk.EventMask.SCROLL_MASK | Gdk.EventMask.BUTTON_PRESS_MASK | Gdk.EventMask.BUTTON_RELEASE_MASK | Gdk.EventMask.POINTER_MOTION_MASK)
+            self.canvas_plot.connect("scroll-event", self.handlers.on_scroll)
+            self.canvas_plot.connect("button-press-event", self.handlers.on_press)
+            self.canvas_plot.connect("button-release-event", self.handlers.on_release)
+            self.canvas_plot.connect("motion-notify-event", self.handlers.on_motion)
+        return False
 
     def __setup_directories(self):
         """
@@ -220,7 +247,11 @@ class NGSPICESimulatorApp(Gtk.Window):
 
         buttons = [
             (_("Применить изменения"), self.handlers.apply_changes),
-            (_("Запустить симуляцию"), self.handlers.start_simulation)
+            (_("Запустить симуляцию"), self.handlers.start_simulation),
+            (_("Свип параметров"), self.handlers.start_sweep),
+            (_("Трассировка"), self.handlers.show_trace),
+            (_("Суррогатная модель"), self.handlers.build_surrogate),
+            (_("Уточнить суррогат"), self.handlers.refine_surrogate)
         ]
         
         for idx, (label, callback) in enumerate(buttons):
@@ -232,11 +263,9 @@ class NGSPICESimulatorApp(Gtk.Window):
             button_grid.attach(button, idx % 2, idx // 2, 1, 1)
 
         left_panel.pack_start(button_grid, False, False, 0)
+        left_panel.pack_start(self.job_queue.get_widget(), False, False, 0)
 
-        params_scroller = Gtk.ScrolledWindow()
-        params_scroller.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
-        params_scroller.add(self.params_box)
-        left_panel.pack_start(params_scroller, True, True, 0)
+        left_panel.pack_start(self.parameter_table.get_widget(), True, True, 0)
         return left_panel
 
     def create_right_panel(self):
@@ -248,7 +277,7 @@ class NGSPICESimulatorApp(Gtk.Window):
 
         canvas_container = Gtk.Frame(shadow_type=Gtk.ShadowType.NONE)
         canvas_container.get_style_context().add_class("transparent-container")
-        canvas_container.add(self.canvas_plot)
+        self.canvas_container = canvas_container  # холст графика добавляется в create_plot_canvas
 
         graph_container = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
         graph_container.pack_start(self.progress_bar, False, False, 0)
@@ -264,7 +293,9 @@ class NGSPICESimulatorApp(Gtk.Window):
 
         left_controls = [
             (_("Log Scale:"), self.log_scale_switch),
-            (_("Grid:"), self.grid_switch)
+            (_("Grid:"), self.grid_switch),
+            (_("Без перекомпиляции:"), self.recompile_free_switch),
+            (_("Автозапуск:"), self.auto_run_switch)
         ]
 
         for label_text, widget in left_controls:
@@ -279,6 +310,10 @@ class NGSPICESimulatorApp(Gtk.Window):
                 widget.connect("state-set", self.handlers.toggle_log_scale)
             elif label_text == _("Grid:"):
                 widget.connect("state-set", self.handlers.toggle_grid)
+            elif label_text == _("Без перекомпиляции:"):
+                widget.connect("state-set", self.handlers.toggle_recompile_free)
+            elif label_text == _("Автозапуск:"):
+                widget.connect("state-set", self.handlers.toggle_auto_run)
 
             hbox.pack_start(label, False, False, 5)
             hbox.pack_start(widget, False, False, 5)
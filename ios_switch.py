@@ -54,6 +54,11 @@ class IosStyleSwitch(Gtk.DrawingArea):
         self.queue_draw()
         return True
 
+    def set_active(self, active):
+        """Программное переключение (с анимацией и сигналом state-set)."""
+        if self.active != active:
+            self.on_toggle(self, None)
+
     def start_animation(self):
         if self.animating:
             return
@@ -1,10 +1,9 @@
-import gi
-gi.require_version("Gtk", "3.0")
-from gi.repository import Gtk
-from gui import NGSPICESimulatorApp
+import argparse
 import gettext
 import os
 
+from utils.startup_profile import profiler
+
 localedir = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'locale')
 lang = gettext.translation('loc', localedir=localedir, languages=['en'], fallback=True)
 lang.install()
@@ -12,12 +11,38 @@ lang.install()
 def main():
     """
     Основная функция для запуска приложения NGSPICE Simulator с использованием GTK.
+
+    Окно показывается сразу; график (matplotlib) создаётся и первая конфигурация модели
+    разбирается уже после показа окна. Ключ --startup-profile выводит время импортов и этапов запуска.
     """
+    arg_parser = argparse.ArgumentParser(description="NGSPICE Simulator")
+    arg_parser.add_argument("--startup-profile", action="store_true",
+                            help="вывести время импортов и инициализации при запуске")
+    args = arg_parser.parse_args()
+    if args.startup_profile:
+        profiler.enable()
+
+    with profiler.span("Импорт GTK"):
+        import gi
+        gi.require_version("Gtk", "3.0")
+        from gi.repository import Gtk, GLib
+    with profiler.span("Импорт интерфейса"):
+        from gui import NGSPICESimulatorApp
+
+    with profiler.span("Создание окна"):
+        app = NGSPICESimulatorApp()
+        app.connect("destroy", Gtk.main_quit)
+    with profiler.span("Показ окна"):
+        app.show_all()
+
+    def on_window_shown():
+        profiler.mark("Окно показано")
+        app.create_plot_canvas()
+        app.model_selector.load_initial_configuration()
+        return False
 
-    app = NGSPICESimulatorApp()
-    app.connect("destroy", Gtk.main_quit)
-    app.show_all()
+    GLib.idle_add(on_window_shown)
     Gtk.main()  # Запускаем главный цикл GTK для обработки событий
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1 +1,8 @@
-from .plot_simulation import SimulationManager
\ No newline at end of file
+import importlib
+
+
+def __getattr__(name):
+    # plot_simulation загружается при первом обращении (тянет pandas)
+    if name == "SimulationManager":
+        return importlib.import_module("plotting.plot_simulation").SimulationManager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
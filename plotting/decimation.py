@@ -0,0 +1,93 @@
+import numpy as np
+
+from typing import List, Optional, Tuple
+
+
+MIN_LEVEL_POINTS = 512  # уровни пирамиды строятся, пока в уровне больше точек, чем это значение
+
+
+def segment_bounds(x: np.ndarray) -> np.ndarray:
+    """
+    Границы участков кривой: новый участок начинается там, где x уменьшается
+    (следующая кривая семейства или следующий запуск).
+
+    Returns:
+        np.ndarray: Индексы начала участков и в конце — длина массива.
+    """
+    breaks = np.flatnonzero(x[1:] < x[:-1]) + 1
+    return np.concatenate(([0], breaks, [len(x)])).astype(np.int64)
+
+
+class LODPyramid:
+    """
+    Многоуровневое (min/max) прореживание одной кривой.
+
+    Уровень 0 — исходные точки. На уровне k точки каждого участка разбиты на блоки по 2**(k+1)
+    отсчётов, и каждый блок представлен двумя точками: минимумом и максимумом
+    (в начале и в конце блока, в порядке возрастания или убывания кривой внутри блока). Блоки не пересекают границы участков, поэтому кривые семейства не соединяются.
+    Пирамида строится один раз для загруженных данных; при изменении масштаба выбирается уровень,
+    в котором на видимый диапазон приходится примерно по точке на пиксель.
+    """
+    def __init__(self, x: np.ndarray, y: np.ndarray, bounds: Optional[np.ndarray] = None) -> None:
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        bounds = segment_bounds(x) if bounds is None else bounds  # общие для всех колонок одного набора данных
+        # уровень: (x, y, границы участков в массивах уровня)
+        self.levels: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = [(x, y, bounds)]
+
+        block = 4  # блок из 2 отсчётов даёт столько же точек, сколько исходные данные
+        while len(self.levels[-1][0]) > MIN_LEVEL_POINTS and block < len(x):
+            self.levels.append(self.__build_level(x, y, bounds, block))
+            block *= 2
+
+    @staticmethod
+    def __build_level(x: np.ndarray, y: np.ndarray, bounds: np.ndarray, block: int):
+        lengths = np.diff(bounds)
+        blocks_per_segment = -(-lengths // block)  # деление с округлением вверх
+        # начало каждого блока: начало участка + j * block
+        segment_of_block = np.repeat(np.arange(len(lengths)), blocks_per_segment)
+        first_block = np.concatenate(([0], np.cumsum(blocks_per_segment)[:-1]))
+        local_index = np.arange(len(segment_of_block)) - first_block[segment_of_block]
+        starts = bounds[:-1][segment_of_block] + local_index * block
+        ends = np.minimum(starts + block, bounds[1:][segment_of_block])
+
+        y_min = np.fmin.reduceat(y, starts)
+        y_max = np.fmax.reduceat(y, starts)
+
+        level_x = np.empty(2 * len(starts))
+        level_y = np.empty(2 * len(starts))
+        level_x[0::2], level_x[1::2] = x[starts], x[ends - 1]
+        # на убывающем участке блока сначала максимум, затем минимум — иначе кривая получается пилообразной
+        falling = y[ends - 1] < y[starts]
+        level_y[0::2] = np.where(falling, y_max, y_min)
+        level_y[1::2] = np.where(falling, y_min, y_max)
+        level_bounds = np.concatenate(([0], 2 * np.cumsum(blocks_per_segment)))
+        return level_x, level_y, level_bounds
+
+    def level_for(self, x_min: float, x_max: float, pixels: float) -> int:
+        """Самый подробный уровень, в котором видимая часть каждого участка занимает не больше 2 * pixels точек."""
+        x, _, bounds = self.levels[0]
+        if len(x) == 0:
+            return 0
+        inside = ((x >= x_min) & (x <= x_max)).astype(np.int64)
+        visible = int(np.add.reduceat(inside, bounds[:-1]).max())
+        if visible <= 2 * pixels:
+            return 0
+        level = int(np.ceil(np.log2(visible / pixels))) - 1  # уровень k: блоки по 2**(k+1), по 2 точки на блок
+        return min(level, len(self.levels) - 1)
+
+    def select(self, x_min: float, x_max: float, pixels: float) -> List[np.ndarray]:
+        """
+        Возвращает участки уровня, подходящего для видимого диапазона [x_min, x_max] шириной pixels пикселей,
+        в виде массивов (число точек, 2) для LineCollection. Берётся только видимая часть каждого участка
+        (с одной точкой за каждой границей диапазона).
+        """
+        x, y, bounds = self.levels[self.level_for(x_min, x_max, pixels)]
+        segments = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            segment = x[start:end]
+            first = max(np.searchsorted(segment, x_min, side="left") - 1, 0)
+            last = min(np.searchsorted(segment, x_max, side="right") + 1, len(segment))
+            if last - first >= 2:
+                segments.append(np.column_stack((segment[first:last], y[start + first:start + last])))
+        return segments
@@ -1,7 +1,14 @@
 import pandas as pd
 import numpy as np
 from typing import List, Optional, Protocol
-import re
+
+from plotting.rawfile import RawFile, plot_to_dataframe
+from plotting.print_parser import parse_print_file
+from plotting.decimation import LODPyramid, segment_bounds
+
+
+LEGEND_MAX_ENTRIES = 10  # при большем числе запусков в легенде показываются первый и последний
+USER_COLOR = "red"       # цвет пользовательской кривой
 
 
 class DataLoader(Protocol):
@@ -16,68 +23,191 @@ class DataPlotter(Protocol):
 
 class Loader(DataLoader):
     def load_data(self, filename: str) -> pd.DataFrame:
-        with open(filename, 'r') as f:
-            lines = f.readlines()
+        """Загружает первую таблицу результатов (rawfile или вывод команды print)."""
+        return self.load_tables(filename)[0]
 
-            header_line_index = None  # ищем строку заголовка
-            for i, line in enumerate(lines):
-                if ('Index' in line and 'v-sweep' in line) or ('Index' in line and 'time' in line):  # FIXME переделать условие
-                    header_line_index = i
-                    break
+    def load_tables(self, filename: str) -> List[pd.DataFrame]:
+        """Загружает все таблицы результатов файла (несколько анализов / команд print)."""
+        if filename.endswith(".raw"):  # бинарный rawfile (команда write)
+            raw_file = RawFile(filename)
+            if not raw_file.plots:
+                raise ValueError(f"В файле {filename} нет данных симуляции.")
+            return [plot_to_dataframe(plot) for plot in raw_file.plots]
 
-            if header_line_index is None:
-                raise ValueError("Не удалось найти строку заголовка в файле")
+        tables = parse_print_file(filename)
+        if not tables:
+            raise ValueError("Не удалось найти строку заголовка в файле")
+        return tables
 
-            header_line = lines[header_line_index].strip()
-            column_names = re.split(r'\s+', header_line)
 
-            data = pd.read_csv(filename, sep='\s+', comment='I', skiprows=header_line_index + 1, names=column_names) # загрузка данных из файла симуляции
+class Plotter(DataPlotter):
+    """
+    Построение кривых набора данных одной коллекцией LineCollection.
+
+    Границы участков (семейства кривых, отдельные запуски) вычисляются один раз для шкалы набора
+    данных, и все колонки и все участки набора попадают в одну коллекцию. Для каждой колонки
+    строится пирамида прореживания (LODPyramid), и в коллекцию выводится только уровень,
+    соответствующий видимому диапазону и ширине осей в пикселях. Легенда строится по заместителям
+    (Line2D без данных), по одному на набор данных или запуск.
+    """
+    def __init__(self) -> None:
+        self.traces = []          # (LineCollection, [(LODPyramid, цвет)]) построенных наборов данных
+        self.legend_handles = []
+
+    def reset(self):
+        """Забывает построенные кривые (вызывается после очистки осей)."""
+        self.traces = []
+        self.legend_handles = []
 
-            for column in column_names[1:]:  # преобразование колонок в числовой формат и удаление некорректных данных
-                data[column] = pd.to_numeric(data[column], errors='coerce')
-    
-        return data.dropna()
+    def plot(self, data: pd.DataFrame, ax, label: str, color: str, linestyle: str):
+        return self.plot_runs([data], ax, labels=[label], colors=[color], linestyle=linestyle)
 
+    def plot_runs(self, frames: List[Optional[pd.DataFrame]], ax, labels: List[str], colors, linestyle: str = "-"):
+        """
+        Строит несколько запусков (наложение, свип) одной коллекцией; цвет задаётся для каждого запуска.
+        Возвращает коллекцию (для replace_runs) или None, если данных для построения нет.
+        """
+        from matplotlib.collections import LineCollection  # matplotlib нужен только при построении графиков
+        from matplotlib.lines import Line2D
 
-class Plotter(DataPlotter):
-    def plot(self, data: pd.DataFrame, ax, label: str, color: str, linestyle: str):
-        column_names = data.columns
-
-        for column in column_names[2:]:
-            x = data[column_names[1]]
-            y = data[column]
-            
-            mask = np.where(x.values[:-1] > x.values[1:], True, False)
-            x_segmented = np.insert(x.values, np.where(mask)[0] + 1, np.nan)
-            y_segmented = np.insert(y.values, np.where(mask)[0] + 1, np.nan)
-
-            ax.plot(x_segmented, y_segmented, label=label, color=color, linestyle=linestyle)
-        
-        ax.legend()
+        pyramids, bounds, plotted = self.__build_pyramids(frames, colors)
+        for index in plotted:
+            self.legend_handles.append(Line2D([], [], color=colors[index], linestyle=linestyle, label=labels[index]))
+
+        if not pyramids:
+            return None
+        collection = LineCollection([], linestyles=linestyle)
+        ax.add_collection(collection, autolim=False)
+        self.traces.append((collection, pyramids))
+        self.__update_trace(collection, pyramids, bounds[0][0], bounds[1][0], max(ax.bbox.width, 1.0))
+
+        ax.legend(handles=self.__legend_entries())
         ax.grid(True)
-        ax.relim()
-        ax.autoscale()
+        ax.update_datalim(bounds)
+        ax.autoscale_view()
+        return collection
+
+    def replace_runs(self, collection, frames: List[Optional[pd.DataFrame]], colors) -> bool:
+        """
+        Заменяет кривые построенной коллекции новыми данными без очистки осей: остальные кривые,
+        легенда и текущий масштаб сохраняются. False — коллекция уже удалена с осей или данных нет.
+        """
+        index = next((index for index, (trace, _) in enumerate(self.traces) if trace is collection), None)
+        ax = collection.axes
+        if index is None or ax is None or collection not in ax.collections:
+            return False
+        pyramids, _, _ = self.__build_pyramids(frames, colors)
+        if not pyramids:
+            return False
+        self.traces[index] = (collection, pyramids)
+        x_min, x_max = sorted(ax.get_xlim())
+        self.__update_trace(collection, pyramids, x_min, x_max, max(ax.bbox.width, 1.0))
+        return True
+
+    @staticmethod
+    def __build_pyramids(frames: List[Optional[pd.DataFrame]], colors):
+        """Пирамиды прореживания всех колонок запусков, общие границы данных и номера построенных запусков."""
+        pyramids, plotted = [], []
+        bounds = np.array([[np.inf, np.inf], [-np.inf, -np.inf]])
+        for index, (frame, color) in enumerate(zip(frames, colors)):
+            if frame is None or len(frame.columns) < 3:
+                continue
+            x = frame[frame.columns[1]].to_numpy(dtype=np.float64)
+            segments = segment_bounds(x)
+            for column in frame.columns[2:]:
+                y = frame[column].to_numpy(dtype=np.float64)
+                pyramids.append((LODPyramid(x, y, bounds=segments), color))
+                bounds[0] = np.fmin(bounds[0], (np.nanmin(x), np.nanmin(y)))
+                bounds[1] = np.fmax(bounds[1], (np.nanmax(x), np.nanmax(y)))
+            plotted.append(index)
+        return pyramids, bounds, plotted
+
+    def __legend_entries(self) -> list:
+        if len(self.legend_handles) <= LEGEND_MAX_ENTRIES:
+            return self.legend_handles
+        return [self.legend_handles[0], self.legend_handles[-1]]  # для длинных свипов — первый и последний запуск
+
+    @staticmethod
+    def __update_trace(collection, pyramids, x_min: float, x_max: float, pixels: float):
+        segments, colors = [], []
+        for pyramid, color in pyramids:
+            selected = pyramid.select(x_min, x_max, pixels)
+            segments += selected
+            colors += [color] * len(selected)
+        collection.set_segments(segments)
+        collection.set_color(colors)
+
+    def update_level_of_detail(self, ax):
+        """Подставляет в коллекции уровень детализации, соответствующий текущим пределам оси x."""
+        self.traces = [(collection, pyramids) for collection, pyramids in self.traces if collection.axes is ax]
+        x_min, x_max = sorted(ax.get_xlim())
+        pixels = max(ax.bbox.width, 1.0)
+        for collection, pyramids in self.traces:
+            self.__update_trace(collection, pyramids, x_min, x_max, pixels)
 
 
 class SimulationManager:
     def __init__(self):
         self.data_loader = Loader()
         self.data_plotter = Plotter()
+        self.user_collection = None  # коллекция пользовательской кривой последнего графика run
 
-    def run(self, fig, canvas, user_filename: str, reference_filename: str):
+    def run(self, fig, canvas, user_filename: str, reference_filename: str,
+            user_data: Optional[pd.DataFrame] = None, reference_data: Optional[pd.DataFrame] = None):
         """
         Отображает два графика: эталонный и пользовательский.
+        Уже загруженные данные (user_data, reference_data) используются без повторного чтения файлов.
         """
         try:
             ax = fig.gca()
             ax.clear()
-            reference_data = self.data_loader.load_data(reference_filename)
-            user_data = self.data_loader.load_data(user_filename)
+            self.data_plotter.reset()
+            if reference_data is None:
+                reference_data = self.data_loader.load_data(reference_filename)
+            if user_data is None:
+                user_data = self.data_loader.load_data(user_filename)
 
             self.data_plotter.plot(reference_data, ax, label="Эталонный график", color="blue", linestyle="--")
-            self.data_plotter.plot(user_data, ax, label="Пользовательский график", color="red", linestyle="-")
+            self.user_collection = self.data_plotter.plot(user_data, ax, label="Пользовательский график",
+                                                          color=USER_COLOR, linestyle="-")
+
+            fig.tight_layout()
+            canvas.draw_idle()
+        except Exception as e:
+            print(f"Ошибка построения графика: {e}")
+
+    def update_user(self, fig, canvas, user_data: pd.DataFrame) -> bool:
+        """
+        Перерисовывает только пользовательскую кривую графика run (живой предпросмотр): эталонная
+        кривая, легенда и масштаб не меняются. False — графика run на осях нет, нужен полный run.
+        """
+        try:
+            if self.user_collection is None or self.user_collection.axes is not fig.gca():
+                return False
+            if not self.data_plotter.replace_runs(self.user_collection, [user_data], [USER_COLOR]):
+                return False
+            canvas.draw_idle()
+            return True
+        except Exception as e:
+            print(f"Ошибка построения графика: {e}")
+            return False
+
+    def run_sweep(self, fig, canvas, frames: List[Optional[pd.DataFrame]], labels: List[str]):
+        """Отображает кривые всех запусков свипа в одной системе координат."""
+        try:
+            ax = fig.gca()
+            ax.clear()
+            self.data_plotter.reset()
+            self.user_collection = None
+            self.data_plotter.plot_runs(frames, ax, labels=labels, colors=plt_colormap(len(frames)))
 
             fig.tight_layout()
             canvas.draw_idle()
         except Exception as e:
             print(f"Ошибка построения графика: {e}")
+
+
+def plt_colormap(count: int):
+    """Цвета для count кривых из палитры viridis."""
+    from matplotlib import colormaps
+    return colormaps["viridis"](np.linspace(0.0, 0.9, max(count, 1)))
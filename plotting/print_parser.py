@@ -0,0 +1,139 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from typing import Iterator, List, Optional, TextIO, Tuple
+
+
+CHUNK_ROWS = 8192  # количество строк данных, преобразуемых в числа за один раз
+
+
+class PrintTable:
+    """
+    Таблица одной команды print ngspice: заголовок колонок и буферы значений.
+
+    Строки добавляются порциями в заранее выделенные буферы NumPy; при нехватке места
+    ёмкость удваивается.
+    """
+    def __init__(self, title: str, columns: Tuple[str, ...], capacity: int) -> None:
+        self.title = title
+        self.columns = columns
+        self.values = np.empty((max(capacity, 16), len(columns)), dtype=np.float64)
+        self.size = 0
+
+    def append_rows(self, rows: np.ndarray):
+        required = self.size + len(rows)
+        if required > len(self.values):
+            new_capacity = max(required, 2 * len(self.values))
+            values = np.empty((new_capacity, len(self.columns)), dtype=np.float64)
+            values[:self.size] = self.values[:self.size]
+            self.values = values
+        self.values[self.size:required] = rows
+        self.size = required
+
+    def to_dataframe(self) -> pd.DataFrame:
+        values = self.values[:self.size]
+        data = {name: values[:, i] for i, name in enumerate(self.columns)}
+        data[self.columns[0]] = values[:, 0].astype(np.int64)  # колонка Index
+        return pd.DataFrame(data, copy=False)
+
+
+def _flush(table: PrintTable, chunk: List[str]):
+    if not chunk:
+        return
+    numbers = np.array(" ".join(chunk).split(), dtype=np.float64)
+    table.append_rows(numbers.reshape(-1, len(table.columns)))
+    chunk.clear()
+
+
+def iter_print_tables(file: TextIO, capacity: int = 1024) -> Iterator[PrintTable]:
+    """
+    Однопроходный разбор вывода команды print ngspice.
+
+    Поддерживаются повторяющиеся на каждой странице заголовки, несколько команд print
+    (анализов) в одном файле и произвольные имена колонок. Новая таблица начинается, если
+    перед заголовком встретился текст (заголовок схемы/анализа), если изменились колонки
+    или если нумерация строк началась заново.
+
+    Yields:
+        PrintTable: Полностью прочитанные таблицы в порядке следования в файле.
+    """
+    table: Optional[PrintTable] = None
+    chunk: List[str] = []
+    pending_title: List[str] = []
+    header: Optional[Tuple[str, ...]] = None
+    expect_first_row = False
+
+    for line in file:
+        stripped = line.strip().lstrip("\f").strip()
+        if not stripped or stripped.startswith("---"):
+            continue
+
+        first_token = stripped.split(None, 1)[0]
+        if first_token == "Index":
+            header = tuple(stripped.split())
+            if table is None or pending_title or header != table.columns:
+                if table is not None:
+                    _flush(table, chunk)
+                    if table.size:
+                        yield table
+                title = " | ".join(pending_title) if pending_title else (table.title if table else "")
+                table = PrintTable(title, header, capacity)
+                pending_title = []
+                expect_first_row = False
+            else:
+                expect_first_row = True  # повтор заголовка на новой странице
+            continue
+
+        if first_token.isdigit() and table is not None:
+            if expect_first_row:
+                expect_first_row = False
+                if first_token == "0" and (table.size or chunk):
+                    # нумерация началась заново — та же команда print для следующего анализа
+                    _flush(table, chunk)
+                    yield table
+                    table = PrintTable(table.title, table.columns, capacity)
+            if len(stripped.split()) == len(table.columns):
+                chunk.append(stripped)
+                if len(chunk) >= CHUNK_ROWS:
+                    _flush(table, chunk)
+            continue
+
+        pending_title.append(stripped)
+
+    if table is not None:
+        _flush(table, chunk)
+        if table.size:
+            yield table
+
+
+def merge_column_pages(tables: List[PrintTable]) -> List[pd.DataFrame]:
+    """
+    Объединяет таблицы, на которые ngspice разбил одну широкую команду print по колонкам:
+    подряд идущие таблицы с одинаковыми заголовком, шкалой и числом строк склеиваются по колонкам.
+    """
+    frames: List[pd.DataFrame] = []
+    previous: Optional[PrintTable] = None
+    for table in tables:
+        frame = table.to_dataframe()
+        if (
+            previous is not None
+            and table.title == previous.title
+            and table.columns[:2] == previous.columns[:2]
+            and table.size == previous.size
+            and not set(table.columns[2:]) & set(frames[-1].columns)
+        ):
+            frames[-1] = pd.concat([frames[-1], frame.iloc[:, 2:]], axis=1)
+        else:
+            frames.append(frame)
+        previous = table
+    return frames
+
+
+def parse_print_file(filename: str) -> List[pd.DataFrame]:
+    """Читает файл вывода print за один проход и возвращает все таблицы результатов."""
+    capacity = max(1024, os.path.getsize(filename) // 64)  # оценка числа строк по размеру файла
+    with open(filename, "r") as file:
+        tables = list(iter_print_tables(file, capacity=capacity))
+    return merge_column_pages(tables)
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+from typing import Dict, List, Optional
+
+
+class RawPlot:
+    """
+    Один набор результатов (plot) бинарного rawfile ngspice.
+
+    Векторы — это представления np.memmap над данными файла без копирования:
+    значения читаются с диска только при обращении к ним.
+    """
+    def __init__(self, title: str, name: str, flags: str, variables: List[str], data: np.memmap) -> None:
+        self.title = title
+        self.name = name
+        self.flags = flags
+        self.variables = variables
+        self.data = data
+
+    @property
+    def is_complex(self) -> bool:
+        return "complex" in self.flags
+
+    @property
+    def scale(self) -> str:
+        return self.variables[0]
+
+    @property
+    def vectors(self) -> Dict[str, np.ndarray]:
+        return {name: self.data[f"v{i}"] for i, name in enumerate(self.variables)}
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+class RawFile:
+    """Разбор заголовков бинарного rawfile ngspice (команда write) и отображение данных в память."""
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self.plots: List[RawPlot] = []
+        self.__parse()
+
+    def __parse(self):
+        with open(self.filename, "rb") as file:
+            while True:
+                header = self.__read_header(file)
+                if header is None:
+                    break
+
+                variables = header["variables"]
+                n_points = header["points"]
+                value_type = "<c16" if "complex" in header["flags"] else "<f8"
+                dtype = np.dtype([(f"v{i}", value_type) for i in range(len(variables))])
+                offset = file.tell()
+
+                data = np.memmap(self.filename, dtype=dtype, mode="r", offset=offset, shape=(n_points,))
+                self.plots.append(RawPlot(header["title"], header["plotname"], header["flags"], variables, data))
+                file.seek(offset + dtype.itemsize * n_points)
+
+    @staticmethod
+    def __read_header(file) -> Optional[dict]:
+        header = {"title": "", "plotname": "", "flags": "real", "variables": [], "points": 0}
+        n_variables = 0
+        line = file.readline()
+        if not line:
+            return None
+
+        while line:
+            text = line.decode("utf-8", errors="replace").rstrip("\r\n")
+            key, _, value = text.partition(":")
+            key = key.strip().lower()
+            value = value.strip()
+
+            if key == "title":
+                header["title"] = value
+            elif key == "plotname":
+                header["plotname"] = value
+            elif key == "flags":
+                header["flags"] = value.lower()
+            elif key == "no. variables":
+                n_variables = int(value)
+            elif key == "no. points":
+                header["points"] = int(value)
+            elif key == "variables":
+                for _ in range(n_variables):
+                    parts = file.readline().decode("utf-8", errors="replace").split()
+                    header["variables"].append(parts[1])
+            elif key == "binary":
+                return header
+            elif key == "values":
+                raise ValueError(f"ASCII rawfile не поддерживается: {file.name}. Используйте set filetype=binary.")
+            line = file.readline()
+
+        raise ValueError(f"Повреждён заголовок rawfile: {file.name}")
+
+
+def plot_to_dataframe(plot: RawPlot) -> pd.DataFrame:
+    """
+    Представляет набор результатов rawfile в виде DataFrame с колонками Index, шкала, векторы.
+
+    Вещественные векторы передаются в DataFrame без копирования и без объединения колонок в один
+    блок, поэтому колонки остаются представлениями np.memmap. Комплексные векторы заменяются
+    модулем (новые массивы); операции pandas, объединяющие блоки, также копируют данные.
+    """
+    vectors = plot.vectors
+    if plot.is_complex:
+        vectors = {name: np.abs(values) for name, values in vectors.items()}
+
+    columns = {"Index": np.arange(len(plot))}
+    columns.update(vectors)
+    return pd.DataFrame(columns, copy=False)
+
+
+class RawLoader:
+    def load_data(self, filename: str, plot_index: int = 0) -> pd.DataFrame:
+        """Загружает набор результатов rawfile с номером plot_index."""
+        raw_file = RawFile(filename)
+        if not raw_file.plots:
+            raise ValueError(f"В файле {filename} нет данных симуляции.")
+        return plot_to_dataframe(raw_file.plots[plot_index])
+
+
+def write_rawfile(data: pd.DataFrame, filename: str, title: str = "", plotname: str = ""):
+    """Записывает таблицу результатов (Index, шкала, векторы) в бинарный rawfile формата ngspice."""
+    variables = [name for name in data.columns if name != "Index"]
+    values = np.ascontiguousarray(data[variables].to_numpy(dtype="<f8"))
+
+    header = [
+        f"Title: {title}",
+        "Date: ",
+        f"Plotname: {plotname}",
+        "Flags: real",
+        f"No. Variables: {len(variables)}",
+        f"No. Points: {len(values)}",
+        "Variables:",
+    ]
+    header += [f"\t{i}\t{name}\t{'time' if name == 'time' else 'voltage'}" for i, name in enumerate(variables)]
+    header.append("Binary:")
+
+    with open(filename, "wb") as file:
+        file.write(("\n".join(header) + "\n").encode("utf-8"))
+        file.write(values.tobytes())
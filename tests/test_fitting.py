@@ -0,0 +1,98 @@
+import contextlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.fitting import ParameterFitter
+
+
+X = np.linspace(0.0, 1.0, 11)
+
+
+class FakeSweepResult:
+    def __init__(self, frames):
+        self.frames = frames
+
+
+class FakeSweep:
+    """
+    Свип с аналитической моделью y = a * x + b вместо симулятора. fail(parameters) — запуски,
+    которые «завершаются с ошибкой» (frame None).
+    """
+    def __init__(self, fail=lambda parameters: False):
+        self.fail = fail
+        self.points = []
+
+    def create_executor(self):
+        return contextlib.nullcontext()
+
+    def run(self, points, executor=None):
+        self.points += points
+        frames = []
+        for parameters in points:
+            if self.fail(parameters):
+                frames.append(None)
+                continue
+            y = parameters["a"] * X + parameters.get("b", 0.0)
+            frames.append(pd.DataFrame({"Index": np.arange(len(X)), "v-sweep": X, "i": y}))
+        return FakeSweepResult(frames)
+
+
+def target(a, b=0.0):
+    return pd.DataFrame({"Index": np.arange(len(X)), "v-sweep": X, "i": a * X + b})
+
+
+def test_fit_reaches_target():
+    sweep = FakeSweep()
+    result = ParameterFitter(sweep, target(2.0, 0.5), {"a": 1.0, "b": 0.1}).fit()
+
+    assert result.success
+    assert result.parameters["a"] == pytest.approx(2.0, rel=1e-4)
+    assert result.parameters["b"] == pytest.approx(0.5, rel=1e-4)
+
+
+def test_jacobian_is_not_recomputed_after_rejected_step():
+    sweep = FakeSweep()
+    # оптимум за открытой верхней границей: пробные шаги упираются в неё и отклоняются
+    fitter = ParameterFitter(sweep, target(3.0), {"a": 1.0}, bounds={"a": (0.0, 2.0, False, False)},
+                             max_iterations=6)
+    result = fitter.fit()
+
+    # начальная точка + одна производная на принятую точку + три пробных шага на итерацию
+    accepted = sum(1 for record in result.iterations if record["simulations"] == 4)
+    rejected = sum(1 for record in result.iterations if record["simulations"] == 3)
+    assert accepted + rejected == len(result.iterations)
+    assert rejected > 0
+    assert all(parameters["a"] < 2.0 for parameters in sweep.points)
+    assert result.parameters["a"] == pytest.approx(2.0, rel=1e-6)
+
+
+def test_failed_jacobian_column_is_retried_backwards():
+    # возмущение вверх от начальной точки не удаётся, вниз — удаётся
+    sweep = FakeSweep(fail=lambda parameters: 1.0 < parameters["a"] < 1.01 and parameters["b"] == 0.1)
+    result = ParameterFitter(sweep, target(2.0, 0.5), {"a": 1.0, "b": 0.1}).fit()
+
+    assert any(parameters["a"] < 1.0 for parameters in sweep.points[:5])
+    assert not result.iterations[0]["frozen"]
+    assert result.parameters["a"] == pytest.approx(2.0, rel=1e-4)
+
+
+def test_failed_jacobian_column_is_reported():
+    sweep = FakeSweep(fail=lambda parameters: parameters["b"] != 0.1)
+    result = ParameterFitter(sweep, target(2.0, 0.5), {"a": 1.0, "b": 0.1}, max_iterations=3).fit()
+
+    assert result.iterations[0]["frozen"] == ["b"]
+    assert result.parameters["b"] == 0.1
+    assert "Не удалось вычислить производные (симуляция завершилась с ошибкой): b" in result.report()
+
+
+def test_user_weights_scale_residual():
+    fitter = ParameterFitter(FakeSweep(), target(2.0), {"a": 1.0}, weights={"i": np.linspace(0.0, 1.0, len(X))})
+    residual = fitter.residuals(pd.DataFrame({"Index": np.arange(len(X)), "v-sweep": X, "i": X}))
+
+    assert residual[0] == 0.0
+    np.testing.assert_allclose(residual, -X * np.linspace(0.0, 1.0, len(X)) / 2.0)
+
+    with pytest.raises(ValueError):
+        ParameterFitter(FakeSweep(), target(2.0), {"a": 1.0}, weights={"missing": 1.0})
@@ -0,0 +1,26 @@
+from core.netlist import inject_model_parameters
+
+
+def test_comments_on_continuation_lines_keep_parameters():
+    lines = [
+        "* bjt\n",
+        ".model bm bjt505 level=1 ; main card\n",
+        "+ is=1e-16 ; saturation\n",
+        "+ bf=100 $ gain\n",
+        "+ vaf=$var\n",
+        "q1 c b 0 bm\n",
+    ]
+
+    updated = inject_model_parameters(lines, ["bjt505"], {"nff": "1.02", "bf": "120"})
+
+    assert updated == [
+        "* bjt\n",
+        ".model bm bjt505 (\n",
+        "+ level=1\n",
+        "+ is=1e-16\n",
+        "+ bf=120\n",
+        "+ vaf=$var\n",  # $ без пробела перед ним — не комментарий
+        "+ nff=1.02\n",
+        "+ )\n",
+        "q1 c b 0 bm\n",
+    ]
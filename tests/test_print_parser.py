@@ -0,0 +1,70 @@
+import io
+
+import numpy as np
+
+from plotting.print_parser import iter_print_tables, merge_column_pages, parse_print_file
+
+
+SEPARATOR = "-" * 80
+
+
+def page(header, rows, start=0, first=True):
+    """Страница вывода print: заголовок колонок между разделителями и строки с номерами от start."""
+    lines = [] if first else ["\f"]
+    lines += [SEPARATOR, "\t".join(header), SEPARATOR]
+    lines += ["\t".join([str(index)] + [f"{value:e}" for value in row]) for index, row in enumerate(rows, start=start)]
+    return lines
+
+
+def text(*lines):
+    return "\n".join(lines) + "\n"
+
+
+def test_pages_with_repeated_header_form_one_table():
+    rows = [(0.1 * i, 1e-3 * i) for i in range(6)]
+    output = text("bench circuit", "DC transfer characteristic",
+                  *page(("Index", "v-sweep", "i(vd)"), rows[:4]),
+                  *page(("Index", "v-sweep", "i(vd)"), rows[4:], start=4, first=False))
+
+    tables = list(iter_print_tables(io.StringIO(output)))
+
+    assert len(tables) == 1
+    assert tables[0].title == "bench circuit | DC transfer characteristic"
+    frame = tables[0].to_dataframe()
+    assert frame["Index"].tolist() == list(range(6))
+    np.testing.assert_allclose(frame["i(vd)"], [row[1] for row in rows])
+
+
+def test_restarted_index_starts_new_table():
+    first = [(0.0, 1.0), (0.5, 2.0)]
+    second = [(0.0, 3.0), (0.5, 4.0)]
+    output = text("bench circuit", "DC transfer characteristic",
+                  *page(("Index", "v-sweep", "i(vd)"), first),
+                  *page(("Index", "v-sweep", "i(vd)"), second, first=False))
+
+    frames = merge_column_pages(list(iter_print_tables(io.StringIO(output))))
+
+    assert len(frames) == 2
+    assert frames[0]["i(vd)"].tolist() == [1.0, 2.0]
+    assert frames[1]["i(vd)"].tolist() == [3.0, 4.0]
+
+
+def test_column_split_pages_are_merged_and_analyses_kept_apart(tmp_path):
+    left = [(0.0, 1.0, 2.0), (1.0, 3.0, 4.0)]
+    right = [(0.0, 5.0), (1.0, 6.0)]
+    transient = [(0.0, 0.9), (1e-9, 0.8), (2e-9, 0.7)]
+    output = text("bench circuit", "DC transfer characteristic",
+                  *page(("Index", "v-sweep", "i(vd)", "i(vg)"), left),
+                  *page(("Index", "v-sweep", "v(d)"), right, first=False),
+                  "", "bench circuit", "Transient Analysis",
+                  *page(("Index", "time", "v(d)"), transient))
+    print_file = tmp_path / "result.txt"
+    print_file.write_text(output)
+
+    frames = parse_print_file(str(print_file))
+
+    assert len(frames) == 2
+    assert list(frames[0].columns) == ["Index", "v-sweep", "i(vd)", "i(vg)", "v(d)"]
+    assert frames[0]["v(d)"].tolist() == [5.0, 6.0]
+    assert list(frames[1].columns) == ["Index", "time", "v(d)"]
+    np.testing.assert_allclose(frames[1]["v(d)"], [0.9, 0.8, 0.7])
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from core.netlist import redirect_output_to_rawfile
+from plotting.rawfile import RawFile, plot_to_dataframe, write_rawfile
+
+
+CONTROL = [
+    ".control\n",
+    "dc vd 0 1 0.1\n",
+    "print i(vd) > out.txt\n",
+    "tran 1n 10n\n",
+    "print v(d) i(vd)\n",
+    ".endc\n",
+]
+
+
+def test_each_print_becomes_its_own_write():
+    lines = redirect_output_to_rawfile(CONTROL, "result.raw")
+
+    assert lines == [
+        ".control\n",
+        "dc vd 0 1 0.1\n",
+        "set filetype=binary\n",
+        "write result.raw i(vd)\n",
+        "set appendwrite\n",
+        "tran 1n 10n\n",
+        "write result.raw v(d) i(vd)\n",
+        ".endc\n",
+    ]
+
+
+def test_plots_are_read_as_memmap_views(tmp_path):
+    first = pd.DataFrame({"Index": np.arange(3), "v-sweep": [0.0, 0.5, 1.0], "i(vd)": [0.0, 1e-3, 2e-3]})
+    second = pd.DataFrame({"Index": np.arange(2), "time": [0.0, 1e-9], "v(d)": [1.0, 0.9]})
+    write_rawfile(first, str(tmp_path / "first.raw"), plotname="DC transfer characteristic")
+    write_rawfile(second, str(tmp_path / "second.raw"), plotname="Transient Analysis")
+    raw_file = tmp_path / "result.raw"
+    raw_file.write_bytes((tmp_path / "first.raw").read_bytes() + (tmp_path / "second.raw").read_bytes())
+
+    plots = RawFile(str(raw_file)).plots
+    assert [plot.name for plot in plots] == ["DC transfer characteristic", "Transient Analysis"]
+
+    data = plot_to_dataframe(plots[1])
+    assert list(data.columns) == ["Index", "time", "v(d)"]
+    np.testing.assert_allclose(data["v(d)"], [1.0, 0.9])
+    assert np.shares_memory(data["v(d)"].to_numpy(), plots[1].data)
@@ -0,0 +1,55 @@
+from core.file_manager import FileManager
+from core.reference_data import build_reference_manifest, is_reference_valid, original_content, save_manifest
+
+
+PARAMETERS = "`MPRco(gain, 1.0, \"\", 0.0, 10.0, \"Gain\")\n"
+
+
+def test_original_survives_application_writes(tmp_path):
+    parameters = tmp_path / "parameters.inc"
+    parameters.write_text(PARAMETERS)
+    originals = str(tmp_path / "sources")
+    manager = FileManager(originals)
+
+    assert manager.apply_changes_to_file({"gain": "1.5"}, str(parameters))
+    assert manager.apply_changes_to_file({"gain": "2.5"}, str(parameters))
+
+    assert "2.5" in parameters.read_text()
+    assert original_content(str(parameters), originals) == PARAMETERS.encode("utf-8")
+
+
+def test_external_edit_becomes_new_original(tmp_path):
+    parameters = tmp_path / "parameters.inc"
+    parameters.write_text(PARAMETERS)
+    originals = str(tmp_path / "sources")
+    manager = FileManager(originals)
+    manager.apply_changes_to_file({"gain": "1.5"}, str(parameters))
+
+    edited = parameters.read_text() + "// edited\n"
+    parameters.write_text(edited)
+    assert original_content(str(parameters), originals) == edited.encode("utf-8")
+
+    manager.apply_changes_to_file({"gain": "3.0"}, str(parameters))
+    assert original_content(str(parameters), originals) == edited.encode("utf-8")
+
+
+def test_untracked_file_is_its_own_original(tmp_path):
+    parameters = tmp_path / "parameters.inc"
+    parameters.write_text(PARAMETERS)
+    FileManager().apply_changes_to_file({"gain": "1.5"}, str(parameters))
+
+    assert original_content(str(parameters), str(tmp_path / "sources")) == parameters.read_bytes()
+
+
+def test_include_edit_invalidates_reference(tmp_path):
+    (tmp_path / "models.lib").write_text(".lib typ\n.model nch nmos vto=0.5\n.endl\n")
+    spice_file = tmp_path / "test.sp"
+    spice_file.write_text("* test\n.lib 'models.lib' typ\n.end\n")
+    result_file = tmp_path / "reference.raw"
+    result_file.write_bytes(b"data")
+    save_manifest(str(result_file), build_reference_manifest("key", str(spice_file), "ngspice-42", "raw"))
+
+    assert is_reference_valid(str(result_file), build_reference_manifest("key", str(spice_file), "ngspice-42", "raw"))
+
+    (tmp_path / "models.lib").write_text(".lib typ\n.model nch nmos vto=0.6\n.endl\n")
+    assert not is_reference_valid(str(result_file), build_reference_manifest("key", str(spice_file), "ngspice-42", "raw"))
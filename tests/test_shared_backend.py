@@ -0,0 +1,181 @@
+import ctypes
+
+import numpy as np
+import pytest
+
+from core import backends
+from core.backends import SharedNgspiceBackend, VectorInfo
+
+
+NETLIST = """* nmos test
+.model nch testmos vto=0.5
+vd d 0 1
+m1 d d 0 0 nch
+.control
+pre_osdi testmos.osdi
+dc vd 0 1 0.25
+print i(vd) > result.txt
+.endc
+.end
+"""
+
+
+ENTRY_POINTS = ("ngSpice_Init", "ngSpice_Circ", "ngSpice_Command", "ngGet_Vec_Info",
+                "ngSpice_CurPlot", "ngSpice_AllVecs")
+
+
+class EntryPoint:
+    """Функция заглушки с атрибутами argtypes/restype, которые задаёт backend (как у функций ctypes.CDLL)."""
+    def __init__(self, function):
+        self.function = function
+        self.argtypes = None
+        self.restype = None
+
+    def __call__(self, *args):
+        return self.function(*args)
+
+
+class StubNgspice:
+    """
+    Заглушка libngspice с теми же точками входа shared API: цепь «загружается» из массива строк,
+    анализ dc создаёт вектор v-sweep, ток равен vto * v-sweep. Неизвестные команды выводят ошибку
+    в stderr через callback SendChar, как настоящая библиотека.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.callbacks = None
+        self.commands = []
+        self.circuits = []
+        self.vto = None
+        self.vectors = {}
+        self._infos = []  # структуры VectorInfo и их данные должны жить до чтения вектора
+        for name in ENTRY_POINTS:
+            setattr(self, name, EntryPoint(getattr(self, name)))
+
+    def ngSpice_Init(self, send_char, send_stat, controlled_exit, send_data, send_init, bg_running, user):
+        self.callbacks = (send_char, send_stat, controlled_exit, send_data, send_init, bg_running)
+        return 0
+
+    def ngSpice_Circ(self, circuit):
+        lines = []
+        i = 0
+        while circuit[i] is not None:
+            lines.append(circuit[i].decode("utf-8"))
+            i += 1
+        self.circuits.append(lines)
+        card = next(line for line in lines if line.startswith(".model"))
+        self.vto = float(card.split("vto=")[1])
+        self.vectors = {}
+        return 0
+
+    def ngSpice_Command(self, command):
+        command = command.decode("utf-8")
+        self.commands.append(command)
+        words = command.split()
+        send_char = self.callbacks[0]
+        if words[0] in ("cd", "pre_osdi", "quit"):
+            pass
+        elif words[0] == "altermod":
+            self.vto = float(words[-1])
+        elif words[0] == "dc":
+            start, stop, step = map(float, words[2:5])
+            sweep = np.arange(start, stop + step / 2, step)
+            self.vectors = {"v-sweep": sweep, "i(vd)": self.vto * sweep}
+            send_char(b"stdout Doing analysis at TEMP = 27.000000", 0, None)
+        elif words[0] == "let":
+            self.vectors[words[1]] = self.vectors[words[3]]
+        else:
+            send_char(f"stderr Error: {words[0]}: no such command available".encode("utf-8"), 0, None)
+        return 0
+
+    def ngGet_Vec_Info(self, name):
+        values = self.vectors.get(name.decode("utf-8"))
+        if values is None:
+            return ctypes.POINTER(VectorInfo)()
+        data = np.ascontiguousarray(values, dtype=np.float64)
+        info = VectorInfo(name, 0, 0, data.ctypes.data_as(ctypes.POINTER(ctypes.c_double)), None, len(data))
+        self._infos.append((info, data))
+        return ctypes.pointer(info)
+
+    def ngSpice_CurPlot(self):
+        return b"dc1"
+
+    def ngSpice_AllVecs(self, plot):
+        return [name.encode("utf-8") for name in self.vectors] + [None]
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    libraries = []
+
+    def load(path):
+        library = StubNgspice(path)
+        libraries.append(library)
+        return library
+
+    monkeypatch.setattr(backends.ctypes, "CDLL", load)
+    return libraries
+
+
+@pytest.fixture
+def netlist(tmp_path):
+    spice_file = tmp_path / "test.sp"
+    spice_file.write_text(NETLIST)
+    (tmp_path / "testmos.osdi").write_bytes(b"osdi")
+    return spice_file
+
+
+def test_load_passes_circuit_and_setup_commands(stub, netlist):
+    backend = SharedNgspiceBackend(library_path="libngspice-stub.so")
+    backend.load(str(netlist), ["testmos"])
+
+    library = stub[0]
+    assert library.circuits[0][0] == "* nmos test"
+    assert library.circuits[0][-1] == ".end"
+    assert not any(line.startswith((".control", "dc", "print")) for line in library.circuits[0])
+    assert library.commands == [f"cd {netlist.parent}", "pre_osdi testmos.osdi"]
+    assert backend.analyses == ["dc vd 0 1 0.25"]
+    assert backend.print_expressions == ["i(vd)"]
+    assert backend.model_name == "nch"
+
+
+def test_run_reads_vectors_without_result_file(stub, netlist, tmp_path):
+    backend = SharedNgspiceBackend(library_path="libngspice-stub.so")
+    result_file = tmp_path / "result.raw"
+    data = backend.run(str(netlist), str(result_file), model_types=["testmos"])
+
+    assert list(data.columns) == ["Index", "v-sweep", "i(vd)"]
+    np.testing.assert_allclose(data["v-sweep"], [0.0, 0.25, 0.5, 0.75, 1.0])
+    np.testing.assert_allclose(data["i(vd)"], 0.5 * data["v-sweep"])
+    assert not result_file.exists()
+
+
+def test_rerun_applies_altermod_without_reload(stub, netlist, tmp_path):
+    backend = SharedNgspiceBackend(library_path="libngspice-stub.so")
+    result_file = str(tmp_path / "result.raw")
+    backend.run(str(netlist), result_file, parameters={"VTO": "0.5"}, model_types=["testmos"])
+    data = backend.run(str(netlist), result_file, parameters={"VTO": "0.7"}, model_types=["testmos"])
+
+    library = stub[0]
+    assert len(library.circuits) == 1
+    assert library.commands.count("pre_osdi testmos.osdi") == 1
+    assert library.commands.count("altermod nch vto = 0.7") == 1
+    np.testing.assert_allclose(data["i(vd)"], 0.7 * data["v-sweep"])
+
+    # возврат параметра к значению из схемы требует повторной загрузки цепи
+    data = backend.run(str(netlist), result_file, model_types=["testmos"])
+    assert len(library.circuits) == 2
+    np.testing.assert_allclose(data["i(vd)"], 0.5 * data["v-sweep"])
+
+
+def test_command_error_is_raised(stub, netlist):
+    backend = SharedNgspiceBackend(library_path="libngspice-stub.so")
+    backend.load(str(netlist), ["testmos"])
+    with pytest.raises(RuntimeError, match="no such command"):
+        backend.command("bogus")
+
+
+def test_parameters_require_model_type(stub, netlist, tmp_path):
+    backend = SharedNgspiceBackend(library_path="libngspice-stub.so")
+    with pytest.raises(ValueError):
+        backend.run(str(netlist), str(tmp_path / "result.raw"), parameters={"vto": "0.7"})
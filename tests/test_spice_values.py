@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from utils.spice_values import find_range_violations, parameter_interval, parse_spice_number, parse_spice_values
+from utils.va_preprocessor import load_parameter_catalog
+
+
+MODEL = """module testmod(a, b);
+    parameter real gain = 1.0 from (0:10] exclude 5;
+    parameter integer level = 1 from [0:3];
+endmodule
+"""
+
+PARAMETERS = "`MPRoz(rs, 10.0, \"Ohm\", \"Series resistance\")\n"
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    (tmp_path / "parameters.inc").write_text(PARAMETERS)
+    model = tmp_path / "model.va"
+    model.write_text('`include "parameters.inc"\n' + MODEL)
+    return load_parameter_catalog(str(model))
+
+
+def test_scale_suffixes():
+    values = parse_spice_values(["1meg", "1MEG", "1M", "1m", "2mil", "1.5k", "-1.5e-3k", "3g", "2t", "7a"])
+    np.testing.assert_allclose(values, [1e6, 1e6, 1e-3, 1e-3, 50.8e-6, 1.5e3, -1.5, 3e9, 2e12, 7e-18])
+
+
+def test_trailing_units_are_ignored():
+    values = parse_spice_values(["10pF", "3megohm", "2.2kOhm", "5V", "1e3"])
+    np.testing.assert_allclose(values, [10e-12, 3e6, 2.2e3, 5.0, 1e3])
+
+
+def test_infinity_and_invalid_values():
+    values = parse_spice_values(["inf", "-inf", "abc"])
+    assert values[0] == np.inf and values[1] == -np.inf and np.isnan(values[2])
+    with pytest.raises(ValueError):
+        parse_spice_number("abc")
+
+
+def test_intervals_from_brackets_and_macros(catalog):
+    assert parameter_interval(catalog.get("gain")) == (0.0, 10.0, False, True)
+    assert parameter_interval(catalog.get("level")) == (0.0, 3.0, True, True)
+    assert parameter_interval(catalog.get("rs")) == (0.0, np.inf, False, False)
+
+
+def test_values_at_open_and_closed_bounds(catalog):
+    violations = find_range_violations(catalog, {"gain": ["0", "1p", "10", "10.001"], "level": ["0", "3"],
+                                                 "rs": ["0", "1f"]})
+
+    assert violations == [
+        "gain = 0: вне допустимого диапазона (0, 10]",
+        "gain = 10.001: вне допустимого диапазона (0, 10]",
+        "rs = 0: вне допустимого диапазона (0, inf)",
+    ]
+
+
+def test_excluded_fractional_and_invalid_values(catalog):
+    violations = find_range_violations(catalog, {"gain": ["5", "5.5", "x"], "level": ["1.5", "4"], "unknown": "1"})
+
+    assert violations == [
+        "gain = 5: значение исключено (5)",
+        "gain = x: значение не является числом",
+        "level = 1.5: параметр принимает только целые значения",
+        "level = 4: вне допустимого диапазона [0, 3]",
+    ]
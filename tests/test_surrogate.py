@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from core.surrogate import parameter_ranges
+
+
+def describe(name, default, brackets=None, lower=None, upper=None):
+    return {"name": name, "default_value": default, "range": brackets, "min_value": lower, "max_value": upper}
+
+
+def test_range_is_span_around_default_within_bounds():
+    ranges = parameter_ranges([describe("a", 0.5, "[]", 0.0, 1.0), describe("b", -2.0)], ["a", "b"])
+
+    assert ranges["a"].as_tuple() == (0.05, 1.0, False)
+    assert ranges["b"].as_tuple() == (-20.0, -0.2, False)
+
+
+def test_positive_parameter_open_at_zero_is_logarithmic():
+    ranges = parameter_ranges([describe("a", 2.0, "(]", 0.0, np.inf), describe("b", 0.0, "(]", 0.0, 5.0)], ["a", "b"])
+
+    assert ranges["a"].as_tuple() == pytest.approx((0.2, 20.0, True))
+    low, high, logarithmic = ranges["b"].as_tuple()
+    assert 0.0 < low < high <= 1.0 and logarithmic
+
+
+def test_samples_stay_inside_open_bounds():
+    parameter_range = parameter_ranges([describe("a", 3.0, "()", 1.0, 4.0)], ["a"])["a"]
+    values = parameter_range.from_unit(np.array([0.0, 1.0]))
+
+    assert 1.0 < values[0] and values[1] < 4.0
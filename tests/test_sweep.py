@@ -0,0 +1,39 @@
+import sys
+import time
+import multiprocessing
+
+import pytest
+
+from core import sweep
+from core.jobs import observe_processes, run_process
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    """Состояние воркера свипа в текущем процессе: очередь групп процессов и событие отмены."""
+    process_groups, cancelled = multiprocessing.SimpleQueue(), multiprocessing.Event()
+    monkeypatch.setattr(sweep, "_process_groups", process_groups)
+    monkeypatch.setattr(sweep, "_cancelled", cancelled)
+    return process_groups, cancelled
+
+
+def test_process_started_after_cancel_is_killed(worker):
+    process_groups, cancelled = worker
+    cancelled.set()  # отмена пришла, пока воркер ещё не запустил процесс
+
+    started = time.monotonic()
+    with observe_processes(sweep.report_process_group):
+        result = run_process([sys.executable, "-c", "import time; time.sleep(30)"], stage="ngspice", timeout=60)
+
+    assert result.returncode != 0
+    assert time.monotonic() - started < 10
+    assert process_groups.get()[1] is True
+    assert process_groups.get()[1] is False
+
+
+def test_job_is_not_started_after_cancel(worker):
+    _, cancelled = worker
+    cancelled.set()
+
+    with pytest.raises(RuntimeError, match="отменён"):
+        sweep.run_sweep_job({})
@@ -0,0 +1,46 @@
+import threading
+
+from core.pipeline import Pipeline, run_pipeline
+from utils.tracing import span, tracer
+
+
+def test_concurrent_jobs_keep_their_own_traces():
+    started = threading.Barrier(2)
+    traces = {}
+
+    def job(name):
+        trace = tracer.start(name)
+        started.wait()  # обе трассы активны одновременно
+        with span("Этап " + name):
+            pass
+        tracer.finish()
+        traces[name] = trace
+
+    threads = [threading.Thread(target=job, args=(name,)) for name in ("first", "second")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [item.name for item in traces["first"].spans] == ["Этап first"]
+    assert [item.name for item in traces["second"].spans] == ["Этап second"]
+    assert tracer.active is None
+
+
+def test_pipeline_stages_inherit_trace():
+    def stage():
+        with span("Этап графа"):
+            return threading.current_thread().name
+
+    with tracer.trace("Граф") as trace:
+        pipeline = Pipeline()
+        pipeline.add("stage", stage)
+        run_pipeline(pipeline)
+        with tracer.trace("Вложенная") as nested:
+            with span("Внутри"):
+                pass
+        assert tracer.active is trace
+
+    assert [item.name for item in trace.spans] == ["Этап графа"]
+    assert [item.name for item in nested.spans] == ["Внутри"]
+    assert tracer.last is trace
@@ -0,0 +1,81 @@
+import math
+
+from utils.va_preprocessor import load_parameter_catalog
+
+
+MODEL = """`include "disciplines.vams"
+`define GAIN_DEFAULT 2.0
+`include "parameters.inc"
+module testmod(a, b);
+    electrical a, b;
+`ifdef EXTENDED
+    parameter real ext = 1.0;
+`else
+    parameter real basic = 3.0 from [1.0:10.0) exclude (4.0:5.0) exclude 7.0;
+`endif
+    parameter integer level = 1 from [0:inf) exclude 2;
+    (* desc="Output gain", units="A/V" *) parameter real gain = `GAIN_DEFAULT from (0:inf);
+    aliasparam gm = gain;
+endmodule
+"""
+
+PARAMETERS = "`MPRco(rs, 10.0, \"Ohm\", 0.0, 100.0, \"Series resistance\")\n"
+
+
+def write_model(tmp_path):
+    (tmp_path / "parameters.inc").write_text(PARAMETERS)
+    model = tmp_path / "model.va"
+    model.write_text(MODEL)
+    return str(model)
+
+
+def test_ranges_and_exclusions(tmp_path):
+    catalog = load_parameter_catalog(write_model(tmp_path))
+
+    basic = catalog.get("basic")
+    assert (basic["range"], basic["min_value"], basic["max_value"]) == ("[)", 1.0, 10.0)
+    assert basic["exclude"] == ["(4.0:5.0)", "7.0"]
+
+    level = catalog.get("level")
+    assert level["type"] == "integer"
+    assert (level["range"], level["min_value"], math.isinf(level["max_value"])) == ("[)", 0.0, True)
+    assert level["exclude"] == ["2"]
+
+
+def test_define_attributes_and_alias(tmp_path):
+    catalog = load_parameter_catalog(write_model(tmp_path))
+
+    gain = catalog.get("gain")
+    assert gain["default_value"] == 2.0
+    assert gain["range"] == "()"
+    assert (gain["units"], gain["description"]) == ("A/V", "Output gain")
+    assert catalog.aliases == {"gm": "gain"}
+    assert catalog.get("GM") is gain
+    assert catalog.missing_includes == ["disciplines.vams"]
+
+
+def test_macro_parameters_from_included_file(tmp_path):
+    model = write_model(tmp_path)
+    catalog = load_parameter_catalog(model)
+
+    assert [entry["name"] for entry in catalog.for_file(str(tmp_path / "parameters.inc"))] == ["rs"]
+    rs = catalog.get("rs")
+    assert (rs["macro"], rs["range"], rs["min_value"], rs["max_value"], rs["units"]) == ("MPRco", "[)", 0.0, 100.0, "Ohm")
+
+
+def test_ifdef_branches(tmp_path):
+    model = write_model(tmp_path)
+
+    names = [entry["name"] for entry in load_parameter_catalog(model).parameters]
+    extended = [entry["name"] for entry in load_parameter_catalog(model, {"EXTENDED": ""}).parameters]
+
+    assert names == ["rs", "basic", "level", "gain"]
+    assert extended == ["rs", "ext", "level", "gain"]
+
+
+def test_catalog_is_rebuilt_after_source_edit(tmp_path):
+    model = write_model(tmp_path)
+    assert load_parameter_catalog(model).get("rs")["default_value"] == 10.0
+
+    (tmp_path / "parameters.inc").write_text(PARAMETERS.replace("10.0", "25.0"))
+    assert load_parameter_catalog(model).get("rs")["default_value"] == 25.0
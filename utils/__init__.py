@@ -1,3 +1,4 @@
 from utils.parameter_parser import ParameterParser
 from utils.parameter_parser import FileIgnoreParamsLoader
 from utils.utils import modify_parameters, find_file, remove_reference_line, duplicate_print_line, shorten_file_path
+from utils.va_preprocessor import ParameterCatalog, load_parameter_catalog
@@ -1,9 +1,10 @@
-import re
 import os
 import csv
 import datetime
 from typing import List, Dict, Set, Optional, Protocol
 
+from utils.va_preprocessor import load_parameter_catalog
+
 
 class IgnoreParamsLoader(Protocol):
     def load_ignore_params(self) -> Set[str]:
@@ -22,35 +23,31 @@ class FileIgnoreParamsLoader(IgnoreParamsLoader):
         
 
 class ParameterParser:
-    def __init__(self, file_path: str, ignore_params_loader: IgnoreParamsLoader) -> None:
+    """
+    Описания параметров модели из каталога препроцессора Verilog-A (utils/va_preprocessor.py).
+
+    Args:
+        file_path (str): Файл параметров (сам .va файл или подключаемый файл, например parameters.inc).
+        ignore_params_loader (IgnoreParamsLoader): Источник имён параметров, не выводимых в GUI.
+        model_file (str): Корневой .va файл модели; по умолчанию — file_path. Если файл параметров
+            подключается моделью, учитываются её макроопределения и условные блоки.
+    """
+    def __init__(self, file_path: str, ignore_params_loader: IgnoreParamsLoader,
+                 model_file: Optional[str] = None) -> None:
         self.file_path = file_path
         self.ignore_params = ignore_params_loader.load_ignore_params()
         self.model_name = os.path.splitext(os.path.basename(file_path))[0]
+        self.model_file = model_file or file_path
 
     def parse(self) -> List[Dict[str, Optional[float]]]:
-        parameters: List[Dict[str, Optional[float]]] = []
-        pattern = re.compile(
-            r"`?(?:MPR|MPI|MPO|IPR|MPIsw|aliasparam)\w*\(\s*(\w+)\s*,\s*([-\d.eE+inf]+)\s*,\s*\"(.*?)\"\s*,\s*([-\d.eE+inf]*)\s*,\s*([-\d.eE+inf]*)\s*,\s*\"(.*?)\"\s*\)"
-        )
-
-        with open(self.file_path, 'r') as file:
-            for line in file:
-                match = pattern.search(line)
-                if match:
-                    name, default_value, units, min_value, max_value, description = match.groups()
-
-                    if name in self.ignore_params:
-                        continue
-
-                    parameters.append({
-                        "name": name,
-                        "default_value": float(default_value) if default_value.replace('.', '', 1).isdigit() else default_value,
-                        "units": units,
-                        "min_value": float(min_value) if min_value and min_value.replace('.', '', 1).isdigit() else None,
-                        "max_value": float(max_value) if max_value and max_value.replace('.', '', 1).isdigit() else None,
-                        "description": description,
-                    })
-        return parameters
+        catalog = load_parameter_catalog(self.model_file)
+        if os.path.abspath(self.model_file) == os.path.abspath(self.file_path):
+            declared = catalog.parameters
+        else:
+            declared = catalog.for_file(self.file_path)
+            if not declared:  # файл параметров не подключается выбранной моделью
+                declared = load_parameter_catalog(self.file_path).parameters
+        return [dict(parameter) for parameter in declared if parameter["name"] not in self.ignore_params]
 
     def save_simulation_results(self, input_file: str, directory: str):
         if not os.path.exists(input_file):
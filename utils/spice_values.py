@@ -0,0 +1,183 @@
+"""
+Числовые значения параметров в нотации SPICE и проверка допустимых диапазонов.
+
+Масштабные множители SPICE не зависят от регистра: f, p, n, u, m (милли), k, meg, g, t, a, mil;
+буквы после множителя игнорируются (10pF = 10p). Диапазон параметра определяется суффиксом
+макроса объявления (MPRoo, MPRco, MPRcz, MPRoz, MPIsw, ...) или скобками from[...) объявления.
+"""
+
+import numpy as np
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+
+# порядок важен: meg и mil проверяются раньше m
+SPICE_SCALE_FACTORS = (("meg", 1e6), ("mil", 25.4e-6), ("t", 1e12), ("g", 1e9), ("k", 1e3), ("m", 1e-3),
+                       ("u", 1e-6), ("n", 1e-9), ("p", 1e-12), ("f", 1e-15), ("a", 1e-18))
+
+INFINITY_NAMES = ("inf", "+inf", "-inf", "infinity", "+infinity", "-infinity")
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+NUMBER_CHARACTERS = "0123456789.+-e"
+
+# скобки диапазона по суффиксу макроса (None — без ограничений) и фиксированные границы
+MACRO_INTERVALS = {"cc": "[]", "oo": "()", "co": "[)", "oc": "(]", "cz": "[)", "oz": "()",
+                   "sw": "[]", "ty": "[]", "nb": None, "ex": None}
+MACRO_BOUNDS = {"cz": (0.0, np.inf), "oz": (0.0, np.inf), "sw": (0.0, 1.0), "ty": (-1.0, 1.0)}
+MACRO_FAMILIES = ("MPR", "MPI", "IPR", "IPI")
+
+Interval = Tuple[float, float, bool, bool]  # (нижняя, верхняя, нижняя включена, верхняя включена)
+
+LOG_RANGE_RATIO = 100.0  # диапазон положительных значений с большим отношением границ меняется по логарифмической шкале
+
+
+def parse_spice_values(values: Sequence[Union[str, float]]) -> np.ndarray:
+    """
+    Векторно переводит значения в нотации SPICE ("22.0a", "14.29m", "1meg", "-1.5e-3k", "inf") в числа.
+
+    Returns:
+        np.ndarray: Значения float64; NaN для строк, не являющихся числом.
+    """
+    array = np.asarray(values)
+    if array.dtype.kind in "fiub":
+        return array.astype(np.float64)
+
+    text = np.char.lower(np.char.strip(array.astype(str)))
+    is_infinity = np.isin(text, INFINITY_NAMES)
+    suffix = np.char.lstrip(text, NUMBER_CHARACTERS)
+    mantissa = np.where(is_infinity, text, np.char.rstrip(text, LETTERS))
+
+    scale = np.ones(text.shape)
+    assigned = is_infinity | (np.char.str_len(suffix) == 0)
+    for name, factor in SPICE_SCALE_FACTORS:
+        matched = ~assigned & np.char.startswith(suffix, name)
+        scale[matched] = factor
+        assigned |= matched
+
+    try:
+        numbers = mantissa.astype(np.float64)
+    except ValueError:
+        numbers = np.array([to_float(value) for value in mantissa.ravel()]).reshape(mantissa.shape)
+    return numbers * scale
+
+
+def to_float(text: str) -> float:
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+
+def parse_spice_number(text: Union[str, float]) -> float:
+    """Одно значение в нотации SPICE; ValueError, если это не число."""
+    value = float(parse_spice_values([text])[0])
+    if np.isnan(value) and str(text).strip().lower() != "nan":
+        raise ValueError(f"Значение не является числом: {text}")
+    return value
+
+
+def parameter_interval(entry: dict) -> Optional[Interval]:
+    """
+    Допустимый диапазон параметра по описанию из каталога параметров.
+    Для макросов MPR*/MPI*/IPR*/IPI* открытость границ задаётся суффиксом имени макроса,
+    для остальных объявлений — скобками from[...). None — параметр не ограничен.
+    """
+    macro = entry.get("macro") or ""
+    suffix = macro[3:] if macro[:3] in MACRO_FAMILIES else None
+    if suffix in MACRO_INTERVALS:
+        brackets = MACRO_INTERVALS[suffix]
+    else:
+        brackets = entry.get("range")
+    if brackets is None:
+        return None
+
+    lower, upper = MACRO_BOUNDS.get(suffix, (entry.get("min_value"), entry.get("max_value")))
+    lower = -np.inf if lower is None else lower
+    upper = np.inf if upper is None else upper
+    return lower, upper, brackets[0] == "[", brackets[1] == "]"
+
+
+def sampling_range(value: float, lower: Optional[float] = None, upper: Optional[float] = None,
+                   span: float = 10.0) -> Tuple[float, float, bool]:
+    """
+    Конечный диапазон изменения параметра (ползунок, выборка суррогатной модели): заданные границы,
+    а отсутствующие или бесконечные — в span раз от значения value. Для широкого диапазона
+    положительных значений шкала логарифмическая.
+
+    Returns:
+        Tuple[float, float, bool]: (нижняя граница, верхняя граница, логарифмическая шкала).
+    """
+    if value > 0:
+        low, high = value / span, value * span
+    elif value < 0:
+        low, high = value * span, value / span
+    else:
+        low, high = -1.0, 1.0
+    lower = lower if lower is not None and np.isfinite(lower) else None
+    upper = upper if upper is not None and np.isfinite(upper) else None
+    low = lower if lower is not None else min(low, upper) if upper is not None else low
+    high = upper if upper is not None else max(high, low)
+    if high <= low:
+        high = low + max(abs(low), 1.0)
+    return low, high, low > 0 and high / low >= LOG_RANGE_RATIO
+
+
+def format_interval(interval: Interval) -> str:
+    lower, upper, lower_closed, upper_closed = interval
+    return f"{'[' if lower_closed else '('}{lower:g}, {upper:g}{']' if upper_closed else ')'}"
+
+
+def find_range_violations(catalog, values: Dict[str, Union[str, float, Sequence]]) -> List[str]:
+    """
+    Проверяет значения параметров по каталогу параметров модели (utils/va_preprocessor.ParameterCatalog).
+
+    Args:
+        catalog: Каталог параметров модели.
+        values: Значения по именам параметров; значение — число, строка в нотации SPICE
+            или последовательность значений (например, точки свипа).
+
+    Returns:
+        list: Сообщения о нарушениях (пустой список — все значения допустимы).
+            Параметры, отсутствующие в каталоге, не проверяются.
+    """
+    names, texts, owners, entries = [], [], [], []
+    for name, value in values.items():
+        entry = catalog.get(name)
+        if entry is None:
+            continue
+        column = list(value) if isinstance(value, (list, tuple, np.ndarray)) else [value]
+        owners.extend([len(entries)] * len(column))
+        texts.extend(str(item) for item in column)
+        names.append(name)
+        entries.append(entry)
+    if not texts:
+        return []
+
+    numbers = parse_spice_values(texts)
+    owners = np.asarray(owners)
+    intervals = [parameter_interval(entry) or (-np.inf, np.inf, True, True) for entry in entries]
+    lower, upper, lower_closed, upper_closed = (np.asarray(column)[owners] for column in zip(*intervals))
+    integer = np.array([entry.get("type") == "integer" for entry in entries])[owners]
+
+    invalid = np.isnan(numbers)
+    outside = ~invalid & (np.where(lower_closed, numbers < lower, numbers <= lower) |
+                          np.where(upper_closed, numbers > upper, numbers >= upper))
+    fractional = ~invalid & ~outside & integer & (numbers != np.round(numbers))
+    excluded = np.zeros(len(numbers), dtype=bool)
+    for index, entry in enumerate(entries):
+        points = [text for text in entry.get("exclude", []) if ":" not in text]
+        if points:
+            selected = owners == index
+            excluded[selected] = np.isin(numbers[selected], parse_spice_values(points))
+
+    messages = []
+    for position in np.flatnonzero(invalid | outside | fractional | excluded):
+        name, text = names[owners[position]], texts[position]
+        if invalid[position]:
+            messages.append(f"{name} = {text}: значение не является числом")
+        elif outside[position]:
+            messages.append(f"{name} = {text}: вне допустимого диапазона {format_interval(intervals[owners[position]])}")
+        elif fractional[position]:
+            messages.append(f"{name} = {text}: параметр принимает только целые значения")
+        else:
+            messages.append(f"{name} = {text}: значение исключено ({', '.join(entries[owners[position]]['exclude'])})")
+    return messages
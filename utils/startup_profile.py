@@ -0,0 +1,58 @@
+import sys
+import time
+
+from contextlib import contextmanager
+from typing import List, Tuple
+
+
+HEAVY_MODULES = ("numpy", "pandas", "matplotlib", "matplotlib.pyplot", "matplotlib.backends.backend_gtk3agg",
+                 "core.simulation_runner", "cairo")
+
+
+class StartupProfiler:
+    """
+    Замер времени запуска приложения (ключ --startup-profile): длительность импортов и этапов
+    инициализации, а также момент, к которому загружены тяжёлые модули.
+    Выключенный профилировщик ничего не замеряет и не выводит.
+    """
+    def __init__(self) -> None:
+        self.enabled = False
+        self.started = time.perf_counter()
+        self.records: List[Tuple[str, float, float]] = []  # (этап, время от запуска, длительность)
+
+    def enable(self):
+        self.enabled = True
+
+    @contextmanager
+    def span(self, name: str):
+        """Замеряет длительность блока кода."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            finished = time.perf_counter()
+            self.records.append((name, finished - self.started, finished - started))
+
+    def mark(self, name: str):
+        """Отмечает момент наступления события (окно показано, конфигурация загружена и т.п.)."""
+        if self.enabled:
+            self.records.append((name, time.perf_counter() - self.started, 0.0))
+
+    def loaded_modules(self) -> List[str]:
+        return [name for name in HEAVY_MODULES if name in sys.modules]
+
+    def report(self, title: str = "Профиль запуска"):
+        """Выводит таблицу этапов запуска и список уже загруженных тяжёлых модулей."""
+        if not self.enabled:
+            return
+        print(f"{title}:")
+        print(f"  {'Этап':<40} {'От запуска, мс':>15} {'Длительность, мс':>17}")
+        for name, at, duration in self.records:
+            print(f"  {name:<40} {at * 1000:>15.1f} {duration * 1000 if duration else 0:>17.1f}")
+        print("  Загруженные модули: " + (", ".join(self.loaded_modules()) or "—"))
+
+
+profiler = StartupProfiler()
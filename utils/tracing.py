@@ -0,0 +1,199 @@
+"""
+Трассировка этапов запуска симуляции.
+
+Этапы (запись параметров, разбор исходников, компиляция, перемещение osdi, эталонная и пользовательская
+симуляции, загрузка результатов, построение графика) оборачиваются во вложенные интервалы span
+с атрибутами (попадание в кэш, размеры файлов, число строк). Интервалы записываются в активную трассу
+текущего контекста (contextvars): одновременные задания очереди ведут свои трассы, этапы графа
+(core/pipeline) и функции главного цикла GUI наследуют трассу задания. Без активной трассы span
+ничего не замеряет.
+
+Трасса экспортируется в формате Chrome trace_event (chrome://tracing, Perfetto) и выводится
+сводной таблицей в GUI и CLI.
+"""
+
+import os
+import json
+import time
+import threading
+import contextvars
+
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class Span:
+    def __init__(self, name: str, start: float, thread_id: int, thread_name: str, parent: Optional["Span"],
+                 attributes: Dict[str, Any]) -> None:
+        self.name = name
+        self.start = start
+        self.end: Optional[float] = None
+        self.thread_id = thread_id
+        self.thread_name = thread_name
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.attributes = attributes
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def set(self, **attributes):
+        """Добавляет атрибуты интервала (например, результат обращения к кэшу после проверки)."""
+        self.attributes.update(attributes)
+
+
+class NullSpan:
+    """Интервал без активной трассы: атрибуты не сохраняются."""
+    def set(self, **attributes):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+def json_value(value):
+    return value if isinstance(value, (str, int, float, bool)) or value is None else str(value)
+
+
+class Trace:
+    """Интервалы одного запуска."""
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans: List[Span] = []
+        self.lock = threading.Lock()
+        self.local = threading.local()  # стек открытых интервалов потока
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        stack = self.local.__dict__.setdefault("stack", [])
+        thread = threading.current_thread()
+        span = Span(name, time.perf_counter(), thread.ident, thread.name, stack[-1] if stack else None, attributes)
+        with self.lock:
+            self.spans.append(span)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            span.end = time.perf_counter()
+            stack.pop()
+
+    @property
+    def duration(self) -> float:
+        return max((span.start + span.duration for span in self.spans), default=self.started) - self.started
+
+    def to_chrome_trace(self) -> dict:
+        """Трасса в формате Chrome trace_event: события "X" (интервалы) и имена потоков."""
+        pid = os.getpid()
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": self.name}}]
+        for thread_id, thread_name in {span.thread_id: span.thread_name for span in self.spans}.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id,
+                           "args": {"name": thread_name}})
+        for span in sorted(self.spans, key=lambda item: item.start):
+            events.append({
+                "name": span.name,
+                "cat": "simulation",
+                "ph": "X",
+                "ts": round((span.start - self.started) * 1e6, 3),
+                "dur": round(span.duration * 1e6, 3),
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": {key: json_value(value) for key, value in span.attributes.items()},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, path: str):
+        with open(path, "w") as file:
+            json.dump(self.to_chrome_trace(), file, ensure_ascii=False)
+
+    def ordered_spans(self) -> List[Span]:
+        """Интервалы в порядке обхода дерева: корневые по времени начала, за каждым — вложенные в него."""
+        children: Dict[Optional[Span], List[Span]] = {}
+        for span in sorted(self.spans, key=lambda item: item.start):
+            children.setdefault(span.parent, []).append(span)
+        ordered: List[Span] = []
+
+        def visit(parent: Optional[Span]):
+            for child in children.get(parent, []):
+                ordered.append(child)
+                visit(child)
+
+        visit(None)
+        return ordered
+
+    def summary(self) -> List[dict]:
+        """Строки сводной таблицы в порядке обхода дерева интервалов, вложенность — отступом имени."""
+        return [{
+            "name": "  " * span.depth + span.name,
+            "start": (span.start - self.started) * 1000,
+            "duration": span.duration * 1000,
+            "thread": span.thread_name,
+            "attributes": ", ".join(f"{key}={value}" for key, value in span.attributes.items()),
+        } for span in self.ordered_spans()]
+
+    def format_summary(self) -> str:
+        lines = [f"{self.name}: {self.duration * 1000:.1f} мс",
+                 f"  {'Этап':<36} {'Начало, мс':>11} {'Длит., мс':>10}  Атрибуты"]
+        for row in self.summary():
+            lines.append(f"  {row['name']:<36} {row['start']:>11.1f} {row['duration']:>10.1f}  {row['attributes']}")
+        return "\n".join(lines)
+
+
+_active_traces: contextvars.ContextVar = contextvars.ContextVar("active_traces", default=())
+
+
+class Tracer:
+    """
+    Активные трассы хранятся в контексте задания (стек: трасса, начатая внутри другой, заменяет её
+    до завершения); last — последняя завершённая трасса (для окна трассировки GUI).
+    """
+    def __init__(self) -> None:
+        self.last: Optional[Trace] = None
+
+    @property
+    def active(self) -> Optional[Trace]:
+        traces: Tuple[Trace, ...] = _active_traces.get()
+        return traces[-1] if traces else None
+
+    def start(self, name: str) -> Trace:
+        trace = Trace(name)
+        _active_traces.set(_active_traces.get() + (trace,))
+        return trace
+
+    def finish(self) -> Optional[Trace]:
+        traces: Tuple[Trace, ...] = _active_traces.get()
+        if not traces:
+            return None
+        _active_traces.set(traces[:-1])
+        self.last = traces[-1]
+        return self.last
+
+    @contextmanager
+    def trace(self, name: str):
+        """Трасса блока: with tracer.trace("Применение изменений") as trace: ..."""
+        trace = self.start(name)
+        try:
+            yield trace
+        finally:
+            self.finish()
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        trace = self.active
+        if trace is None:
+            yield NULL_SPAN
+            return
+        with trace.span(name, **attributes) as span:
+            yield span
+
+
+tracer = Tracer()
+
+
+def span(name: str, **attributes):
+    """Интервал в активной трассе: with span("Компиляция", model=...) as current: current.set(cache="hit")."""
+    return tracer.span(name, **attributes)
@@ -0,0 +1,618 @@
+"""
+Препроцессор Verilog-A и каталог параметров модели.
+
+Исходник модели разбивается на лексемы один раз (с кэшем по файлу), после чего препроцессор
+подключает файлы `include (относительно подключающего файла и каталога модели), выполняет
+`define/`undef, условные блоки `ifdef/`ifndef/`elsif/`else/`endif и раскрывает макросы,
+в том числе семейства MPR*/MPI*/IPR*/IPI*. Из полученного потока лексем извлекаются
+объявления parameter и aliasparam.
+
+Каталог параметров кэшируется по файлу модели и пересобирается только при изменении
+одного из её исходников.
+"""
+
+import os
+import re
+import math
+import threading
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from utils.tracing import span
+
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<continuation>\\[ \t\r]*\n)
+  | (?P<newline>\n)
+  | (?P<space>[ \t\r\f\v]+)
+  | (?P<string>"(?:\\.|[^"\\\n])*")
+  | (?P<directive>`[A-Za-z_]\w*)
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?(?:[TGMKkmunpfa](?![\w$]))?)
+  | (?P<identifier>[A-Za-z_$][\w$]*)
+  | (?P<punctuation>\(\*|\*\)|\*\*|<=|>=|==|!=|&&|\|\||.)
+""", re.DOTALL | re.VERBOSE)
+
+SCALE_FACTORS = {"T": 1e12, "G": 1e9, "M": 1e6, "K": 1e3, "k": 1e3,
+                 "m": 1e-3, "u": 1e-6, "n": 1e-9, "p": 1e-12, "f": 1e-15, "a": 1e-18}
+
+# Макросы стандартного заголовка constants.vams: он встроен в компилятор и может отсутствовать на диске
+STANDARD_DEFINES = {
+    "M_E": "2.7182818284590452354",
+    "M_LOG2E": "1.4426950408889634074",
+    "M_LOG10E": "0.43429448190325182765",
+    "M_LN2": "0.69314718055994530942",
+    "M_LN10": "2.30258509299404568402",
+    "M_PI": "3.14159265358979323846",
+    "M_TWO_PI": "6.28318530717958647693",
+    "M_PI_2": "1.57079632679489661923",
+    "M_PI_4": "0.78539816339744830962",
+    "M_1_PI": "0.31830988618379067154",
+    "M_2_PI": "0.63661977236758134308",
+    "M_2_SQRTPI": "1.12837916709551257390",
+    "M_SQRT2": "1.41421356237309504880",
+    "M_SQRT1_2": "0.70710678118654752440",
+    "P_Q": "1.602176462e-19",
+    "P_C": "2.99792458e8",
+    "P_K": "1.3806503e-23",
+    "P_H": "6.62606876e-34",
+    "P_EPS0": "8.85418792394420013968e-12",
+    "P_U0": "(4.0e-7 * `M_PI)",
+    "P_CELSIUS0": "273.15",
+}
+
+# Директивы компилятора, не влияющие на параметры: пропускаются до конца строки
+IGNORED_DIRECTIVES = {"timescale", "resetall", "default_discipline", "default_transition", "celldefine",
+                      "endcelldefine", "line", "begin_keywords", "end_keywords", "nounconnected_drive",
+                      "unconnected_drive"}
+
+
+def build_parameter_macros() -> Dict[str, str]:
+    """
+    Стандартные макросы объявления параметров CMC-моделей (MPR*/MPI*/IPR*/IPI*).
+    Используются, если исходники их не определяют (например, при разборе parameters.inc без frontdef.inc);
+    определения из исходников имеют приоритет.
+    """
+    ranges = {
+        "nb": ("", ""), "ex": (",exc", " exclude exc"),
+        "cc": (",lwr,upr", " from[lwr:upr]"), "oo": (",lwr,upr", " from(lwr:upr)"),
+        "co": (",lwr,upr", " from[lwr:upr)"), "oc": (",lwr,upr", " from(lwr:upr]"),
+        "cz": ("", " from[0:inf)"), "oz": ("", " from(0:inf)"),
+    }
+    families = {"MPR": ("real", ""), "MPI": ("integer", ""),
+                "IPR": ("real", ' type="instance",'), "IPI": ("integer", ' type="instance",')}
+    macros = {}
+    for prefix, (kind, attribute) in families.items():
+        for suffix, (arguments, bounds) in ranges.items():
+            macros[f"{prefix}{suffix}(nam,def,uni{arguments},des)"] = \
+                f"(*units=uni,{attribute} desc=des*) parameter {kind} nam=def{bounds};"
+    macros["MPIsw(nam,def,uni,des)"] = "(*units=uni, desc=des*) parameter integer nam=def from[0:1];"
+    macros["MPIty(nam,def,uni,des)"] = "(*units=uni, desc=des*) parameter integer nam=def from[-1:1] exclude 0;"
+    return macros
+
+
+MAX_INCLUDE_DEPTH = 32
+
+FUNCTIONS = {"exp": math.exp, "ln": math.log, "log": math.log10, "sqrt": math.sqrt, "pow": math.pow,
+             "abs": abs, "min": min, "max": max}
+
+
+class PreprocessorError(ValueError):
+    pass
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    file: str
+    line: int
+    joined: bool = False          # лексема следует вплотную за предыдущей (без пробела)
+    macro: Optional[str] = None   # макрос, в аргументе которого стояла лексема
+
+
+class Macro(NamedTuple):
+    params: Optional[List[str]]   # None — макрос без аргументов
+    body: List[Token]
+
+
+def tokenize(text: str, file: str = "<string>") -> List[Token]:
+    """Разбивает исходный текст на лексемы. Пробелы и комментарии отбрасываются, переводы строк сохраняются."""
+    tokens: List[Token] = []
+    line = 1
+    joined = False
+    for match in TOKEN_PATTERN.finditer(text):
+        kind, value = match.lastgroup, match.group()
+        if kind in ("comment", "space", "continuation"):
+            joined = False
+        else:
+            tokens.append(Token(kind, value, file, line, joined))
+            joined = kind != "newline"
+        line += value.count("\n")
+    return tokens
+
+
+_token_cache: Dict[str, Tuple[tuple, List[Token]]] = {}
+_token_cache_lock = threading.Lock()
+
+
+def file_stamp(path: str) -> tuple:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def tokenize_file(path: str) -> List[Token]:
+    """Лексемы файла; повторное чтение выполняется только при изменении файла."""
+    stamp = file_stamp(path)
+    with _token_cache_lock:
+        cached = _token_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        tokens = tokenize(file.read(), path)
+    with _token_cache_lock:
+        _token_cache[path] = (stamp, tokens)
+    return tokens
+
+
+class VerilogAPreprocessor:
+    """
+    Препроцессор Verilog-A.
+
+    Args:
+        model_file (str): Корневой .va файл (или подключаемый файл, разбираемый отдельно).
+        defines (dict): Дополнительные макроопределения (аналог ключа -D компилятора).
+        include_dirs (list): Дополнительные каталоги поиска подключаемых файлов.
+    """
+    def __init__(self, model_file: str, defines: Optional[Dict[str, str]] = None,
+                 include_dirs: Iterable[str] = ()) -> None:
+        self.model_file = os.path.abspath(model_file)
+        self.model_dir = os.path.dirname(self.model_file)
+        self.include_dirs = [os.path.abspath(path) for path in include_dirs]
+        self.defines: Dict[str, Macro] = {}
+        self.sources: List[str] = []           # прочитанные файлы в порядке подключения
+        self.missing_includes: List[str] = []  # системные заголовки, отсутствующие на диске
+        self.undefined: List[str] = []         # использованные, но не определённые макросы
+        self.depth = 0
+
+        builtin = {**STANDARD_DEFINES, **build_parameter_macros(), **(defines or {})}
+        text = "\n".join(f"`define {name} {value}" for name, value in builtin.items())
+        self.__process(tokenize(text, "<define>"), [], frozenset())
+
+    def run(self) -> List[Token]:
+        """Выполняет препроцессирование и возвращает поток лексем без директив и переводов строк."""
+        output: List[Token] = []
+        self.__include(self.model_file, output)
+        return output
+
+    def __include(self, path: str, output: List[Token]):
+        if self.depth >= MAX_INCLUDE_DEPTH:
+            raise PreprocessorError(f"Слишком глубокое подключение файлов (циклический `include?): {path}")
+        if path not in self.sources:
+            self.sources.append(path)
+        self.depth += 1
+        try:
+            self.__process(tokenize_file(path), output, frozenset())
+        finally:
+            self.depth -= 1
+
+    def __resolve_include(self, name: str, current_file: str) -> Optional[str]:
+        for base_dir in [os.path.dirname(current_file), self.model_dir, *self.include_dirs]:
+            candidate = os.path.abspath(os.path.join(base_dir, name))
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def __process(self, tokens: List[Token], output: List[Token], expanding: frozenset):
+        conditions: List[List[bool]] = []  # [ветвь активна, ветвь уже выбрана, внешний блок активен]
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            i += 1
+            active = conditions[-1][0] if conditions else True
+
+            if token.kind != "directive":
+                if active and token.kind != "newline":
+                    output.append(token)
+                continue
+
+            name = token.text[1:]
+            if name in ("ifdef", "ifndef"):
+                macro_name, i = self.__read_name(tokens, i, token)
+                taken = active and ((macro_name in self.defines) == (name == "ifdef"))
+                conditions.append([taken, taken, active])
+            elif name == "elsif":
+                macro_name, i = self.__read_name(tokens, i, token)
+                block = self.__current_block(conditions, token)
+                block[0] = block[2] and not block[1] and macro_name in self.defines
+                block[1] = block[1] or block[0]
+            elif name == "else":
+                block = self.__current_block(conditions, token)
+                block[0] = block[2] and not block[1]
+                block[1] = True
+            elif name == "endif":
+                self.__current_block(conditions, token)
+                conditions.pop()
+            elif not active:
+                continue
+            elif name == "define":
+                i = self.__define(tokens, i, token)
+            elif name == "undef":
+                macro_name, i = self.__read_name(tokens, i, token)
+                self.defines.pop(macro_name, None)
+            elif name == "include":
+                i = self.__skip_newlines(tokens, i)
+                if i >= len(tokens) or tokens[i].kind != "string":
+                    raise PreprocessorError(f"{token.file}:{token.line}: ожидается имя файла после `include")
+                include_name = tokens[i].text[1:-1]
+                i += 1
+                path = self.__resolve_include(include_name, token.file)
+                if path is None:
+                    self.missing_includes.append(include_name)
+                else:
+                    self.__include(path, output)
+            elif name in IGNORED_DIRECTIVES:
+                while i < len(tokens) and tokens[i].kind != "newline":
+                    i += 1
+            elif name in self.defines:
+                if name in expanding:
+                    raise PreprocessorError(f"{token.file}:{token.line}: рекурсивное раскрытие макроса `{name}")
+                i = self.__expand(name, tokens, i, output, expanding)
+            else:
+                self.undefined.append(name)
+                output.append(token)
+
+        if conditions:
+            raise PreprocessorError(f"{tokens[-1].file}: не закрыт блок `ifdef")
+
+    @staticmethod
+    def __current_block(conditions: List[List[bool]], token: Token) -> List[bool]:
+        if not conditions:
+            raise PreprocessorError(f"{token.file}:{token.line}: {token.text} без `ifdef")
+        return conditions[-1]
+
+    @staticmethod
+    def __skip_newlines(tokens: List[Token], i: int) -> int:
+        while i < len(tokens) and tokens[i].kind == "newline":
+            i += 1
+        return i
+
+    @staticmethod
+    def __read_name(tokens: List[Token], i: int, directive: Token) -> Tuple[str, int]:
+        if i >= len(tokens) or tokens[i].kind != "identifier":
+            raise PreprocessorError(f"{directive.file}:{directive.line}: ожидается имя макроса после {directive.text}")
+        return tokens[i].text, i + 1
+
+    def __define(self, tokens: List[Token], i: int, directive: Token) -> int:
+        name, i = self.__read_name(tokens, i, directive)
+        params = None
+        if i < len(tokens) and tokens[i].text == "(" and tokens[i].joined:
+            params = []
+            i += 1
+            while i < len(tokens) and tokens[i].text != ")":
+                if tokens[i].kind == "identifier":
+                    params.append(tokens[i].text)
+                i += 1
+            i += 1
+        body = []
+        while i < len(tokens) and tokens[i].kind != "newline":
+            body.append(tokens[i])
+            i += 1
+        self.defines[name] = Macro(params, body)
+        return i
+
+    @staticmethod
+    def __read_arguments(tokens: List[Token], i: int, name: str) -> Tuple[List[List[Token]], int]:
+        i = VerilogAPreprocessor.__skip_newlines(tokens, i)
+        if i >= len(tokens) or tokens[i].text != "(":
+            raise PreprocessorError(f"ожидаются аргументы макроса `{name}")
+        arguments: List[List[Token]] = [[]]
+        depth = 0
+        i += 1
+        while i < len(tokens):
+            token = tokens[i]
+            i += 1
+            if token.kind == "newline":
+                continue
+            if token.text in ("(", "[", "{", "(*"):
+                depth += 1
+            elif token.text in (")", "]", "}", "*)"):
+                if depth == 0:
+                    return arguments, i
+                depth -= 1
+            elif token.text == "," and depth == 0:
+                arguments.append([])
+                continue
+            arguments[-1].append(token)
+        raise PreprocessorError(f"не закрыт список аргументов макроса `{name}")
+
+    def __expand(self, name: str, tokens: List[Token], i: int, output: List[Token], expanding: frozenset) -> int:
+        macro = self.defines[name]
+        if macro.params is None:
+            body = macro.body
+        else:
+            arguments, i = self.__read_arguments(tokens, i, name)
+            substitution = {param: [token if token.macro else token._replace(macro=name) for token in argument]
+                            for param, argument in zip(macro.params, arguments)}
+            body = []
+            for token in macro.body:
+                body.extend(substitution.get(token.text, [token]) if token.kind == "identifier" else [token])
+        self.__process(body, output, expanding | {name})
+        return i
+
+
+def parse_number(text: str) -> float:
+    """Число Verilog-A с необязательным масштабным множителем (22.0a, 1.0p, 14.29m)."""
+    if text[-1] in SCALE_FACTORS:
+        return float(text[:-1]) * SCALE_FACTORS[text[-1]]
+    return float(text)
+
+
+class ConstantExpression:
+    """
+    Вычисление константного выражения (значение по умолчанию или граница диапазона):
+    числа, inf, ранее объявленные параметры, арифметика и математические функции.
+    """
+    def __init__(self, tokens: List[Token], values: Dict[str, float]) -> None:
+        self.tokens = tokens
+        self.values = values
+        self.i = 0
+
+    def evaluate(self) -> Optional[float]:
+        """Значение выражения или None, если выражение не константное."""
+        try:
+            value = self.__sum()
+        except (ArithmeticError, IndexError, KeyError, TypeError, ValueError):
+            return None
+        return float(value) if self.i == len(self.tokens) else None
+
+    def __next(self) -> str:
+        self.i += 1
+        return self.tokens[self.i - 1].text
+
+    def __peek(self) -> Optional[str]:
+        return self.tokens[self.i].text if self.i < len(self.tokens) else None
+
+    def __sum(self) -> float:
+        value = self.__product()
+        while self.__peek() in ("+", "-"):
+            value = value + self.__product() if self.__next() == "+" else value - self.__product()
+        return value
+
+    def __product(self) -> float:
+        value = self.__unary()
+        while self.__peek() in ("*", "/"):
+            value = value * self.__unary() if self.__next() == "*" else value / self.__unary()
+        return value
+
+    def __unary(self) -> float:
+        if self.__peek() in ("+", "-"):
+            return -self.__unary() if self.__next() == "-" else self.__unary()
+        return self.__power()
+
+    def __power(self) -> float:
+        value = self.__primary()
+        if self.__peek() == "**":
+            self.__next()
+            return value ** self.__unary()
+        return value
+
+    def __primary(self) -> float:
+        token = self.tokens[self.i]
+        self.i += 1
+        if token.kind == "number":
+            return parse_number(token.text)
+        if token.text == "(":
+            value = self.__sum()
+            if self.__next() != ")":
+                raise ValueError(token.text)
+            return value
+        if token.kind != "identifier":
+            raise ValueError(token.text)
+        if token.text == "inf":
+            return math.inf
+        if self.__peek() == "(" and token.text in FUNCTIONS:
+            self.__next()
+            arguments = [self.__sum()]
+            while self.__peek() == ",":
+                self.__next()
+                arguments.append(self.__sum())
+            if self.__next() != ")":
+                raise ValueError(token.text)
+            return FUNCTIONS[token.text](*arguments)
+        return self.values[token.text]
+
+
+def join_tokens(tokens: List[Token]) -> str:
+    """Текст выражения; между соседними словами и числами ставится пробел."""
+    parts = []
+    for index, token in enumerate(tokens):
+        if index and token.kind in ("identifier", "number") and tokens[index - 1].kind in ("identifier", "number"):
+            parts.append(" ")
+        parts.append(token.text)
+    return "".join(parts)
+
+
+def attribute_text(tokens: List[Token]) -> str:
+    if len(tokens) == 1 and tokens[0].kind == "string":
+        return tokens[0].text[1:-1]
+    return join_tokens(tokens)
+
+
+def split_top_level(tokens: List[Token], i: int, stop: Iterable[str]) -> Tuple[List[Token], int]:
+    """Лексемы от позиции i до первого разделителя из stop вне скобок."""
+    stop = set(stop)
+    depth = 0
+    start = i
+    while i < len(tokens):
+        text = tokens[i].text
+        if depth == 0 and text in stop:
+            break
+        if text in ("(", "[", "{"):
+            depth += 1
+        elif text in (")", "]", "}"):
+            depth -= 1
+        i += 1
+    return tokens[start:i], i
+
+
+def extract_parameters(tokens: List[Token]) -> Tuple[List[dict], Dict[str, str]]:
+    """
+    Извлекает из препроцессированного потока лексем объявления parameter и aliasparam.
+
+    Returns:
+        tuple: (список описаний параметров в порядке объявления, псевдонимы {псевдоним: параметр}).
+    """
+    parameters: List[dict] = []
+    aliases: Dict[str, str] = {}
+    values: Dict[str, float] = {}
+    attributes: Dict[str, str] = {}
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token.text == "(*":
+            attributes, i = {}, i + 1
+            while i < len(tokens) and tokens[i].text != "*)":
+                if tokens[i].kind == "identifier" and i + 1 < len(tokens) and tokens[i + 1].text == "=":
+                    name = tokens[i].text
+                    value, i = split_top_level(tokens, i + 2, (",", "*)"))
+                    attributes[name] = attribute_text(value)
+                else:
+                    i += 1
+            i += 1
+            continue
+
+        if token.text == "aliasparam" and i + 3 < len(tokens) and tokens[i + 2].text == "=":
+            aliases[tokens[i + 1].text] = tokens[i + 3].text
+            i += 4
+        elif token.text == "parameter":
+            i = parse_declaration(tokens, i + 1, attributes, parameters, values)
+        else:
+            i += 1
+        attributes = {}
+    return parameters, aliases
+
+
+def parse_declaration(tokens: List[Token], i: int, attributes: Dict[str, str],
+                        parameters: List[dict], values: Dict[str, float]) -> int:
+    kind = "real"
+    if i < len(tokens) and tokens[i].text in ("real", "integer", "string"):
+        kind = tokens[i].text
+        i += 1
+
+    while i + 1 < len(tokens) and tokens[i].kind == "identifier" and tokens[i + 1].text == "=":
+        name_token = tokens[i]
+        default, i = split_top_level(tokens, i + 2, ("from", "exclude", ",", ";"))
+        entry = {
+            "name": name_token.text,
+            "default_value": None,
+            "default_text": join_tokens(default),
+            "units": attributes.get("units", ""),
+            "min_value": None,
+            "max_value": None,
+            "description": attributes.get("desc", ""),
+            "type": kind,
+            "instance": attributes.get("type") == "instance",
+            "range": None,       # скобки диапазона from: "[]", "()", "[)", "(]"
+            "exclude": [],
+            "macro": name_token.macro,
+            "file": name_token.file,
+            "line": name_token.line,
+        }
+        value = ConstantExpression(default, values).evaluate() if kind != "string" else None
+        entry["default_value"] = value if value is not None else entry["default_text"]
+        if value is not None:
+            values[name_token.text] = value
+
+        while i < len(tokens) and tokens[i].text in ("from", "exclude"):
+            keyword = tokens[i].text
+            i += 1
+            bracket = i < len(tokens) and tokens[i].text in ("[", "(")
+            # exclude (a:b) — исключённый интервал, exclude value — исключённое значение
+            if bracket and (keyword == "from" or
+                            ":" in (t.text for t in split_top_level(tokens, i + 1, (")", "]"))[0])):
+                opening = tokens[i].text
+                lower, i = split_top_level(tokens, i + 1, (":",))
+                upper, i = split_top_level(tokens, i + 1, (")", "]"))
+                closing = tokens[i].text if i < len(tokens) else ")"
+                i += 1
+                if keyword == "from":
+                    entry["range"] = opening + closing
+                    entry["min_value"] = ConstantExpression(lower, values).evaluate()
+                    entry["max_value"] = ConstantExpression(upper, values).evaluate()
+                else:
+                    entry["exclude"].append(opening + join_tokens(lower) + ":" + join_tokens(upper) + closing)
+            else:
+                excluded, i = split_top_level(tokens, i, ("from", "exclude", ",", ";"))
+                if keyword == "exclude":
+                    entry["exclude"].append(join_tokens(excluded))
+
+        parameters.append(entry)
+        if i < len(tokens) and tokens[i].text == ",":
+            i += 1
+    return i
+
+
+class ParameterCatalog:
+    """
+    Каталог параметров модели: описания всех параметров из модели и подключённых файлов.
+
+    Attributes:
+        parameters (list): Описания в порядке объявления (ключи name, default_value, default_text, units,
+            min_value, max_value, description, type, instance, range, exclude, macro, file, line).
+        aliases (dict): Псевдонимы aliasparam.
+        stamps (dict): (mtime, размер) исходников на момент разбора.
+    """
+    def __init__(self, model_file: str, parameters: List[dict], aliases: Dict[str, str],
+                 stamps: Dict[str, tuple], missing_includes: List[str]) -> None:
+        self.model_file = model_file
+        self.parameters = parameters
+        self.aliases = aliases
+        self.stamps = stamps
+        self.missing_includes = missing_includes
+        self.by_name = {entry["name"].lower(): entry for entry in parameters}
+
+    def is_current(self) -> bool:
+        """True, если ни один из исходников не изменился после разбора."""
+        try:
+            return all(file_stamp(path) == stamp for path, stamp in self.stamps.items())
+        except OSError:
+            return False
+
+    def for_file(self, path: str) -> List[dict]:
+        """Параметры, объявленные в файле path (например, в parameters.inc)."""
+        path = os.path.abspath(path)
+        return [entry for entry in self.parameters if entry["file"] == path]
+
+    def get(self, name: str) -> Optional[dict]:
+        """Описание параметра по имени или псевдониму (без учёта регистра, как в SPICE)."""
+        name = name.lower()
+        aliases = {alias.lower(): target.lower() for alias, target in self.aliases.items()}
+        return self.by_name.get(aliases.get(name, name))
+
+
+_catalogs: Dict[tuple, ParameterCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def load_parameter_catalog(model_file: str, defines: Optional[Dict[str, str]] = None) -> ParameterCatalog:
+    """
+    Возвращает каталог параметров модели. Каталог кэшируется по файлу модели и набору макроопределений;
+    проверка актуальности — сравнение mtime и размеров исходников, без чтения файлов.
+    """
+    model_file = os.path.abspath(model_file)
+    key = (model_file, tuple(sorted((defines or {}).items())))
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+    if catalog is not None and catalog.is_current():
+        return catalog
+
+    with span("Препроцессор Verilog-A", model=os.path.basename(model_file)) as current:
+        preprocessor = VerilogAPreprocessor(model_file, defines=defines)
+        parameters, aliases = extract_parameters(preprocessor.run())
+        with _token_cache_lock:
+            stamps = {path: _token_cache[path][0] for path in preprocessor.sources}
+        current.set(sources=len(stamps), parameters=len(parameters))
+    catalog = ParameterCatalog(model_file, parameters, aliases, stamps, preprocessor.missing_includes)
+    with _catalogs_lock:
+        _catalogs[key] = catalog
+    return catalog